@@ -1,4 +1,4 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, Response, stream_with_context, g
+from flask import Flask, render_template, request, jsonify, redirect, url_for, Response, stream_with_context, g, session
 import csv
 from pathlib import Path
 import os
@@ -8,20 +8,28 @@ import random
 import json
 import time
 import threading
-from queue import Queue, Empty
+from queue import Empty
 import logging
 import socket
+import bisect
+from array import array
+import gzip
+import hashlib
+import hmac
+import base64
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import event, extract, or_
+from sqlalchemy import bindparam, event, extract, or_, update
 from sqlalchemy.engine import Engine
 from sqlalchemy.orm import joinedload
 import sqlite3
+import click
 from flask_migrate import Migrate, upgrade as alembic_upgrade
 from flask_login import LoginManager, UserMixin, current_user, logout_user, login_user
 from authlib.integrations.flask_client import OAuth
 from dotenv import load_dotenv
 from functools import lru_cache
-from collections import deque
+from collections import deque, OrderedDict
+import make67_puzzles
 
 # Load environment variables from a .env file if present
 load_dotenv()
@@ -203,6 +211,10 @@ class User(db.Model, UserMixin):
     # displayed flips only after the overlay has rendered and client calls /ack.
     # Prevents deploy-race losses where the client JS predates the handler.
     mr_a_rain_displayed = db.Column(db.Boolean, nullable=False, default=False)
+    # Monotonic per-user state version shared by every worker/instance. Bumped
+    # atomically in SQL whenever inventory, currency or effects change so cached
+    # state can be validated with a single column read.
+    make67_state_version = db.Column(db.Integer, nullable=False, default=0)
 
 
 # If using SQLite locally, enable WAL mode to reduce writer blocking and improve read concurrency.
@@ -336,6 +348,21 @@ class ChatMessage6or7(db.Model):
     created_at = db.Column(db.DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc), index=True)
 
 
+# --- Chat archive: old messages of both rooms, packed into gzip'd JSON blocks ---
+class ChatArchiveBlock(db.Model):
+    __tablename__ = 'chat_archive_blocks'
+    __table_args__ = (db.Index('ix_chat_archive_blocks_room_last_id', 'room', 'last_id'),)
+    id = db.Column(db.Integer, primary_key=True)
+    room = db.Column(db.String(16), nullable=False)  # 'make67' | 'make6or7'
+    first_id = db.Column(db.Integer, nullable=False)
+    last_id = db.Column(db.Integer, nullable=False)
+    first_at = db.Column(db.DateTime(timezone=True), nullable=False)
+    last_at = db.Column(db.DateTime(timezone=True), nullable=False)
+    count = db.Column(db.Integer, nullable=False)
+    data = db.Column(db.LargeBinary, nullable=False)  # gzip(JSON list of messages, ascending id)
+    created_at = db.Column(db.DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+
+
 @login_manager.user_loader
 def load_user(user_id: str):
     # Basic user loader for Flask-Login; will be used once Google auth is added
@@ -533,6 +560,11 @@ def record_click():
     # Optional bounds check for a 10x10 grid
     if not (0 <= x < 10 and 0 <= y < 10):
         return jsonify({"ok": False, "error": "Coordinates out of bounds"}), 400
+    limited = _rate_limit('mood_click')
+    if limited is None:
+        limited = _rate_limit('mood_click_ip', f"ip:{_rate_limit_ip()}")
+    if limited is not None:
+        return limited
 
     # Enforce 10-minute per-user throttle for authenticated users
     user_id = current_user.get_id() if getattr(current_user, 'is_authenticated', False) else None
@@ -1440,9 +1472,15 @@ def api_session_stats(session_id: int):
     s = db.session.get(Session, session_id)
     if not s or not s.active:
         return jsonify({'ok': False, 'error': 'NOT_FOUND'}), 404
-    subs = MoodSubmission.query.filter(MoodSubmission.session_id == session_id).all()
-    stats = _compute_stats(subs)
-    return jsonify({'ok': True, 'heatmap': stats['heatmap'], 'max_count': stats['max_count'], 'total': stats['total']})
+    # Every student in a live session polls this; share one computation across workers
+    cache_key = f"stats:session:{session_id}"
+    body = _cache_backend.get(cache_key)
+    if body is None:
+        subs = MoodSubmission.query.filter(MoodSubmission.session_id == session_id).all()
+        stats = _compute_stats(subs)
+        body = _json_bytes({'ok': True, 'heatmap': stats['heatmap'], 'max_count': stats['max_count'], 'total': stats['total']})
+        _cache_backend.set(cache_key, body, max(1, int(os.environ.get('SESSION_STATS_TTL_SEC', '3'))))
+    return Response(body, mimetype='application/json')
 
 
 # --- Make67 APIs ---
@@ -1469,15 +1507,115 @@ def _is_make6or7_chat_eligible() -> bool:
 
 
 # --- In-memory Make67 chat hub (process-local) ---
+class _Subscriber:
+    """One SSE connection on the broadcast bus and what it wants to receive.
+    kind is 'chat' (chat messages only) or 'events' (gameplay events);
+    game_type None means both games.
+    """
+    __slots__ = ('q', 'kind', 'uid', 'game_type')
+
+    def __init__(self, kind: str, uid: str | None = None, game_type: str | None = None):
+        resync = '/api/make67/chat/since' if kind == 'chat' else '/api/make67/events/poll'
+        self.q = _SubscriberQueue(_M67_SUB_QUEUE_MAX, _M67_SLOW_CONSUMER_POLICY, resync)
+        self.kind = kind
+        self.uid = str(uid) if uid else None
+        self.game_type = game_type
+
+
+# Slow-consumer handling for SSE subscriber queues:
+#   drop_oldest - discard the oldest queued frame and send the client a resync hint
+#   disconnect  - close the stream with a resync hint carrying the reason
+_M67_SUB_QUEUE_MAX = int(os.environ.get('M67_SUB_QUEUE_MAX', '100'))
+_M67_SLOW_CONSUMER_POLICY = (os.environ.get('M67_SLOW_CONSUMER_POLICY') or 'drop_oldest').strip().lower()
+
+
+class _SubscriberQueue:
+    """Bounded frame queue for one SSE subscriber. put_nowait never blocks or raises,
+    so a slow client can't stall a broadcast; overflow is handled by the policy above.
+    """
+
+    def __init__(self, maxsize: int, policy: str, resync_url: str):
+        self._cond = threading.Condition()
+        self._frames: deque = deque()  # (enqueued_at, seq, frame)
+        self.maxsize = maxsize
+        self.policy = policy
+        self.resync_url = resync_url
+        self.delivered = 0
+        self.dropped = 0
+        self.high_water = 0
+        self.closed_reason: str | None = None
+        self.finished = False  # closed and the closing hint was handed out
+        self._owe_resync = False
+        # Frames with seq <= this were already sent by a Last-Event-ID replay
+        self.skip_through = 0
+
+    def put_nowait(self, frame: bytes, seq: int | None = None) -> bool:
+        """Queue a frame; False means the subscriber is closed and should be dropped."""
+        with self._cond:
+            if self.closed_reason:
+                return False
+            if len(self._frames) >= self.maxsize:
+                if self.policy == 'disconnect':
+                    self.dropped += len(self._frames)
+                    self._frames.clear()
+                    self.closed_reason = 'slow_consumer'
+                    self._cond.notify()
+                    return False
+                self._frames.popleft()
+                self.dropped += 1
+                self._owe_resync = True
+            self._frames.append((time.time(), seq, frame))
+            if len(self._frames) > self.high_water:
+                self.high_water = len(self._frames)
+            self._cond.notify()
+            return True
+
+    def get(self, timeout: float) -> bytes:
+        """Next frame, a resync hint if frames were lost, or Empty after timeout."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._frames or self._owe_resync or self.closed_reason, timeout)
+            if self.closed_reason:
+                self.finished = True
+                return self.resync_frame(self.closed_reason)
+            if self._owe_resync:
+                self._owe_resync = False
+                return self.resync_frame('lagged')
+            while self._frames:
+                _, seq, frame = self._frames.popleft()
+                if seq is not None and seq <= self.skip_through:
+                    continue
+                self.delivered += 1
+                return frame
+            raise Empty
+
+    def resync_frame(self, reason: str) -> bytes:
+        return _sse_frame({'type': 'resync', 'reason': reason, 'dropped': self.dropped, 'poll': self.resync_url})
+
+    def stats(self) -> dict:
+        with self._cond:
+            oldest = self._frames[0][0] if self._frames else None
+            return {
+                'queued': len(self._frames),
+                'lag_sec': round(time.time() - oldest, 3) if oldest else 0.0,
+                'high_water': self.high_water,
+                'delivered': self.delivered,
+                'dropped': self.dropped,
+                'closed_reason': self.closed_reason,
+            }
+
+
 _m67_subscribers_lock = threading.Lock()
-_m67_subscribers: set[Queue] = set()
-_m67_last_post_by_ip: dict[str, float] = {}
+_m67_subscribers: set[_Subscriber] = set()
+# Routing indexes so a broadcast only touches interested subscribers
+_m67_subs_by_kind: dict[str, set[_Subscriber]] = {'chat': set(), 'events': set()}
+_m67_subs_by_uid: dict[str, set[_Subscriber]] = {}
 _m67_message_count: int = 0
+_m67_slow_disconnects: int = 0
 
 # --- Make67 presence tracking (process-local) ---
 _m67_presence_lock = threading.Lock()
 _m67_online_counts: dict[str, int] = {}
-_m67_queue_owner: dict[Queue, str] = {}
+_m67_queue_owner: dict[_SubscriberQueue, str] = {}
 # Additional lightweight presence for polling clients (last ping timestamp, seconds)
 _m67_poll_presence: dict[str, float] = {}
 
@@ -1496,18 +1634,13 @@ def _m67_periodic_cleanup():
     _m67_last_cleanup = now
     cutoff = now - _M67_STALE_THRESHOLD
 
-    # Clean up rate-limit dict (entries older than 1 hour)
-    stale_ips = [ip for ip, ts in _m67_last_post_by_ip.items() if ts < cutoff]
-    for ip in stale_ips:
-        _m67_last_post_by_ip.pop(ip, None)
-
     # Clean up presence dict (entries older than 1 hour)
     with _m67_presence_lock:
         stale_presence = [uid for uid, ts in _m67_poll_presence.items() if ts < cutoff]
         for uid in stale_presence:
             _m67_poll_presence.pop(uid, None)
 
-def _m67_presence_connect(uid: str | None, q: Queue):
+def _m67_presence_connect(uid: str | None, q: _SubscriberQueue):
     if not uid:
         return
     try:
@@ -1520,7 +1653,7 @@ def _m67_presence_connect(uid: str | None, q: Queue):
         _m67_queue_owner[q] = uid_s
         _m67_online_counts[uid_s] = _m67_online_counts.get(uid_s, 0) + 1
 
-def _m67_presence_disconnect(q: Queue):
+def _m67_presence_disconnect(q: _SubscriberQueue):
     with _m67_presence_lock:
         uid_s = _m67_queue_owner.pop(q, None)
         if uid_s is not None:
@@ -1556,15 +1689,12 @@ def _m67_presence_poll_ping(uid: str | int | None):
     with _m67_presence_lock:
         _m67_poll_presence[uid_s] = time.time()
 
-# --- In-memory Make67 solve-rate tracking (process-local) ---
-_m67_recent_solves_lock = threading.Lock()
-_m67_recent_solves: dict[str, deque] = {}
-
 # --- Make67 inventory (DB-backed); legacy in-memory kept for backward compat ---
 _m67_inventory_lock = threading.Lock()
 _m67_inventories: dict[str, list[dict]] = {}
 
-# Per-user ephemeral state version to help clients ignore stale state from other instances
+# Per-user state version lives in users.make67_state_version; this dict is only a
+# fallback if the DB update fails (mirrors the legacy inventory fallback above)
 _m67_state_version_lock = threading.Lock()
 _m67_state_version: dict[str, int] = {}
 
@@ -1576,9 +1706,59 @@ _m67_banana_lock = threading.Lock()
 _m67_banana_peel: dict[str, dict] = {}
 
 # --- Lightweight gameplay events log for polling clients ---
+class _EventRing:
+    """Fixed-size ring of pre-serialized events indexed by seq.
+    Slot for seq N is N % capacity, so a `since` lookup is arithmetic and a poll
+    only touches the events it returns. Seqs may have gaps (a cross-process bus
+    hands out one global sequence); each slot remembers its seq so a gap never
+    resurfaces an older event. Callers hold _m67_event_lock.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        # slot -> (seq, payload, to, game_type); to/game_type let SSE replay apply bus routing
+        self._buf: list[tuple | None] = [None] * capacity
+        self.last_seq = 0
+        # Highest seq actually logged here; last_seq may run ahead of it when a transport
+        # syncs the global counter (other workers' events, chat rows in the bus table)
+        self.newest_logged = 0
+
+    def append(self, seq: int, payload: bytes, to=None, game_type: str | None = None):
+        self._buf[seq % self.capacity] = (seq, payload, frozenset(map(str, to)) if to is not None else None, game_type)
+        if seq > self.last_seq:
+            self.last_seq = seq
+        if seq > self.newest_logged:
+            self.newest_logged = seq
+
+    def oldest_seq(self) -> int:
+        """Lowest seq that can still be held; anything older has been overwritten."""
+        return max(self.last_seq - self.capacity + 1, 1)
+
+    def entries_since(self, since: int, limit: int) -> list[tuple]:
+        """(seq, payload, to, game_type) for seq > since, from the newest `limit` seqs at most."""
+        first = max(since + 1, self.oldest_seq(), self.last_seq - limit + 1)
+        out = []
+        for s in range(first, self.last_seq + 1):
+            entry = self._buf[s % self.capacity]
+            if entry is not None and entry[0] == s:
+                out.append(entry)
+        return out
+
+    def since(self, since: int, limit: int) -> list[bytes]:
+        """Serialized events with seq > since, from the newest `limit` seqs at most."""
+        return [entry[1] for entry in self.entries_since(since, limit)]
+
+
 _m67_event_lock = threading.Lock()
+# Long-poll waiters block on this until an event past their cursor is logged
+_m67_event_cond = threading.Condition(_m67_event_lock)
 _m67_event_seq: int = 0
-_m67_event_log: deque = deque(maxlen=2000)
+_m67_event_log = _EventRing(2000)
+# Long-polls hold a whole worker under gunicorn's sync profile, so they are on by default
+# only with the gevent profile (see gunicorn.conf.py); the env vars below still override.
+_M67_LONGPOLL_DEFAULT_SEC = '25' if os.environ.get('M67_WORKER_PROFILE', 'sync').strip().lower() == 'gevent' else '0'
+# Upper bound for ?wait= on events/poll; 0 turns long-polling off (plain short-poll)
+_M67_EVENTS_LONGPOLL_MAX_SEC = float(os.environ.get('M67_EVENTS_LONGPOLL_MAX_SEC', _M67_LONGPOLL_DEFAULT_SEC))
 
 # --- Tournament in-memory state (process-local) ---
 _tourney_lock = threading.Lock()
@@ -1586,7 +1766,9 @@ _tourney_active: dict | None = None        # Current active tournament state
 # Structure when active: {
 #   'id': str, 'game_type': str, 'starts_at': datetime, 'ends_at': datetime,
 #   'solves': {uid: int}, 'participants': set[uid], 'status': str,
-#   'flush_dirty': set[uid], 'names': {uid: str}   # cached display names
+#   'flush_dirty': set[uid], 'names': {uid: str},  # cached display names
+#   'schedule': _TourneySchedule, 'pos': {uid: int},  # shared puzzle order, next index per player
+#   'pids': {uid: participant row id}  # assigned at join, so flushes are bulk UPDATEs by primary key
 # }
 
 # Static shop catalog
@@ -1667,42 +1849,791 @@ _M67_CATALOG = {
 
 
 # --- Lightweight caches to prevent read-thrash and head-of-line blocking during spikes ---
-# Leaderboard small TTL cache (top/banned lists only; per-user "me" calculated live)
-_m67_lb_cache_lock = threading.Lock()
-_m67_lb_cache: dict[str, object] = {  # keys: 'expires', 'data'
-    'expires': 0.0,
-    'data': None,
+def _json_bytes(obj) -> bytes:
+    """Compact UTF-8 JSON encoding used for pre-serialized response fragments."""
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _content_hash(data: bytes) -> str:
+    """Short, stable content hash for ETags."""
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+# Pluggable cache backend. Every gunicorn worker (and every Render instance) used to
+# keep its own dict caches, so N workers rebuilt the same leaderboard N times per TTL.
+# The backend is chosen via M67_CACHE_BACKEND:
+#   local  - process-local dict (default; same behavior as before)
+#   sqlite - shared file (M67_CACHE_PATH) for all workers on one host
+#   redis  - any Redis-protocol server (M67_CACHE_URL / REDIS_URL) for multi-instance
+# Values are always bytes so every backend stores exactly what gets sent on the wire.
+class _CacheBackend:
+    """Base class: wraps backend ops with hit/miss/error accounting.
+    Backend failures are never fatal; they degrade to a cache miss.
+    """
+    name = 'base'
+
+    def __init__(self):
+        self._stats_lock = threading.Lock()
+        self._ns_stats: dict[str, list[int]] = {}  # namespace -> [hits, misses]
+        self._errors = 0
+
+    def _count(self, key: str, hit: bool):
+        ns = key.split(':', 1)[0]
+        with self._stats_lock:
+            st = self._ns_stats.setdefault(ns, [0, 0])
+            st[0 if hit else 1] += 1
+
+    def _count_error(self):
+        with self._stats_lock:
+            self._errors += 1
+
+    def get(self, key: str) -> bytes | None:
+        try:
+            val = self._get(key)
+        except Exception as e:
+            self._count_error()
+            app.logger.debug("cache backend=%s get failed key=%s err=%s", self.name, key, e)
+            val = None
+        self._count(key, val is not None)
+        return val
+
+    def set(self, key: str, value: bytes, ttl: float):
+        try:
+            self._set(key, value, max(0.001, float(ttl)))
+        except Exception as e:
+            self._count_error()
+            app.logger.debug("cache backend=%s set failed key=%s err=%s", self.name, key, e)
+
+    def add(self, key: str, value: bytes, ttl: float) -> bool:
+        """Store value only if key is absent (or expired), atomically. Returns False when
+        the key already exists. A backend failure fails open (True), like a get miss.
+        """
+        try:
+            return bool(self._add(key, value, max(0.001, float(ttl))))
+        except Exception as e:
+            self._count_error()
+            app.logger.debug("cache backend=%s add failed key=%s err=%s", self.name, key, e)
+            return True
+
+    def delete(self, key: str):
+        try:
+            self._delete(key)
+        except Exception:
+            self._count_error()
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            namespaces = {}
+            hits = misses = 0
+            for ns, (h, m) in self._ns_stats.items():
+                hits += h
+                misses += m
+                namespaces[ns] = {'hits': h, 'misses': m, 'hit_ratio': round(h / (h + m), 4) if (h + m) else None}
+            return {
+                'backend': self.name,
+                'hits': hits,
+                'misses': misses,
+                'hit_ratio': round(hits / (hits + misses), 4) if (hits + misses) else None,
+                'errors': self._errors,
+                'namespaces': namespaces,
+            }
+
+    def _get(self, key: str) -> bytes | None:
+        raise NotImplementedError
+
+    def _set(self, key: str, value: bytes, ttl: float):
+        raise NotImplementedError
+
+    def _add(self, key: str, value: bytes, ttl: float) -> bool:
+        raise NotImplementedError
+
+    def _delete(self, key: str):
+        raise NotImplementedError
+
+
+class _LocalCacheBackend(_CacheBackend):
+    """Process-local TTL cache with a size cap (oldest insert evicted first).
+    max_entries=None never evicts a live entry; expired ones are dropped lazily
+    from the head, which holds the oldest inserts.
+    """
+    name = 'local'
+
+    def __init__(self, max_entries: int | None = 4096):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._data: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._max_entries = max_entries
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._data[key]
+                return None
+            return entry[1]
+
+    def _set(self, key, value, ttl):
+        with self._lock:
+            self._put_locked(key, value, ttl)
+
+    def _add(self, key, value, ttl):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > time.time():
+                return False
+            self._put_locked(key, value, ttl)
+            return True
+
+    def _put_locked(self, key, value, ttl):
+        now = time.time()
+        self._data.pop(key, None)
+        self._data[key] = (now + ttl, value)
+        if self._max_entries is None:
+            for _ in range(2):
+                head_key, (expires, _value) = next(iter(self._data.items()))
+                if expires > now:
+                    break
+                del self._data[head_key]
+        else:
+            while len(self._data) > self._max_entries:
+                self._data.popitem(last=False)
+
+    def _delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class _SQLiteCacheBackend(_CacheBackend):
+    """Shared-file cache: every worker process on the host sees the same entries.
+    One connection per thread; WAL keeps readers from blocking the writer.
+    """
+    name = 'sqlite'
+    _PURGE_EVERY = 500  # sets between expired-row sweeps
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self._tls = threading.local()
+        self._sets = 0
+        self._conn().execute(
+            'CREATE TABLE IF NOT EXISTS cache_entries ('
+            ' key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL)'
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._tls, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=2.0, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._tls.conn = conn
+        return conn
+
+    def _get(self, key):
+        row = self._conn().execute('SELECT value, expires FROM cache_entries WHERE key = ?', (key,)).fetchone()
+        if row is None or row[1] <= time.time():
+            return None
+        return bytes(row[0])
+
+    def _set(self, key, value, ttl):
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            'INSERT OR REPLACE INTO cache_entries (key, value, expires) VALUES (?, ?, ?)',
+            (key, sqlite3.Binary(value), now + ttl),
+        )
+        self._maybe_purge(conn, now)
+
+    def _maybe_purge(self, conn: sqlite3.Connection, now: float):
+        self._sets += 1
+        if self._sets % self._PURGE_EVERY == 0:
+            conn.execute('DELETE FROM cache_entries WHERE expires <= ?', (now,))
+
+    def _add(self, key, value, ttl):
+        now = time.time()
+        # An expired row counts as absent: the upsert only overwrites it in that case
+        conn = self._conn()
+        cur = conn.execute(
+            'INSERT INTO cache_entries (key, value, expires) VALUES (?, ?, ?)'
+            ' ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires = excluded.expires'
+            ' WHERE cache_entries.expires <= ?',
+            (key, sqlite3.Binary(value), now + ttl, now),
+        )
+        self._maybe_purge(conn, now)
+        return cur.rowcount == 1
+
+    def _delete(self, key):
+        self._conn().execute('DELETE FROM cache_entries WHERE key = ?', (key,))
+
+
+class _RedisCacheBackend(_CacheBackend):
+    """Minimal Redis-protocol (RESP2) client; no extra dependency required.
+    Works against Redis, Valkey, KeyDB or any local stand-in speaking RESP.
+    """
+    name = 'redis'
+
+    def __init__(self, url: str):
+        super().__init__()
+        from urllib.parse import urlparse
+        parsed = urlparse(url)
+        self.host = parsed.hostname or '127.0.0.1'
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db_index = int((parsed.path or '/0').lstrip('/') or 0)
+        self._tls = threading.local()
+
+    def _sock(self):
+        f = getattr(self._tls, 'f', None)
+        if f is None:
+            sock = socket.create_connection((self.host, self.port), timeout=1.0)
+            f = sock.makefile('rwb')
+            try:
+                if self.password:
+                    self._roundtrip(f, 'AUTH', self.password)
+                if self.db_index:
+                    self._roundtrip(f, 'SELECT', str(self.db_index))
+            except Exception:
+                # Never pool a connection whose handshake failed
+                f.close()
+                sock.close()
+                raise
+            self._tls.f = f
+        return f
+
+    @staticmethod
+    def _encode(args) -> bytes:
+        out = [b'*%d\r\n' % len(args)]
+        for a in args:
+            b = a if isinstance(a, bytes) else str(a).encode('utf-8')
+            out.append(b'$%d\r\n%s\r\n' % (len(b), b))
+        return b''.join(out)
+
+    def _read_reply(self, f):
+        line = f.readline()
+        if not line:
+            raise ConnectionError('connection closed')
+        kind, rest = line[:1], line[1:-2]
+        if kind == b'+':
+            return rest
+        if kind == b'-':
+            raise RuntimeError(rest.decode('utf-8', 'replace'))
+        if kind == b':':
+            return int(rest)
+        if kind == b'$':
+            n = int(rest)
+            if n < 0:
+                return None
+            data = f.read(n + 2)
+            return data[:-2]
+        if kind == b'*':
+            n = int(rest)
+            return None if n < 0 else [self._read_reply(f) for _ in range(n)]
+        raise RuntimeError('bad RESP reply')
+
+    def _roundtrip(self, f, *args):
+        f.write(self._encode(args))
+        f.flush()
+        return self._read_reply(f)
+
+    def command(self, *args):
+        """Run one command, reconnecting once if the pooled socket went stale."""
+        for attempt in (0, 1):
+            try:
+                return self._roundtrip(self._sock(), *args)
+            except (OSError, ConnectionError):
+                f = getattr(self._tls, 'f', None)
+                self._tls.f = None
+                try:
+                    if f is not None:
+                        f.close()
+                except Exception:
+                    pass
+                if attempt:
+                    raise
+
+    def _get(self, key):
+        return self.command('GET', key)
+
+    def _set(self, key, value, ttl):
+        self.command('SET', key, value, 'PX', max(1, int(ttl * 1000)))
+
+    def _add(self, key, value, ttl):
+        return self.command('SET', key, value, 'PX', max(1, int(ttl * 1000)), 'NX') is not None
+
+    def _delete(self, key):
+        self.command('DEL', key)
+
+
+def _make_cache_backend() -> _CacheBackend:
+    kind = (os.environ.get('M67_CACHE_BACKEND') or 'local').strip().lower()
+    try:
+        if kind == 'sqlite':
+            import tempfile
+            path = os.environ.get('M67_CACHE_PATH') or str(Path(tempfile.gettempdir()) / 'moodmeter_cache.sqlite3')
+            return _SQLiteCacheBackend(path)
+        if kind == 'redis':
+            url = os.environ.get('M67_CACHE_URL') or os.environ.get('REDIS_URL') or 'redis://127.0.0.1:6379/0'
+            return _RedisCacheBackend(url)
+    except Exception as e:
+        app.logger.warning("Cache backend %s unavailable, falling back to local: %s", kind, e)
+    return _LocalCacheBackend()
+
+
+_cache_backend: _CacheBackend = _make_cache_backend()
+
+
+# --- Token-bucket rate limiting ---
+# Each rule is (refill tokens per second, bucket size). Override one with
+# M67_RATE_LIMIT_<NAME>="rate,burst", e.g. M67_RATE_LIMIT_SOLVE="1,5".
+_RATE_LIMIT_RULES: dict[str, tuple[float, float]] = {
+    'chat_post': (1.0, 1.0),    # SSE chat: 1 message/sec, no burst (previous behaviour)
+    'chat_send': (1.0, 5.0),
+    'solve': (2.0, 10.0),
+    'buy': (2.0, 10.0),
+    'use': (2.0, 10.0),
+    'mood_click': (0.2, 5.0),       # per browser (anonymous: session cookie + IP)
+    'mood_click_ip': (2.0, 60.0),   # per IP backstop; a whole classroom can share one NAT address
+    'puzzle': (5.0, 20.0),
 }
-_m6or7_lb_cache_lock = threading.Lock()
-_m6or7_lb_cache: dict[str, object] = {
-    'expires': 0.0,
-    'data': None,
+for _rl_name in list(_RATE_LIMIT_RULES):
+    _rl_env = os.environ.get(f"M67_RATE_LIMIT_{_rl_name.upper()}")
+    if _rl_env:
+        try:
+            _rl_rate, _rl_burst = (float(x) for x in _rl_env.split(','))
+            _RATE_LIMIT_RULES[_rl_name] = (_rl_rate, _rl_burst)
+        except ValueError:
+            app.logger.warning("Ignoring malformed M67_RATE_LIMIT_%s=%r", _rl_name.upper(), _rl_env)
+
+
+class _TokenBucketLimiter:
+    """Token buckets keyed by (rule, user/IP). One (tokens, updated_at) pair per
+    active key; a bucket that has refilled completely carries no information, so it
+    is dropped lazily (a couple of idle keys of the rule being hit are swept per call,
+    oldest first; rules refill at different speeds, so each keeps its own LRU).
+    With shared=True the bucket state lives in the shared cache backend so all
+    workers draw from the same bucket (read-modify-write, so approximate under races).
+    The backend round trips happen outside the lock, so a slow cache stalls only the
+    request that is waiting on it.
+    """
+
+    def __init__(self, rules: dict[str, tuple[float, float]], shared: bool = False):
+        self.rules = rules
+        self.shared = shared
+        self._lock = threading.Lock()
+        self._buckets: dict[str, OrderedDict[str, tuple[float, float]]] = {name: OrderedDict() for name in rules}
+        self.allowed = 0
+        self.limited = 0
+
+    def hit(self, rule: str, key: str) -> float:
+        """Take one token. Returns 0.0 if allowed, else seconds until a token is available."""
+        rate, burst = self.rules[rule]
+        bkey = f"rl:{rule}:{key}"
+        state = self._load_shared(bkey) if self.shared else None
+        now = time.time()
+        buckets = self._buckets[rule]
+        with self._lock:
+            if state is None:
+                state = buckets.get(key)
+            tokens, ts = state if state is not None else (burst, now)
+            tokens = min(burst, tokens + (now - ts) * rate)
+            if tokens >= 1.0:
+                tokens -= 1.0
+                retry = 0.0
+                self.allowed += 1
+            else:
+                retry = (1.0 - tokens) / rate
+                self.limited += 1
+            buckets[key] = (tokens, now)
+            buckets.move_to_end(key)
+            self._sweep(buckets, rate, burst, now)
+        if self.shared:
+            refill_sec = (burst - tokens) / rate
+            _cache_backend.set(bkey, f"{tokens:.4f},{now:.3f}".encode(), max(1, int(refill_sec) + 1))
+        return retry
+
+    @staticmethod
+    def _load_shared(bkey: str):
+        raw = _cache_backend.get(bkey)
+        if raw is None:
+            return None
+        tokens, ts = raw.split(b',')
+        return float(tokens), float(ts)
+
+    @staticmethod
+    def _sweep(buckets: OrderedDict, rate: float, burst: float, now: float, budget: int = 2):
+        for _ in range(budget):
+            if not buckets:
+                return
+            key, (tokens, ts) = next(iter(buckets.items()))
+            if tokens + (now - ts) * rate < burst:
+                return  # oldest key of this rule still refilling
+            del buckets[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'active_keys': sum(len(b) for b in self._buckets.values()),
+                'allowed': self.allowed,
+                'limited': self.limited,
+                'shared': self.shared,
+                'rules': {k: {'rate': r, 'burst': b} for k, (r, b) in self.rules.items()},
+            }
+
+
+_rate_limiter = _TokenBucketLimiter(
+    _RATE_LIMIT_RULES,
+    shared=os.environ.get('M67_RATE_LIMIT_SHARED', '0').lower() in ('1', 'true', 'yes') and _cache_backend.name != 'local',
+)
+
+
+def _rate_limit_ip() -> str:
+    return getattr(g, '__client_ip', None) or request.remote_addr or 'unknown'
+
+
+def _rate_limit(rule: str, key: str | None = None):
+    """Apply a rate-limit rule to the current caller (user id, else client IP plus a
+    per-browser id kept in the session cookie, so clients behind one NAT address get
+    their own buckets). Returns a 429 response when limited, else None. Fails open on
+    limiter errors.
+    """
+    if key is None:
+        uid = current_user.get_id() if getattr(current_user, 'is_authenticated', False) else None
+        if uid:
+            key = f"u:{uid}"
+        else:
+            cid = session.get('rl_cid')
+            if not cid:
+                cid = session['rl_cid'] = uuid.uuid4().hex[:16]
+            key = f"ip:{_rate_limit_ip()}:{cid}"
+    try:
+        retry = _rate_limiter.hit(rule, key)
+    except Exception:
+        return None
+    if not retry:
+        return None
+    app.logger.info("rate_limited rule=%s key=%s retry_after=%.2f", rule, key, retry)
+    resp = jsonify({'ok': False, 'error': 'RATE_LIMIT', 'retry_after': round(retry, 2)})
+    resp.status_code = 429
+    resp.headers['Retry-After'] = str(max(1, int(retry + 0.999)))
+    return resp
+
+# --- Cheater detection ---
+# Every solve is appended to a small per-user timeline (the last few solve times) and
+# checked against the rules below. Actions: 'flag' marks the user as a cheater,
+# 'log' only writes a warning so a rule can be tuned before it is enforced.
+#   burst:    more than `max` solves inside `window` seconds
+#   variance: at least `samples` solves whose gaps are suspiciously regular
+#             (coefficient of variation <= max_cv) and fast (mean gap <= max_mean_sec)
+# Override with M67_CHEAT_BURST="max,window,action" and
+# M67_CHEAT_VARIANCE="samples,max_cv,max_mean_sec,action"; an action of 'off' disables a rule.
+# Replay logged timelines against other thresholds with tools/cheat_replay.py.
+_CHEAT_RULES: dict[str, dict] = {
+    'burst': {'max': 15, 'window': 60.0, 'action': 'flag'},
+    'variance': {'samples': 12, 'max_cv': 0.1, 'max_mean_sec': 20.0, 'action': 'log'},
 }
 
-# Per-user state cache keyed by (uid, state_version). Avoids DB on repeated polls when nothing changed.
-# Uses OrderedDict with LRU eviction to prevent unbounded memory growth.
-_m67_state_cache_lock = threading.Lock()
-_m67_state_cache: dict[tuple[str, int], dict] = {}
-_M67_STATE_CACHE_MAX_SIZE = 500  # Max entries before LRU eviction
+
+def _parse_cheat_rule(name: str, spec: str) -> dict:
+    """Parse an M67_CHEAT_<NAME> override (same field order as _CHEAT_RULES[name])."""
+    fields = list(_CHEAT_RULES[name])
+    parts = [p.strip() for p in spec.split(',')]
+    if len(parts) != len(fields):
+        raise ValueError(f"expected {len(fields)} fields: {','.join(fields)}")
+    rule = {}
+    for field, default, raw in zip(fields, _CHEAT_RULES[name].values(), parts):
+        rule[field] = raw.lower() if isinstance(default, str) else type(default)(raw)
+    if rule['action'] not in ('flag', 'log', 'off'):
+        raise ValueError(f"unknown action {rule['action']!r}")
+    return rule
+
+
+for _ch_name in list(_CHEAT_RULES):
+    _ch_env = os.environ.get(f"M67_CHEAT_{_ch_name.upper()}")
+    if _ch_env:
+        try:
+            _CHEAT_RULES[_ch_name] = _parse_cheat_rule(_ch_name, _ch_env)
+        except ValueError as e:
+            app.logger.warning("Ignoring malformed M67_CHEAT_%s=%r: %s", _ch_name.upper(), _ch_env, e)
+
+
+def _cheat_timeline_len(rules: dict[str, dict]) -> int:
+    """Solve times each timeline must keep for the rules to see a full window."""
+    return max(rules['burst']['max'] + 1, rules['variance']['samples'], 2)
+
+
+def _cheat_evaluate(times: list[float], rules: dict[str, dict]) -> list[tuple[str, str, str]]:
+    """Check a timeline (oldest first, ending with the solve just made) against the rules.
+    Returns (rule, action, detail) for every rule that fires. Pure, so the replay tool
+    runs the exact checks the server does.
+    """
+    hits = []
+    if not times:
+        return hits
+    now = times[-1]
+    burst = rules['burst']
+    if burst['action'] != 'off':
+        cutoff = now - burst['window']
+        n = len(times) - bisect.bisect_left(times, cutoff)
+        if n > burst['max']:
+            hits.append(('burst', burst['action'], f"{n} solves in {burst['window']:g}s"))
+    var = rules['variance']
+    if var['action'] != 'off' and len(times) >= var['samples'] >= 3:
+        recent = times[-var['samples']:]
+        gaps = [b - a for a, b in zip(recent, recent[1:])]
+        mean = sum(gaps) / len(gaps)
+        if 0 < mean <= var['max_mean_sec']:
+            sd = (sum((x - mean) ** 2 for x in gaps) / len(gaps)) ** 0.5
+            cv = sd / mean
+            if cv <= var['max_cv']:
+                hits.append(('variance', var['action'], f"cv={cv:.3f} mean_gap={mean:.2f}s over {len(gaps)} gaps"))
+    return hits
+
+
+class _SolveTimelines:
+    """Per-user ring of the most recent solve times, stored compactly (packed doubles).
+    With shared=True timelines live in the shared cache backend, so solves spread
+    across workers land in one timeline (read-modify-write, so a solve can be lost
+    under an exact race; the rules only need approximate counts). Timelines expire
+    `ttl` seconds after a user's last solve, so idle users cost nothing.
+    """
+
+    def __init__(self, rules: dict[str, dict], shared: bool = False, ttl: float = 900.0):
+        self.rules = rules
+        self.shared = shared
+        self.ttl = ttl
+        self.size = _cheat_timeline_len(rules)
+        self._lock = threading.Lock()
+        self._local: OrderedDict[str, tuple[float, bytes]] = OrderedDict()  # key -> (last_solve, packed)
+        self.recorded = 0
+        self.hits: dict[str, int] = {}
+
+    def record(self, uid: str, now: float | None = None) -> list[tuple[str, str, str]]:
+        """Append a solve for uid and return the rules it trips. Shared-backend round
+        trips happen outside the lock; only the process-local ring is updated under it.
+        """
+        now = time.time() if now is None else now
+        key = f"cheat:{uid}"
+        raw = _cache_backend.get(key) if self.shared else None
+        with self._lock:
+            if raw is None:
+                entry = self._local.get(key)
+                raw = entry[1] if entry is not None else b''
+            times = array('d')
+            times.frombytes(raw[:len(raw) - len(raw) % times.itemsize])
+            times.append(now)
+            del times[:-self.size]
+            packed = times.tobytes()
+            self._local.pop(key, None)
+            self._local[key] = (now, packed)
+            self._sweep(now)
+            self.recorded += 1
+        if self.shared:
+            _cache_backend.set(key, packed, self.ttl)
+        hits = _cheat_evaluate(times.tolist(), self.rules)
+        if hits:
+            with self._lock:
+                for rule, _action, _detail in hits:
+                    self.hits[rule] = self.hits.get(rule, 0) + 1
+        return hits
+
+    def _sweep(self, now: float, budget: int = 2):
+        # Insertion order is last-solve order, so the head is always the stalest
+        for _ in range(budget):
+            if not self._local:
+                return
+            key, (last, _packed) = next(iter(self._local.items()))
+            if now - last < self.ttl:
+                return
+            del self._local[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'active_users': len(self._local),
+                'recorded': self.recorded,
+                'hits': dict(self.hits),
+                'shared': self.shared,
+                'timeline_len': self.size,
+                'rules': self.rules,
+            }
+
+
+_cheat_timelines = _SolveTimelines(
+    _CHEAT_RULES,
+    shared=os.environ.get('M67_CHEAT_SHARED', '1').lower() in ('1', 'true', 'yes') and _cache_backend.name != 'local',
+    ttl=float(os.environ.get('M67_CHEAT_TIMELINE_TTL', '900')),
+)
+# Optional NDJSON log of solve times ({"uid", "ts", "game"} per line) for tools/cheat_replay.py
+_CHEAT_SOLVE_LOG = os.environ.get('M67_SOLVE_LOG') or None
+_cheat_solve_log_lock = threading.Lock()
+
+
+def _cheat_check_solve(u, game_type: str, credit: int):
+    """Record a solve for cheater detection and apply any rule that fires.
+    Never raises: detection problems must not fail the solve itself.
+    """
+    now = time.time()
+    try:
+        hits = _cheat_timelines.record(str(u.id), now)
+    except Exception as e:
+        app.logger.debug("cheat timeline update failed uid=%s err=%s", u.id, e)
+        return
+    for rule, action, detail in hits:
+        app.logger.warning("cheat_rule rule=%s action=%s uid=%s game=%s %s", rule, action, u.id, game_type, detail)
+        if action == 'flag':
+            u.make67_is_cheater = True
+    if _CHEAT_SOLVE_LOG:
+        line = json.dumps({'uid': str(u.id), 'ts': round(now, 3), 'game': game_type, 'credited': int(credit)})
+        try:
+            with _cheat_solve_log_lock, open(_CHEAT_SOLVE_LOG, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+        except OSError as e:
+            app.logger.debug("solve log write failed: %s", e)
+
+# Per-user state cache: one live snapshot per (game_type, uid), validated against the
+# shared state_version. LRU with O(1) touch-on-read/eviction, bounded by entry count
+# and by approximate size (serialized JSON bytes of the cached states).
+class _StateLRUCache:
+    """LRU of per-user state snapshots with hit/miss/eviction counters.
+    Storing a newer version for a key replaces the older one in place, so stale
+    versions never linger until eviction. The replaced snapshot is kept as the
+    entry's delta base (see get_base) and counts against the byte budget.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self._lock = threading.Lock()
+        # key -> (ver, state, size, base) where base is the previous (ver, state, size) or None
+        self._data: OrderedDict[tuple[str, str], tuple] = OrderedDict()
+        self._bytes = 0
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.replacements = 0
+
+    def get(self, key: tuple[str, str], ver: int) -> dict | None:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] != ver:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def get_base(self, key: tuple[str, str], ver: int) -> dict | None:
+        """Return the snapshot for an older version if it is still held (current or base)."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[0] == ver:
+                return entry[1]
+            base = entry[3]
+            if base is not None and base[0] == ver:
+                return base[1]
+            return None
+
+    def set(self, key: tuple[str, str], ver: int, state: dict, size: int | None = None):
+        if size is None:
+            size = len(_json_bytes(state))
+        with self._lock:
+            old = self._data.pop(key, None)
+            base = None
+            if old is not None:
+                self._bytes -= self._entry_size(old)
+                if old[0] >= ver:
+                    # A racing request already stored this or a newer version; keep it
+                    self._data[key] = old
+                    self._bytes += self._entry_size(old)
+                    return
+                base = (old[0], old[1], old[2])
+                self.replacements += 1
+            entry = (ver, state, size, base)
+            self._data[key] = entry
+            self._bytes += self._entry_size(entry)
+            while self._data and (len(self._data) > self.max_entries or self._bytes > self.max_bytes):
+                _, evicted = self._data.popitem(last=False)
+                self._bytes -= self._entry_size(evicted)
+                self.evictions += 1
+
+    @staticmethod
+    def _entry_size(entry: tuple) -> int:
+        return entry[2] + (entry[3][2] if entry[3] is not None else 0)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._data),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / total, 4) if total else None,
+                'evictions': self.evictions,
+                'replacements': self.replacements,
+            }
+
+
+# Sized for ~5k concurrent students across both games by default
+_M67_STATE_CACHE_MAX_SIZE = int(os.environ.get('M67_STATE_CACHE_MAX_SIZE', '10000'))  # entries
+_M67_STATE_CACHE_MAX_BYTES = int(os.environ.get('M67_STATE_CACHE_MAX_BYTES', str(16 * 1024 * 1024)))
+_m67_state_cache = _StateLRUCache(_M67_STATE_CACHE_MAX_SIZE, _M67_STATE_CACHE_MAX_BYTES)
 
 
-def _m67_state_cache_set(key: tuple[str, int], value: dict):
-    """Add to state cache with LRU eviction when exceeding max size."""
-    with _m67_state_cache_lock:
-        # If key exists, move to end (most recently used)
-        if key in _m67_state_cache:
-            del _m67_state_cache[key]
-        _m67_state_cache[key] = value
-        # Evict oldest entries if over limit
-        while len(_m67_state_cache) > _M67_STATE_CACHE_MAX_SIZE:
-            oldest_key = next(iter(_m67_state_cache))
-            del _m67_state_cache[oldest_key]
+_M67_EFFECT_COLUMNS = {
+    'invisible': 'make67_invisible_until',
+    'boost': 'make67_boost_until',
+    'mud': 'make67_mud_until',
+    'shield': 'make67_shield_until',
+}
+
+
+def _effects_from_until(until: dict, now_ts: float | None = None) -> dict:
+    """Remaining seconds per effect from a state's 'effects_until' epoch map.
+    Recomputed on every serve so cached snapshots never report stale countdowns.
+    """
+    now_ts = time.time() if now_ts is None else now_ts
+    out = {}
+    for k in _M67_EFFECT_COLUMNS:
+        delta = (until.get(k) or 0) - now_ts
+        out[k] = int(round(delta)) if delta > 0 else 0
+    return out
 
 
-def _m67_state_cache_get(key: tuple[str, int]) -> dict | None:
-    """Get from state cache, returns None if not found."""
-    with _m67_state_cache_lock:
-        return _m67_state_cache.get(key)
+def _m67_state_delta(base: dict, state: dict) -> dict:
+    """Compact diff from an older state snapshot to the current one.
+    Only fields that changed are included; inventory is expressed as adds/removes by item id.
+    """
+    delta = {'state_version': state['state_version'], 'base_version': base.get('state_version')}
+    if state.get('currency') != base.get('currency'):
+        delta['currency'] = state.get('currency')
+    old_items = {it.get('id'): it for it in base.get('inventory') or []}
+    new_ids = set()
+    added = []
+    for it in state.get('inventory') or []:
+        new_ids.add(it.get('id'))
+        if old_items.get(it.get('id')) != it:
+            added.append(it)
+    removed = [iid for iid in old_items if iid not in new_ids]
+    if added:
+        delta['inventory_add'] = added
+    if removed:
+        delta['inventory_remove'] = removed
+    old_until = base.get('effects_until') or {}
+    new_until = state.get('effects_until') or {}
+    changed = {k: v for k, v in new_until.items() if old_until.get(k) != v}
+    if changed:
+        delta['effects_until'] = changed
+        delta['effects'] = {k: v for k, v in _effects_from_until(new_until).items() if k in changed}
+    if state.get('trophies') != base.get('trophies'):
+        delta['trophies'] = state.get('trophies')
+    return delta
 
 
 def _remaining_from_dt(dt_val: datetime | None, now_dt: datetime | None = None) -> int:
@@ -1764,11 +2695,49 @@ def _m67_get_inventory(uid: str) -> list[dict]:
 
 
 def _m67_get_state_version(uid: str) -> int:
+    """Return the user's shared state version.
+    Uses the session identity map, so when the request already loaded the user
+    (Flask-Login does) this costs no extra query.
+    """
+    try:
+        u = db.session.get(User, uid)
+        if u is not None:
+            return int(u.make67_state_version or 0)
+    except Exception:
+        pass
     with _m67_state_version_lock:
         return int(_m67_state_version.get(uid, 0))
 
 
 def _m67_bump_state_version(uid: str) -> int:
+    """Atomically increment the user's state version in the DB and commit.
+    Call after the state change itself has been committed, so a failure here
+    can only lose the bump, never the change.
+    """
+    try:
+        stmt = (
+            db.update(User)
+            .where(User.id == uid)
+            .values(make67_state_version=User.make67_state_version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        if getattr(db.engine.dialect, 'update_returning', False):
+            ver = db.session.execute(stmt.returning(User.make67_state_version)).scalar()
+        else:
+            # e.g. SQLite < 3.35: no UPDATE ... RETURNING; read back in the same transaction
+            db.session.execute(stmt)
+            ver = db.session.execute(
+                db.select(User.make67_state_version).where(User.id == uid)
+            ).scalar()
+        db.session.commit()
+        if ver is not None:
+            return int(ver)
+    except Exception as e:
+        app.logger.warning("state version bump failed uid=%s: %s", uid, e)
+        try:
+            db.session.rollback()
+        except Exception:
+            pass
     with _m67_state_version_lock:
         cur = int(_m67_state_version.get(uid, 0)) + 1
         _m67_state_version[uid] = cur
@@ -1956,6 +2925,10 @@ def _game_shop(game_type: str):
 def _game_state(game_type: str, use_cache: bool = True):
     """Shared state endpoint handler for both game modes.
 
+    Clients may pass ?since_version=N with the version of the last full state they
+    applied. If nothing changed since then the response is an empty 304; if the
+    snapshot for N is still cached, only a compact delta is returned.
+
     Args:
         game_type: 'make67' or 'make6or7'
         use_cache: Whether to use state caching (Make67 uses it, Make6or7 doesn't)
@@ -1967,6 +2940,7 @@ def _game_state(game_type: str, use_cache: bool = True):
         uid = current_user.get_id()
         if not uid:
             return jsonify({'ok': False, 'error': 'NOT_FOUND'}), 404
+        since_version = request.args.get('since_version', type=int)
 
         # One-time Mr. A rain event — try before cache check so grant bumps
         # version and the fresh state (with new items & boost) is returned.
@@ -1976,47 +2950,67 @@ def _game_state(game_type: str, use_cache: bool = True):
 
         ver = _m67_get_state_version(uid)
 
-        # Check cache if enabled
-        if use_cache:
-            cache_key = (uid, ver)
-            with _m67_state_cache_lock:
-                cached = _m67_state_cache.get(cache_key)
-            if cached is not None:
-                app.logger.debug("%s_state cache_hit=True ver=%s", game_type, ver)
-                resp = {'ok': True, 'state': cached}
-                if mr_a_rain:
-                    resp['mr_a_rain'] = mr_a_rain
-                return jsonify(resp)
-
-        # Cache miss or caching disabled: load from DB
-        u = db.session.get(User, uid) if use_cache else current_user
-        if not u:
-            return jsonify({'ok': False, 'error': 'NOT_FOUND'}), 404
-
-        now_dt = datetime.now(timezone.utc)
-        inv = _m67_get_inventory(uid)
-        state = {
-            'currency': _get_user_counter(u, game_type),
-            'inventory': inv,
-            'effects': {
-                'invisible': _remaining_from_dt(getattr(u, 'make67_invisible_until', None), now_dt),
-                'boost': _remaining_from_dt(getattr(u, 'make67_boost_until', None), now_dt),
-                'mud': _remaining_from_dt(getattr(u, 'make67_mud_until', None), now_dt),
-                'shield': _remaining_from_dt(getattr(u, 'make67_shield_until', None), now_dt),
-            },
-            'state_version': ver,
-            'trophies': _get_user_trophies_summary(uid, game_type),
-        }
+        # Nothing changed since the client's copy. Effect countdowns tick client-side.
+        if since_version is not None and since_version == ver and not mr_a_rain:
+            resp = Response(status=304)
+            resp.headers['Cache-Control'] = 'no-cache'
+            return resp
 
-        # Update cache if enabled
+        # Check cache if enabled. The version comes from the shared DB column, so an
+        # entry is only reused while no worker has changed this user's state.
+        state = None
         if use_cache:
-            _m67_state_cache_set(cache_key, state)
-            app.logger.debug(
-                "%s_state cache_hit=False ver=%s build_ms=%d",
-                game_type, ver, int((time.perf_counter() - t0) * 1000)
-            )
+            cache_key = (game_type, uid)
+            shared_key = f"state:{game_type}:{uid}:{ver}"
+            state = _m67_state_cache.get(cache_key, ver)
+            if state is None and _cache_backend.name != 'local':
+                raw = _cache_backend.get(shared_key)
+                if raw is not None:
+                    state = json.loads(raw)
+                    _m67_state_cache.set(cache_key, ver, state, len(raw))
+            app.logger.debug("%s_state cache_hit=%s ver=%s", game_type, state is not None, ver)
+
+        if state is None:
+            # Cache miss or caching disabled: load from DB
+            u = db.session.get(User, uid) if use_cache else current_user
+            if not u:
+                return jsonify({'ok': False, 'error': 'NOT_FOUND'}), 404
+
+            effects_until = {}
+            for k, col in _M67_EFFECT_COLUMNS.items():
+                dt_val = getattr(u, col, None)
+                if dt_val is not None and dt_val.tzinfo is None:
+                    dt_val = dt_val.replace(tzinfo=timezone.utc)
+                effects_until[k] = int(dt_val.timestamp()) if dt_val is not None else 0
+            state = {
+                'currency': _get_user_counter(u, game_type),
+                'inventory': _m67_get_inventory(uid),
+                'effects_until': effects_until,
+                'state_version': ver,
+                'trophies': _get_user_trophies_summary(uid, game_type),
+            }
+
+            # Update cache if enabled
+            if use_cache:
+                state_bytes = _json_bytes(state)
+                _m67_state_cache.set(cache_key, ver, state, len(state_bytes))
+                if _cache_backend.name != 'local':
+                    _cache_backend.set(shared_key, state_bytes, int(os.environ.get('M67_STATE_CACHE_TTL_SEC', '300')))
+                app.logger.debug(
+                    "%s_state ver=%s build_ms=%d",
+                    game_type, ver, int((time.perf_counter() - t0) * 1000)
+                )
 
-        resp = {'ok': True, 'state': state}
+        base = None
+        if use_cache and since_version is not None and since_version < ver:
+            base = _m67_state_cache.get_base(cache_key, since_version)
+        if base is not None:
+            resp = {'ok': True, 'delta': _m67_state_delta(base, state)}
+        else:
+            # Shallow copy so the cached snapshot is never mutated
+            state = dict(state)
+            state['effects'] = _effects_from_until(state['effects_until'])
+            resp = {'ok': True, 'state': state}
         if mr_a_rain:
             resp['mr_a_rain'] = mr_a_rain
         return jsonify(resp)
@@ -2028,6 +3022,9 @@ def _game_buy(game_type: str):
     """Shared buy endpoint handler for both game modes."""
     if not getattr(current_user, 'is_authenticated', False):
         return jsonify({'ok': False, 'error': 'UNAUTHENTICATED'}), 401
+    limited = _rate_limit('buy')
+    if limited is not None:
+        return limited
     try:
         u = current_user
         if not u:
@@ -2054,12 +3051,13 @@ def _game_buy(game_type: str):
         # Deduct cost and add item
         _set_user_counter(u, game_type, cur - cost)
         item = _m67_add_item(u.id, key)
-        ver = _m67_bump_state_version(u.id)
         db.session.commit()
+        currency = _get_user_counter(u, game_type)
+        ver = _m67_bump_state_version(u.id)
 
         return jsonify({
             'ok': True,
-            'currency': _get_user_counter(u, game_type),
+            'currency': currency,
             'item': item,
             'state_version': ver
         })
@@ -2068,10 +3066,294 @@ def _game_buy(game_type: str):
         return jsonify({'ok': False, 'error': 'SERVER_ERROR', 'detail': str(e)}), 500
 
 
+# --- Server-issued puzzles ---
+# Hands come from a pre-generated pool per game and are handed out with an HMAC-signed,
+# single-use token (game, cards, user, expiry, nonce). A solve submits the token plus the
+# expression the player built; the server checks it exactly (make67_puzzles.check_expr),
+# so a solve can no longer be claimed without solving the hand it was dealt.
+# M67_PUZZLE_TOKENS: required (default) | optional (verify when sent) | off.
+# Used nonces live in the shared cache backend; with several workers use a shared
+# backend (sqlite/redis), otherwise a token could be replayed once per worker. A solve
+# claims its nonce with an atomic add, so concurrent submits of one token credit once.
+# With the local cache backend nonces still go to a shared SQLite file (M67_PUZZLE_NONCE_PATH),
+# so every worker on the host sees the same burns; a per-process store would let a token be
+# redeemed once per worker. Nonces are never evicted before their token expires, which would
+# reopen it for replay. (On Redis, keep a maxmemory-policy that does not evict keys with a
+# TTL, e.g. noeviction.)
+_PUZZLE_TOKEN_MODE = (os.environ.get('M67_PUZZLE_TOKENS') or 'required').strip().lower()
+_PUZZLE_TOKEN_TTL = int(os.environ.get('M67_PUZZLE_TTL_SEC', str(6 * 3600)))
+_PUZZLE_POOL_SIZE = int(os.environ.get('M67_PUZZLE_POOL_SIZE', '256'))
+
+
+def _make_puzzle_nonce_store() -> _CacheBackend:
+    if _cache_backend.name != 'local':
+        return _cache_backend
+    try:
+        import tempfile
+        path = os.environ.get('M67_PUZZLE_NONCE_PATH') or str(Path(tempfile.gettempdir()) / 'moodmeter_nonces.sqlite3')
+        return _SQLiteCacheBackend(path)
+    except Exception as e:
+        workers = os.environ.get('WEB_CONCURRENCY') or '1'
+        if _PUZZLE_TOKEN_MODE == 'required' and workers.isdigit() and int(workers) > 1:
+            app.logger.error("Puzzle nonce store unavailable (%s) with WEB_CONCURRENCY=%s: each worker keeps "
+                             "its own used-token list, so a token can be redeemed once per worker. "
+                             "Set M67_CACHE_BACKEND=sqlite or redis.", e, workers)
+        else:
+            app.logger.warning("Puzzle nonce store unavailable, keeping nonces in process: %s", e)
+    return _LocalCacheBackend(max_entries=None)
+
+
+_puzzle_nonces: _CacheBackend = _make_puzzle_nonce_store()
+
+
+def _load_puzzle_tables() -> dict:
+    """Optional precomputed tables (tools/make67_table.py): M67_PUZZLE_TABLE_<GAME>=path.
+    With a table, dealing and hints are row lookups instead of generation/search.
+    """
+    tables = {}
+    for game in make67_puzzles.GAMES:
+        path = os.environ.get(f"M67_PUZZLE_TABLE_{game.upper()}")
+        if not path:
+            continue
+        try:
+            table = make67_puzzles.PuzzleTable(path)
+            if table.game != game:
+                raise ValueError(f"table is for {table.game}")
+            tables[game] = table
+        except (OSError, ValueError) as e:
+            app.logger.warning("Puzzle table for %s unavailable (%s): %s", game, path, e)
+    return tables
+
+
+_puzzle_tables = _load_puzzle_tables()
+
+
+def _load_puzzle_banks() -> dict:
+    """Optional difficulty-scored banks (tools/make67_difficulty.py): M67_PUZZLE_BANK_<GAME>=path.
+    With a bank, /puzzle?difficulty=easy|medium|hard deals from that bucket.
+    """
+    banks = {}
+    for game in make67_puzzles.GAMES:
+        path = os.environ.get(f"M67_PUZZLE_BANK_{game.upper()}")
+        if not path:
+            continue
+        try:
+            banks[game] = make67_puzzles.PuzzleBank(path, game)
+        except (OSError, ValueError, KeyError) as e:
+            app.logger.warning("Puzzle bank for %s unavailable (%s): %s", game, path, e)
+    return banks
+
+
+_puzzle_banks = _load_puzzle_banks()
+
+
+class _PuzzlePool:
+    """Pre-generated (cards, solution, target) hands for one game. Taking a hand is a
+    deque pop; when the pool drops below half, one background thread refills it.
+    """
+
+    def __init__(self, game: str, size: int, bucket: Optional[str] = None):
+        self.game = game
+        self.bucket = bucket
+        self.size = max(1, size)
+        self._lock = threading.Lock()
+        self._items: deque = deque()
+        self._refilling = False
+        self.issued = 0
+        self.inline = 0
+        self.refills = 0
+
+    def take(self) -> tuple[list[int], str, int]:
+        with self._lock:
+            item = self._items.popleft() if self._items else None
+            self.issued += 1
+            if item is None:
+                self.inline += 1
+            start_refill = len(self._items) < self.size // 2 and not self._refilling
+            if start_refill:
+                self._refilling = True
+        if start_refill:
+            threading.Thread(target=self._refill, name=f"puzzle-pool-{self.game}", daemon=True).start()
+        return item if item is not None else self._make()
+
+    def _make(self) -> tuple[list[int], str, int]:
+        if self.bucket:
+            return _puzzle_banks[self.game].random_hand(self.bucket)
+        table = _puzzle_tables.get(self.game)
+        return table.random_hand() if table is not None else make67_puzzles.generate(self.game)
+
+    def _refill(self):
+        try:
+            while len(self._items) < self.size:
+                self._items.append(self._make())
+            self.refills += 1
+        except Exception as e:
+            app.logger.warning("puzzle pool refill failed game=%s err=%s", self.game, e)
+        finally:
+            self._refilling = False
+
+    def stats(self) -> dict:
+        return {'pooled': len(self._items), 'size': self.size, 'issued': self.issued,
+                'generated_inline': self.inline, 'refills': self.refills}
+
+
+_puzzle_pools = {game: _PuzzlePool(game, _PUZZLE_POOL_SIZE) for game in make67_puzzles.GAMES}
+# Bucket pools are smaller: each only serves the share of requests that asks for it
+_puzzle_bucket_pools = {
+    (game, bucket): _PuzzlePool(game, max(1, _PUZZLE_POOL_SIZE // 4), bucket)
+    for game, bank in _puzzle_banks.items()
+    for bucket, count in bank.counts().items() if count
+}
+_puzzle_stats = {'verified': 0, 'rejected': {}, 'verify_us_total': 0.0}
+_puzzle_stats_lock = threading.Lock()
+
+
+def _b64e(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def _b64d(s: str) -> bytes:
+    return base64.urlsafe_b64decode(s + '=' * (-len(s) % 4))
+
+
+def _puzzle_sign(body: str) -> str:
+    key = app.config['SECRET_KEY'].encode('utf-8')
+    return _b64e(hmac.new(key, body.encode('utf-8'), hashlib.sha256).digest()[:18])
+
+
+def _puzzle_issue_token(game: str, cards: list[int], target: int, uid: str) -> tuple[str, str]:
+    """Return (token, nonce). Body fields: game|cards|target|uid|expires|nonce."""
+    nonce = uuid.uuid4().hex[:16]
+    expires = int(time.time()) + _PUZZLE_TOKEN_TTL
+    body = _b64e(f"{game}|{','.join(map(str, cards))}|{target}|{uid}|{expires}|{nonce}".encode('utf-8'))
+    return f"{body}.{_puzzle_sign(body)}", nonce
+
+
+def _puzzle_read_token(token, game: str, uid: str):
+    """Validate a token's signature, game, owner and expiry.
+    Returns (cards, target, nonce, None) or (None, None, None, error_code).
+    """
+    try:
+        body, sig = str(token).split('.', 1)
+        if not hmac.compare_digest(sig, _puzzle_sign(body)):
+            return None, None, None, 'BAD_TOKEN'
+        t_game, t_cards, t_target, t_uid, t_exp, nonce = _b64d(body).decode('utf-8').split('|')
+        cards = [int(c) for c in t_cards.split(',')]
+        target, expires = int(t_target), int(t_exp)
+    except (ValueError, TypeError, UnicodeDecodeError):
+        return None, None, None, 'BAD_TOKEN'
+    if t_game != game or t_uid != uid:
+        return None, None, None, 'BAD_TOKEN'
+    if expires < time.time():
+        return None, None, None, 'TOKEN_EXPIRED'
+    return cards, target, nonce, None
+
+
+def _puzzle_reject(code: str, status: int = 400):
+    with _puzzle_stats_lock:
+        _puzzle_stats['rejected'][code] = _puzzle_stats['rejected'].get(code, 0) + 1
+    return jsonify({'ok': False, 'error': code}), status
+
+
+def _puzzle_verify_solve(game: str, uid: str, data: dict):
+    """Check the token and expression sent with a solve and burn the nonce.
+    Returns (hint_revealed, cards, None) on success or (None, None, error_response).
+    """
+    t0 = time.perf_counter()
+    cards, _target, nonce, err = _puzzle_read_token(data.get('token'), game, uid)
+    if err:
+        return None, None, _puzzle_reject(err)
+    nkey = f"pz:{nonce}"
+    if _puzzle_nonces.get(nkey) is not None:
+        return None, None, _puzzle_reject('ALREADY_SOLVED', 409)
+    reason = make67_puzzles.check_expr(data.get('expr'), cards, make67_puzzles.GAMES[game])
+    if reason:
+        return None, None, _puzzle_reject(reason)
+    # The get above only spares the expression check; the add is what burns the nonce
+    if not _puzzle_nonces.add(nkey, b'u', _PUZZLE_TOKEN_TTL):
+        return None, None, _puzzle_reject('ALREADY_SOLVED', 409)
+    hint_revealed = _puzzle_nonces.get(f"pzh:{nonce}") is not None
+    with _puzzle_stats_lock:
+        _puzzle_stats['verified'] += 1
+        _puzzle_stats['verify_us_total'] += (time.perf_counter() - t0) * 1e6
+    return hint_revealed, cards, None
+
+
+def _puzzle_new(game: str):
+    """Deal a hand from the pool with a signed token."""
+    limited = _rate_limit('puzzle')
+    if limited is not None:
+        return limited
+    difficulty = (request.args.get('difficulty') or '').strip().lower() or None
+    if difficulty and difficulty not in {name for name, _lo, _hi in make67_puzzles.DIFFICULTY_BUCKETS}:
+        return jsonify({'ok': False, 'error': 'BAD_DIFFICULTY'}), 400
+    uid = current_user.get_id() if getattr(current_user, 'is_authenticated', False) else ''
+    scheduled = _tourney_next_puzzle(uid, game) if uid else None
+    if scheduled is not None:
+        # Tournament participants get the shared schedule's next hand, at its difficulty
+        index, cards, target, difficulty = scheduled
+    else:
+        index = None
+        pool = _puzzle_bucket_pools.get((game, difficulty))
+        if pool is None:
+            # No bank (or an empty bucket) for this game: deal an unscored hand
+            pool, difficulty = _puzzle_pools[game], None
+        cards, _solution, target = pool.take()
+    token, _nonce = _puzzle_issue_token(game, cards, target, uid or '')
+    spec = make67_puzzles.GAMES[game]
+    return jsonify({'ok': True, 'cards': cards, 'target': target, 'ops': spec.ops, 'token': token,
+                    'token_mode': _PUZZLE_TOKEN_MODE, 'difficulty': difficulty, 'tournament_index': index})
+
+
+def _puzzle_hint(game: str):
+    """Reveal one solution for a dealt hand. The nonce is marked so that solving it
+    afterwards is treated like hint_used (no credit), whatever the client reports.
+    A hint on a tournament hand forfeits it and moves the player to the next one.
+    Shares the 'puzzle' rate-limit bucket with dealing: each hint runs a search or lookup.
+    """
+    limited = _rate_limit('puzzle')
+    if limited is not None:
+        return limited
+    data = request.get_json(silent=True) or {}
+    uid = current_user.get_id() if getattr(current_user, 'is_authenticated', False) else ''
+    cards, target, nonce, err = _puzzle_read_token(data.get('token'), game, uid or '')
+    if err:
+        return jsonify({'ok': False, 'error': err}), 400
+    # Separate key from the solve claim, so marking a hint never races the solve's add
+    _puzzle_nonces.set(f"pzh:{nonce}", b'h', _PUZZLE_TOKEN_TTL)
+    expr = _tourney_forfeit_puzzle(uid, game, cards) if uid else None
+    if expr is None:
+        table = _puzzle_tables.get(game)
+        row = table.lookup(cards, target) if table is not None and target in table.targets else None
+        if row is not None and row['flags'] & make67_puzzles.FLAG_EXACT:
+            expr = row['solution']
+        else:
+            expr = make67_puzzles.solve(cards, game, targets=(target,))
+    return jsonify({'ok': True, 'hint': expr, 'target': target})
+
+
+def _puzzle_stats_snapshot() -> dict:
+    with _puzzle_stats_lock:
+        verified = _puzzle_stats['verified']
+        return {
+            'mode': _PUZZLE_TOKEN_MODE,
+            'verified': verified,
+            'rejected': dict(_puzzle_stats['rejected']),
+            'avg_verify_us': round(_puzzle_stats['verify_us_total'] / verified, 1) if verified else None,
+            'pools': {game: pool.stats() for game, pool in _puzzle_pools.items()},
+            'bucket_pools': {f"{game}:{bucket}": pool.stats() for (game, bucket), pool in _puzzle_bucket_pools.items()},
+            'banks': {game: {'path': b.path, 'hands': b.counts()} for game, b in _puzzle_banks.items()},
+            'tables': {game: {'path': t.path, 'range': [t.lo, t.hi], 'hands': t.rows} for game, t in _puzzle_tables.items()},
+        }
+
+
 def _game_solve(game_type: str):
     """Shared solve endpoint handler for both game modes."""
     if not getattr(current_user, 'is_authenticated', False):
         return jsonify({'ok': False, 'error': 'UNAUTHENTICATED'}), 401
+    limited = _rate_limit('solve')
+    if limited is not None:
+        return limited
     try:
         u = current_user
         if not u:
@@ -2079,6 +3361,16 @@ def _game_solve(game_type: str):
 
         data = request.get_json(silent=True) or {}
         hint_used = bool(data.get('hint_used'))
+        solved_cards = None
+
+        # Server-issued puzzle: the solution must check out against the signed hand
+        if _PUZZLE_TOKEN_MODE != 'off' and (data.get('token') or _PUZZLE_TOKEN_MODE == 'required'):
+            if not data.get('token'):
+                return _puzzle_reject('TOKEN_REQUIRED')
+            hint_revealed, solved_cards, rejected = _puzzle_verify_solve(game_type, str(u.id), data)
+            if rejected is not None:
+                return rejected
+            hint_used = hint_used or hint_revealed
 
         # Hint used = no score increment
         if hint_used:
@@ -2120,19 +3412,8 @@ def _game_solve(game_type: str):
         else:
             credit = 0
 
-        # Cheater detection: more than 15 solves in any 60-second window
-        now = time.time()
-        with _m67_recent_solves_lock:
-            dq = _m67_recent_solves.get(u.id)
-            if dq is None:
-                dq = deque()
-                _m67_recent_solves[u.id] = dq
-            dq.append(now)
-            cutoff = now - 60.0
-            while dq and dq[0] < cutoff:
-                dq.popleft()
-            if len(dq) > 15:
-                u.make67_is_cheater = True
+        # Cheater detection (see _CHEAT_RULES); timelines are shared across workers
+        _cheat_check_solve(u, game_type, credit)
 
         db.session.commit()
 
@@ -2141,8 +3422,7 @@ def _game_solve(game_type: str):
             _m67_bump_state_version(u.id)
 
         # --- Tournament solve hook ---
-        if credit > 0:
-            _tourney_record_solve(uid, game_type, credit)
+        _tourney_record_solve(uid, game_type, solved_cards)
 
         resp = {
             'ok': True,
@@ -2174,11 +3454,11 @@ def _get_user_counter_column(game_type: str):
     return User.make6or7_all_time_solves
 
 
-def _get_lb_cache_and_lock(game_type: str):
-    """Get the appropriate cache dict and lock for the game type."""
+def _get_lb_cache_key(game_type: str):
+    """Get the shared cache key and TTL env var for the game type's leaderboard."""
     if game_type == 'make67':
-        return _m67_lb_cache, _m67_lb_cache_lock, 'M67_LB_TTL_SEC'
-    return _m6or7_lb_cache, _m6or7_lb_cache_lock, 'M6OR7_LB_TTL_SEC'
+        return 'lb:make67', 'M67_LB_TTL_SEC'
+    return 'lb:make6or7', 'M6OR7_LB_TTL_SEC'
 
 
 def _game_leaderboard(game_type: str):
@@ -2188,18 +3468,20 @@ def _game_leaderboard(game_type: str):
         _m67_periodic_cleanup()
 
     try:
-        cache, cache_lock, ttl_env = _get_lb_cache_and_lock(game_type)
+        cache_key, ttl_env = _get_lb_cache_key(game_type)
         counter_col = _get_user_counter_column(game_type)
 
         ttl_sec = int(os.environ.get(ttl_env, '2'))
-        now_ts = time.time()
 
-        cached_payload = None
-        with cache_lock:
-            if (cache.get('data') is not None) and (now_ts < float(cache.get('expires') or 0)):
-                cached_payload = cache['data']
+        # Cached value is b"<etag>:<json bytes>" so hits need no re-hashing
+        shared_body = None
+        shared_etag = None
+        cached = _cache_backend.get(cache_key)
+        if cached is not None:
+            etag_b, _, shared_body = cached.partition(b':')
+            shared_etag = etag_b.decode('ascii')
 
-        if cached_payload is None:
+        if shared_body is None:
             t0 = time.perf_counter()
             now_dt = datetime.now(timezone.utc)
 
@@ -2267,10 +3549,9 @@ def _game_leaderboard(game_type: str):
                     'is_cheater': True,
                 })
 
-            cached_payload = {'top': top, 'banned': banned}
-            with cache_lock:
-                cache['data'] = cached_payload
-                cache['expires'] = now_ts + max(1, ttl_sec)
+            shared_body = _json_bytes({'top': top, 'banned': banned})
+            shared_etag = _content_hash(shared_body)
+            _cache_backend.set(cache_key, shared_etag.encode('ascii') + b':' + shared_body, max(1, ttl_sec))
 
             if game_type == 'make67':
                 app.logger.debug(
@@ -2312,7 +3593,17 @@ def _game_leaderboard(game_type: str):
                     'shield_ends_in': _remaining_from_dt(getattr(u, 'make67_shield_until', None), now_dt),
                 }
 
-        return jsonify({'ok': True, 'top': cached_payload['top'], 'banned': cached_payload['banned'], 'me': me})
+        # Splice the small per-user section in front of the cached shared bytes.
+        # The ETag covers both parts so a client only gets a 304 when neither changed.
+        me_body = _json_bytes(me)
+        etag = f"{shared_etag}-{_content_hash(me_body)}"
+        if request.if_none_match.contains(etag):
+            resp = Response(status=304)
+        else:
+            resp = Response(b'{"ok":true,"me":' + me_body + b',' + shared_body[1:], mimetype='application/json')
+        resp.set_etag(etag)
+        resp.headers['Cache-Control'] = 'no-cache'
+        return resp
     except Exception as e:
         return jsonify({'ok': False, 'error': 'SERVER_ERROR', 'detail': str(e)}), 500
 
@@ -2373,6 +3664,9 @@ def _game_use(game_type: str):
     """Shared use-item endpoint handler for both game modes."""
     if not getattr(current_user, 'is_authenticated', False):
         return jsonify({'ok': False, 'error': 'UNAUTHENTICATED'}), 401
+    limited = _rate_limit('use')
+    if limited is not None:
+        return limited
     try:
         u = current_user
         if not u:
@@ -2400,7 +3694,6 @@ def _game_use(game_type: str):
             }
             if extra:
                 s.update(extra)
-            _m67_state_cache_set((u.id, new_ver), s)
             return s
 
         def _validate_target():
@@ -2477,6 +3770,7 @@ def _game_use(game_type: str):
                 return jsonify({'ok': False, 'error': 'TARGET_EFFECT_ACTIVE', 'effect': 'mud'}), 400
             target.make67_mud_until = now_dt + timedelta(minutes=2)
             target.make67_boost_until = now_dt
+            mudded_target_id = target_id
 
         # --- Reverse Card (passive — cannot be manually used) ---
         elif key == 'reverse_card':
@@ -2525,7 +3819,7 @@ def _game_use(game_type: str):
                 'target_id': target_id,
                 'target_name': _format_display_name(target),
                 'ts': int(time.time()),
-            })
+            }, to=(target_id,))
             return jsonify({'ok': True, 'state': _make_state()})
 
         # --- Double or Nothing (self-use gamble) ---
@@ -2566,6 +3860,9 @@ def _game_use(game_type: str):
 
         # Common commit + response for effect-based items (sneaky_dust, boost, divine_shield, mud)
         db.session.commit()
+        if key == 'mud':
+            # Target's effects changed too; invalidate their cached state on every worker
+            _m67_bump_state_version(mudded_target_id)
         if key == 'divine_shield':
             try:
                 _m67_broadcast({
@@ -2594,37 +3891,377 @@ def api_make6or7_use():
     return _game_use('make6or7')
 
 
-def _m67_broadcast(msg: dict):
-    global _m67_message_count
-    _m67_message_count += 1
-    # Append gameplay events to in-memory log for poll-based delivery
+_M67_EVENT_TYPES = frozenset({
+    'snowball_hit', 'divine_shield', 'clown_horn', 'earthquake', 'reverse_card', 'double_or_nothing',
+    'banana_peel', 'banana_slip', 'tournament_invite', 'tournament_start', 'tournament_end',
+    'tournament_cancel', 'tournament_solve',
+})
+
+
+def _m67_msg_type(msg) -> str:
     try:
-        mtype = str(msg.get('type')) if isinstance(msg, dict) else ''
+        return str(msg.get('type')) if isinstance(msg, dict) else ''
     except Exception:
-        mtype = ''
-    if mtype in {'snowball_hit', 'divine_shield', 'clown_horn', 'earthquake', 'reverse_card', 'double_or_nothing', 'banana_peel', 'banana_slip', 'tournament_invite', 'tournament_start', 'tournament_end', 'tournament_cancel', 'tournament_solve'}:
+        return ''
+
+
+def _m67_broadcast(msg: dict, to=None):
+    """Publish a message on the bus. `to` optionally restricts SSE delivery to the
+    given user ids (the poll log still records every gameplay event).
+    With a cross-process transport the message also reaches every other worker, and
+    gameplay events take their seq from the transport so poll cursors stay valid
+    whichever worker answers the next poll. Such events reach this worker through its
+    own listener too, in global seq order: delivering seq N straight away could move a
+    cursor past lower seqs that other workers published but this one has not seen yet.
+    """
+    is_event = _m67_msg_type(msg) in _M67_EVENT_TYPES
+    seq = _m67_bus.publish(msg, to, is_event)
+    if not is_event or _m67_bus.name == 'local':
+        _m67_deliver_local(msg, to, seq)
+    elif seq is None:
+        # The shared transport failed to publish, so there is no global seq. Numbering
+        # the event locally would collide with the next global seq and skip a real event
+        # on other workers' cursors; push it to this worker's SSE streams unsequenced.
+        _m67_deliver_local(msg, to, sequenced=False)
+
+
+def _m67_deliver_local(msg: dict, to=None, seq: int | None = None, sequenced: bool = True):
+    """Record and fan out a bus message within this process. With sequenced=False a
+    gameplay event skips the poll log and goes out as a plain SSE frame without an id.
+    """
+    global _m67_message_count, _m67_slow_disconnects
+    _m67_message_count += 1
+    # Append gameplay events to in-memory log for poll-based delivery
+    mtype = _m67_msg_type(msg)
+    game_type = msg.get('game_type') if isinstance(msg, dict) else None
+    frame = None
+    if mtype in _M67_EVENT_TYPES and sequenced:
         with _m67_event_lock:
             try:
-                # Attach monotonically increasing sequence for ordering
+                # Attach monotonically increasing sequence for ordering. Serialize
+                # before claiming the seq so a bad payload never leaves a hole.
                 global _m67_event_seq
-                _m67_event_seq += 1
-                seq = _m67_event_seq
+                if seq is None:
+                    seq = _m67_event_seq + 1
                 # Shallow copy to avoid mutating original
                 rec = dict(msg)
                 rec.setdefault('ts', int(time.time()))
                 rec['seq'] = seq
-                _m67_event_log.append(rec)
+                payload = _json_bytes(rec)
+                _m67_event_log.append(seq, payload, to, game_type)
+                _m67_event_seq = max(_m67_event_seq, seq)
+                # SSE frame carries the seq as its id so reconnects can resume
+                frame = _sse_event_frame(seq, payload)
             except Exception:
-                pass
+                seq = None
+            _m67_event_cond.notify_all()
+    else:
+        seq = None
+    # Fan out only to interested subscribers: chat messages to chat streams,
+    # events addressed to specific users to those users' streams, the rest to all
+    # event streams of the matching game.
     with _m67_subscribers_lock:
+        if mtype == 'message':
+            targets = list(_m67_subs_by_kind['chat'])
+        elif to is not None:
+            targets = [sub for uid in to for sub in _m67_subs_by_uid.get(str(uid), ()) if sub.kind == 'events']
+        else:
+            targets = list(_m67_subs_by_kind['events'])
         dead = []
-        for q in list(_m67_subscribers):
+        for sub in targets:
+            if game_type and sub.game_type and sub.game_type != game_type:
+                continue
+            if frame is None:
+                # Encode the SSE frame once and share the bytes across all queues
+                frame = _sse_frame(msg)
+            if not sub.q.put_nowait(frame, seq):
+                dead.append(sub)
+        for sub in dead:
+            _m67_unsubscribe_locked(sub)
+        _m67_slow_disconnects += len(dead)
+
+
+def _sse_frame(msg: dict) -> bytes:
+    """Encode a bus message as a complete SSE `data:` frame."""
+    return b'data: ' + json.dumps(msg, ensure_ascii=False).encode('utf-8') + b'\n\n'
+
+
+def _sse_event_frame(seq: int, payload: bytes) -> bytes:
+    """SSE frame for a logged gameplay event, tagged with its seq as the event id."""
+    return b'id: ' + str(seq).encode() + b'\ndata: ' + payload + b'\n\n'
+
+
+def _m67_subscribe(sub: _Subscriber):
+    _m67_bus.ensure_listener()
+    with _m67_subscribers_lock:
+        _m67_subscribers.add(sub)
+        _m67_subs_by_kind[sub.kind].add(sub)
+        if sub.uid:
+            _m67_subs_by_uid.setdefault(sub.uid, set()).add(sub)
+
+
+def _m67_unsubscribe_locked(sub: _Subscriber):
+    """Drop a subscriber from the bus and its indexes. Caller holds _m67_subscribers_lock."""
+    _m67_subscribers.discard(sub)
+    _m67_subs_by_kind[sub.kind].discard(sub)
+    if sub.uid:
+        subs = _m67_subs_by_uid.get(sub.uid)
+        if subs is not None:
+            subs.discard(sub)
+            if not subs:
+                _m67_subs_by_uid.pop(sub.uid, None)
+
+
+
+
+# --- Cross-process bus transport ---
+# _m67_subscribers and the event log are per process. A transport carries every
+# broadcast to the other gunicorn workers (and Render instances): the publishing
+# worker delivers locally as before, and each worker's listener thread hands
+# messages from other origins to _m67_deliver_local. Selected by M67_BUS_BACKEND:
+#   local    - single process, nothing crosses workers (default)
+#   sqlite   - shared table tailed by every worker on the host (M67_BUS_PATH);
+#              also the stand-in for exercising multi-worker delivery locally
+#   postgres - LISTEN/NOTIFY on the app database (or M67_BUS_URL)
+def _bus_origin() -> str:
+    # Include the pid: with preload every forked worker inherits the same INSTANCE_ID
+    return f"{INSTANCE_ID}:{os.getpid()}"
+
+
+def _m67_sync_event_seq(seq: int):
+    """Advance the local event seq to a transport's global position (never backwards)."""
+    global _m67_event_seq
+    with _m67_event_lock:
+        if seq > _m67_event_seq:
+            _m67_event_seq = seq
+            _m67_event_log.last_seq = max(_m67_event_log.last_seq, seq)
+
+
+class _BusTransport:
+    """Base transport: publish never raises, listener restarts after errors and
+    after a fork (one listener thread per process).
+    """
+    name = 'local'
+
+    def __init__(self):
+        self.published = 0
+        self.received = 0
+        self.errors = 0
+        self._listener_pid: int | None = None
+        self._start_lock = threading.Lock()
+
+    def publish(self, msg: dict, to, is_event: bool) -> int | None:
+        """Send to other workers; returns the global seq for gameplay events, if any."""
+        if self.name == 'local':
+            return None
+        self.ensure_listener()
+        try:
+            seq = self._publish(msg, list(to) if to is not None else None, is_event)
+            self.published += 1
+            return seq
+        except Exception as e:
+            self.errors += 1
+            app.logger.warning("bus %s publish failed: %s", self.name, e)
+            return None
+
+    def ensure_listener(self):
+        if self.name == 'local' or self._listener_pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._listener_pid == os.getpid():
+                return
+            self._listener_pid = os.getpid()
+            threading.Thread(target=self._listen_forever, name=f"m67-bus-{self.name}", daemon=True).start()
+
+    def _listen_forever(self):
+        while True:
+            try:
+                self._listen()
+            except Exception as e:
+                self.errors += 1
+                app.logger.warning("bus %s listener error, retrying: %s", self.name, e)
+            time.sleep(1.0)
+
+    def _receive(self, origin: str, seq: int | None, to, msg: dict):
+        if origin == _bus_origin() and _m67_msg_type(msg) not in _M67_EVENT_TYPES:
+            return  # already delivered locally by the publisher; events come back in order
+        self.received += 1
+        try:
+            _m67_deliver_local(msg, to, seq)
+        except Exception:
+            self.errors += 1
+
+    def stats(self) -> dict:
+        return {
+            'backend': self.name,
+            'origin': _bus_origin(),
+            'published': self.published,
+            'received': self.received,
+            'errors': self.errors,
+            'listening': self._listener_pid == os.getpid(),
+        }
+
+    def _publish(self, msg, to, is_event):  # pragma: no cover - overridden
+        raise NotImplementedError
+
+    def _listen(self):  # pragma: no cover - overridden
+        raise NotImplementedError
+
+
+class _SQLiteBusTransport(_BusTransport):
+    """Shared bus table tailed by every worker on the host. The rowid doubles as
+    the global event seq, so all workers number events identically.
+    """
+    name = 'sqlite'
+    _RETAIN_SEC = 300
+    _PURGE_EVERY = 500
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self.poll_sec = float(os.environ.get('M67_BUS_POLL_SEC', '0.2'))
+        self._tls = threading.local()
+        self._conn().execute(
+            'CREATE TABLE IF NOT EXISTS bus_events ('
+            ' id INTEGER PRIMARY KEY AUTOINCREMENT, origin TEXT NOT NULL,'
+            ' payload TEXT NOT NULL, created REAL NOT NULL)'
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._tls, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=2.0, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._tls.conn = conn
+        return conn
+
+    def _publish(self, msg, to, is_event):
+        now = time.time()
+        conn = self._conn()
+        cur = conn.execute(
+            'INSERT INTO bus_events (origin, payload, created) VALUES (?, ?, ?)',
+            (_bus_origin(), json.dumps({'t': to, 'm': msg}, ensure_ascii=False), now),
+        )
+        seq = cur.lastrowid
+        if seq % self._PURGE_EVERY == 0:
+            conn.execute('DELETE FROM bus_events WHERE created < ?', (now - self._RETAIN_SEC,))
+        return seq
+
+    def _listen(self):
+        conn = self._conn()
+        last = conn.execute('SELECT COALESCE(MAX(id), 0) FROM bus_events').fetchone()[0]
+        _m67_sync_event_seq(last)
+        while True:
+            rows = conn.execute(
+                'SELECT id, origin, payload FROM bus_events WHERE id > ? ORDER BY id LIMIT 500', (last,)
+            ).fetchall()
+            for row_id, origin, payload in rows:
+                last = row_id
+                env = json.loads(payload)
+                self._receive(origin, row_id, env.get('t'), env.get('m') or {})
+            if not rows:
+                time.sleep(self.poll_sec)
+
+
+class _PostgresBusTransport(_BusTransport):
+    """LISTEN/NOTIFY on the app database. Gameplay events draw their seq from a
+    shared Postgres sequence so every worker numbers them identically. The seq is drawn
+    and notified in one transaction under an advisory lock: notifications arrive in
+    commit order, so listeners then see events in seq order.
+    """
+    name = 'postgres'
+    CHANNEL = 'm67_bus'
+    _SEQ_LOCK_KEY = 6767067  # pg_advisory_xact_lock key serializing event publishes
+    _MAX_PAYLOAD = 7900  # NOTIFY payloads must stay under 8000 bytes
+
+    def __init__(self, dsn: str):
+        super().__init__()
+        import psycopg2  # noqa: F401  (fail fast if the driver is missing)
+        self.dsn = dsn
+        self._pub_lock = threading.Lock()
+        self._pub_conn = None
+        conn = self._connect()
+        try:
+            with conn.cursor() as cur:
+                cur.execute('CREATE SEQUENCE IF NOT EXISTS m67_bus_seq')
+        finally:
+            conn.close()
+
+    def _connect(self):
+        import psycopg2
+        conn = psycopg2.connect(self.dsn)
+        conn.autocommit = True
+        return conn
+
+    def _publish(self, msg, to, is_event):
+        with self._pub_lock:
+            if self._pub_conn is None or self._pub_conn.closed:
+                self._pub_conn = self._connect()
             try:
-                q.put_nowait(msg)
+                with self._pub_conn.cursor() as cur:
+                    seq = None
+                    if is_event:
+                        cur.execute('BEGIN')
+                        cur.execute('SELECT pg_advisory_xact_lock(%s)', (self._SEQ_LOCK_KEY,))
+                        cur.execute("SELECT nextval('m67_bus_seq')")
+                        seq = int(cur.fetchone()[0])
+                    payload = json.dumps({'o': _bus_origin(), 's': seq, 't': to, 'm': msg}, ensure_ascii=False)
+                    if len(payload.encode('utf-8')) > self._MAX_PAYLOAD:
+                        raise ValueError('payload too large for NOTIFY')
+                    cur.execute('SELECT pg_notify(%s, %s)', (self.CHANNEL, payload))
+                    if is_event:
+                        cur.execute('COMMIT')
+                    return seq
             except Exception:
-                dead.append(q)
-        for q in dead:
-            _m67_subscribers.discard(q)
+                try:
+                    self._pub_conn.close()
+                except Exception:
+                    pass
+                self._pub_conn = None
+                raise
+
+    def _listen(self):
+        import select
+        conn = self._connect()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(f'LISTEN {self.CHANNEL}')
+                cur.execute('SELECT last_value, is_called FROM m67_bus_seq')
+                last_value, is_called = cur.fetchone()
+            _m67_sync_event_seq(int(last_value) if is_called else 0)
+            while True:
+                if select.select([conn], [], [], 25) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    n = conn.notifies.pop(0)
+                    env = json.loads(n.payload)
+                    self._receive(env.get('o'), env.get('s'), env.get('t'), env.get('m') or {})
+        finally:
+            conn.close()
+
+
+def _make_bus_transport() -> _BusTransport:
+    kind = (os.environ.get('M67_BUS_BACKEND') or 'local').strip().lower()
+    try:
+        if kind == 'sqlite':
+            import tempfile
+            path = os.environ.get('M67_BUS_PATH') or str(Path(tempfile.gettempdir()) / 'moodmeter_bus.sqlite3')
+            bus = _SQLiteBusTransport(path)
+        elif kind == 'postgres':
+            dsn = os.environ.get('M67_BUS_URL') or app.config['SQLALCHEMY_DATABASE_URI'].replace('+psycopg2', '')
+            bus = _PostgresBusTransport(dsn)
+        else:
+            return _BusTransport()
+        bus.ensure_listener()
+        return bus
+    except Exception as e:
+        app.logger.warning("Bus transport %s unavailable, falling back to local: %s", kind, e)
+    return _BusTransport()
+
+
+_m67_bus: _BusTransport = _make_bus_transport()
 
 
 @app.route('/api/make67/chat/stream')
@@ -2642,14 +4279,15 @@ def make67_chat_stream():
         app.logger.info("make67_chat_stream denied: eligible=False solves=%s ip=%s instance=%s",
                         solves, getattr(g, '__client_ip', 'unknown'), INSTANCE_ID)
         return jsonify({'ok': False, 'error': 'FORBIDDEN'}), 403
-    q: Queue = Queue(maxsize=100)
-    with _m67_subscribers_lock:
-        _m67_subscribers.add(q)
-        try:
-            app.logger.info("make67_chat_stream connect subscribers=%d ip=%s instance=%s",
-                            len(_m67_subscribers), getattr(g, '__client_ip', 'unknown'), INSTANCE_ID)
-        except Exception:
-            pass
+    uid = current_user.get_id() if getattr(current_user, 'is_authenticated', False) else None
+    sub = _Subscriber('chat', uid)
+    q = sub.q
+    _m67_subscribe(sub)
+    try:
+        app.logger.info("make67_chat_stream connect subscribers=%d ip=%s instance=%s",
+                        len(_m67_subscribers), getattr(g, '__client_ip', 'unknown'), INSTANCE_ID)
+    except Exception:
+        pass
     # Register presence for authenticated users
     try:
         if getattr(current_user, 'is_authenticated', False):
@@ -2661,17 +4299,16 @@ def make67_chat_stream():
         # Initial comment and periodic keep-alives to prevent idle timeouts
         yield f": connected instance={INSTANCE_ID} time={int(time.time())}\n\n"
         try:
-            while True:
+            while not q.finished:
                 try:
-                    msg = q.get(timeout=25)
-                    yield f"data: {json.dumps(msg, ensure_ascii=False)}\n\n"
+                    yield q.get(timeout=25)
                 except Empty:
-                    yield ': keep-alive\n\n'
+                    yield b': keep-alive\n\n'
         except GeneratorExit:
             pass
         finally:
             with _m67_subscribers_lock:
-                _m67_subscribers.discard(q)
+                _m67_unsubscribe_locked(sub)
                 try:
                     app.logger.info("make67_chat_stream disconnect subscribers=%d ip=%s instance=%s",
                                     len(_m67_subscribers), getattr(g, '__client_ip', 'unknown'), INSTANCE_ID)
@@ -2694,13 +4331,24 @@ def make67_chat_stream():
 @app.route('/api/make67/events')
 def make67_events_stream():
     """General Make67 SSE stream for gameplay events (e.g., snowballs).
-    Available to any authenticated user. Shares the same broadcast bus as chat.
+    Available to any authenticated user. Shares the same broadcast bus as chat but
+    only receives gameplay events; ?game=make67|make6or7 narrows game-scoped ones.
+    Frames carry the event seq as their SSE id. On reconnect the browser's
+    Last-Event-ID header (or ?last_event_id=) replays missed events from the log.
     """
     if not getattr(current_user, 'is_authenticated', False):
         return jsonify({'ok': False, 'error': 'UNAUTHENTICATED'}), 401
-    q: Queue = Queue(maxsize=100)
-    with _m67_subscribers_lock:
-        _m67_subscribers.add(q)
+    game = request.args.get('game')
+    sub = _Subscriber('events', current_user.get_id(), game if game in ('make67', 'make6or7') else None)
+    q = sub.q
+    _m67_subscribe(sub)
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID') or request.args.get('last_event_id') or 0)
+    except ValueError:
+        last_event_id = 0
+    # Subscribe first, then snapshot the log: anything published in between is both
+    # replayed and queued, and the queue skips seqs the replay already covered.
+    replay = _m67_replay_events(sub, last_event_id) if last_event_id > 0 else []
     # Presence register
     try:
         _m67_presence_connect(current_user.get_id(), q)
@@ -2709,18 +4357,18 @@ def make67_events_stream():
 
     def gen():
         yield f": connected instance={INSTANCE_ID} events=1 time={int(time.time())}\n\n"
+        yield from replay
         try:
-            while True:
+            while not q.finished:
                 try:
-                    msg = q.get(timeout=25)
-                    yield f"data: {json.dumps(msg, ensure_ascii=False)}\n\n"
+                    yield q.get(timeout=25)
                 except Empty:
-                    yield ': keep-alive\n\n'
+                    yield b': keep-alive\n\n'
         except GeneratorExit:
             pass
         finally:
             with _m67_subscribers_lock:
-                _m67_subscribers.discard(q)
+                _m67_unsubscribe_locked(sub)
             try:
                 _m67_presence_disconnect(q)
             except Exception:
@@ -2734,10 +4382,37 @@ def make67_events_stream():
     return Response(stream_with_context(gen()), mimetype='text/event-stream; charset=utf-8', headers=headers)
 
 
+def _m67_replay_events(sub: _Subscriber, last_event_id: int) -> list[bytes]:
+    """SSE frames for logged events after last_event_id that this subscriber would have
+    received. Marks them on the subscriber's queue so live delivery doesn't repeat them.
+    """
+    with _m67_event_lock:
+        if last_event_id > _m67_event_seq:
+            return []  # id from before a restart; nothing to resume
+        gap = last_event_id + 1 < _m67_event_log.oldest_seq()
+        entries = _m67_event_log.entries_since(last_event_id, _m67_event_log.capacity)
+        replay_through = _m67_event_seq
+    sub.q.skip_through = replay_through
+    frames = []
+    if gap:
+        # Older events were overwritten; tell the client to refetch via the poll endpoint
+        frames.append(sub.q.resync_frame('replay_gap'))
+    for seq, payload, to, game_type in entries:
+        if to is not None and sub.uid not in to:
+            continue
+        if game_type and sub.game_type and sub.game_type != game_type:
+            continue
+        frames.append(_sse_event_frame(seq, payload))
+    return frames
+
+
 @app.route('/api/make67/events/poll')
 def make67_events_poll():
-    """Short-poll endpoint for Make67 gameplay events.
+    """Poll endpoint for Make67 gameplay events.
     Clients pass ?since=<last_seq> and receive any events with seq > since.
+    With ?wait=<seconds> the request long-polls: it blocks until a newer event is
+    logged or the wait (capped by M67_EVENTS_LONGPOLL_MAX_SEC) elapses. Responses carry
+    longpoll_max so clients only ask to wait when the server allows it.
     Also serves as a presence ping for the authenticated user.
     """
     if not getattr(current_user, 'is_authenticated', False):
@@ -2753,22 +4428,34 @@ def make67_events_poll():
             since = int(since_s)
         except Exception:
             since = 0
-        out = []
-        last_seq = since
-        with _m67_event_lock:
-            for rec in _m67_event_log:
-                try:
-                    rec_seq = int(rec.get('seq') or 0)
-                except Exception:
-                    rec_seq = 0
-                if rec_seq > since:
-                    out.append(rec)
-                    if rec_seq > last_seq:
-                        last_seq = rec_seq
-        # Limit payload size
-        if len(out) > 100:
-            out = out[-100:]
-        return jsonify({'ok': True, 'events': out, 'last_seq': last_seq})
+        try:
+            wait = min(max(float(request.args.get('wait') or 0), 0.0), _M67_EVENTS_LONGPOLL_MAX_SEC)
+        except Exception:
+            wait = 0.0
+        _m67_bus.ensure_listener()
+        with _m67_event_cond:
+            if since > _m67_event_seq:
+                if _m67_bus.name == 'local':
+                    # Single process: the cursor predates a restart; hand back the current seq to resync
+                    return jsonify({'ok': True, 'events': [], 'last_seq': _m67_event_seq, 'reset': True,
+                                    'longpoll_max': _M67_EVENTS_LONGPOLL_MAX_SEC})
+                # Another worker has seen newer events than this one: keep the client's cursor,
+                # rewinding it would replay events it already has
+                return jsonify({'ok': True, 'events': [], 'last_seq': since,
+                                'longpoll_max': _M67_EVENTS_LONGPOLL_MAX_SEC})
+            if wait > 0:
+                # Wait for a logged event, not for the global seq: a shared bus can move the
+                # seq past every event this worker holds, and that must not end the wait
+                _m67_event_cond.wait_for(lambda: _m67_event_log.newest_logged > since, timeout=wait)
+            # Limit payload size to the newest 100 events. Everything up to the current seq
+            # has been delivered here, so the cursor moves there even when nothing is in range.
+            out = _m67_event_log.since(since, 100)
+            last_seq = _m67_event_seq
+        # Events are already serialized; only the envelope is built per request
+        body = (b'{"ok":true,"events":[' + b','.join(out) + b'],"last_seq":'
+                + str(last_seq).encode() + b',"wait":' + _json_bytes(wait)
+                + b',"longpoll_max":' + _json_bytes(_M67_EVENTS_LONGPOLL_MAX_SEC) + b'}')
+        return Response(body, mimetype='application/json')
     except Exception as e:
         return jsonify({'ok': False, 'error': 'SERVER_ERROR', 'detail': str(e)}), 500
 
@@ -2818,15 +4505,9 @@ def make67_chat_post():
 
     # Light rate limit per IP
     ip = request.headers.get('X-Forwarded-For', request.remote_addr) or 'unknown'
-    now = time.time()
-    last = _m67_last_post_by_ip.get(ip, 0.0)
-    if now - last < 1.0:  # 1 message/sec per IP
-        try:
-            app.logger.info("make67_chat_post rate_limited ip=%s instance=%s", ip, INSTANCE_ID)
-        except Exception:
-            pass
-        return jsonify({'ok': False, 'error': 'RATE_LIMIT'}), 429
-    _m67_last_post_by_ip[ip] = now
+    limited = _rate_limit('chat_post', f"ip:{ip}")
+    if limited is not None:
+        return limited
 
     # Determine display name
     try:
@@ -2852,15 +4533,137 @@ def make67_chat_post():
 
 
 # --- Lightweight, DB-backed chat endpoints (short polling) ---
-@app.route('/api/make67/chat/send', methods=['POST'])
-def make67_chat_send():
-    """Insert a chat message in the DB and return it.
-    Designed for short-polling frontend. Auth/eligibility required.
+# --- DB-backed chat shared by both games (short polling) ---
+def _chat_payload(m) -> dict:
+    return {
+        'id': m.id,
+        'user': m.username,
+        'text': m.text,
+        'created_at': (m.created_at.isoformat() + 'Z'),
+        'type': 'message',
+    }
+
+
+class _ChatTail:
+    """In-memory tail of the newest chat messages for one room, in id order.
+    `since` polls are answered from here; the DB is only queried to pick up rows
+    written by other workers (at most once per refresh interval), after a local
+    send, and for history older than the tail.
     """
+
+    def __init__(self, model, size: int):
+        self.model = model
+        self.size = size
+        self._lock = threading.Lock()
+        self._ids: list[int] = []
+        self._items: list[dict] = []
+        self._seeded = False
+        self._complete = False  # tail holds the whole table (fewer rows than size)
+        self._refreshed_at = 0.0
+        # Long-poll waiters for this room; woken when refresh appends rows
+        self._cond = threading.Condition()
+        self.hits = 0
+        self.db_reads = 0
+
+    @property
+    def max_id(self) -> int:
+        return self._ids[-1] if self._ids else 0
+
+    def refresh(self, force: bool = False):
+        """Pull rows newer than the tail from the DB (seeding it on first use)."""
+        now = time.time()
+        with self._lock:
+            if not force and self._seeded and now - self._refreshed_at < _M67_CHAT_REFRESH_SEC:
+                return
+            self._refreshed_at = now
+            self.db_reads += 1
+            if not self._seeded:
+                rows = self.model.query.order_by(self.model.id.desc()).limit(self.size).all()
+                rows.reverse()
+                self._complete = len(rows) < self.size
+                self._seeded = True
+            else:
+                rows = (
+                    self.model.query
+                    .filter(self.model.id > self.max_id)
+                    .order_by(self.model.id.asc())
+                    .limit(self.size)
+                    .all()
+                )
+            for m in rows:
+                self._ids.append(m.id)
+                self._items.append(_chat_payload(m))
+            if len(self._ids) > 2 * self.size:
+                # Trim in batches so appends stay amortized O(1)
+                self._complete = False
+                del self._ids[:-self.size]
+                del self._items[:-self.size]
+        if rows:
+            with self._cond:
+                self._cond.notify_all()
+
+    def wait_for_newer(self, last_id: int, timeout: float):
+        """Block until a message with id > last_id is known or timeout elapses.
+        Local sends wake waiters immediately; other workers' writes are seen by the
+        periodic refresh, which waiters trigger at most once per refresh interval.
+        """
+        deadline = time.time() + timeout
+        while True:
+            self.refresh()
+            if self.max_id > last_id:
+                return
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return
+            with self._cond:
+                self._cond.wait(min(remaining, _M67_CHAT_REFRESH_SEC))
+
+    def since(self, last_id: int, limit: int) -> list[dict] | None:
+        """Messages with id > last_id (ascending, at most `limit`), or None when
+        last_id is older than the tail and the caller must go to the DB.
+        """
+        self.refresh()
+        with self._lock:
+            if last_id <= 0:
+                if len(self._items) >= limit or self._complete:
+                    self.hits += 1
+                    return self._items[-limit:]
+                return None
+            if self._ids and last_id < self._ids[0] - 1 and not self._complete:
+                return None
+            start = bisect.bisect_right(self._ids, last_id)
+            self.hits += 1
+            return self._items[start:start + limit]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'cached': len(self._items), 'max_id': self.max_id, 'hits': self.hits, 'db_reads': self.db_reads}
+
+
+_M67_CHAT_TAIL_SIZE = int(os.environ.get('M67_CHAT_TAIL_SIZE', '200'))
+# How stale a worker's tail may get before it re-checks the DB for other workers' writes
+_M67_CHAT_REFRESH_SEC = float(os.environ.get('M67_CHAT_REFRESH_SEC', '1.0'))
+# Upper bound for ?wait= on chat/since; 0 turns chat long-polling off. Like events/poll,
+# it is on by default only under gevent workers, where a held request does not pin a worker.
+_M67_CHAT_LONGPOLL_MAX_SEC = float(os.environ.get('M67_CHAT_LONGPOLL_MAX_SEC', _M67_LONGPOLL_DEFAULT_SEC))
+_CHAT_ROOMS = {
+    'make67': (ChatMessage, _is_make67_chat_eligible),
+    'make6or7': (ChatMessage6or7, _is_make6or7_chat_eligible),
+}
+_chat_tails = {room: _ChatTail(model, _M67_CHAT_TAIL_SIZE) for room, (model, _) in _CHAT_ROOMS.items()}
+
+
+def _chat_send(room: str):
+    """Shared chat/send handler: insert a message in the room's table and return it."""
+    model, is_eligible = _CHAT_ROOMS[room]
+    # Both rooms share the same feature flag
     if not app.config.get('MAKE67_CHAT_ENABLED', True):
         return jsonify({'error': 'DISABLED'}), 503
-    if not _is_make67_chat_eligible():
+    if not is_eligible():
         return jsonify({'error': 'FORBIDDEN'}), 403
+    limited = _rate_limit('chat_send')
+    if limited is not None:
+        return limited
 
     data = request.get_json(silent=True) or {}
     text = (data.get('text') or '').strip()
@@ -2876,32 +4679,36 @@ def make67_chat_send():
         username = 'Anonymous'
         user_id = None
 
-    msg = ChatMessage(user_id=user_id, username=username, text=text)
+    msg = model(user_id=user_id, username=username, text=text)
     db.session.add(msg)
     db.session.commit()
 
-    payload = {
-        'id': msg.id,
-        'user': msg.username,
-        'text': msg.text,
-        'created_at': (msg.created_at.isoformat() + 'Z'),
-        'type': 'message',
-    }
+    payload = _chat_payload(msg)
+    # Fill the tail on write; refreshing by id also picks up other workers' rows
+    try:
+        _chat_tails[room].refresh(force=True)
+    except Exception:
+        pass
     return jsonify(payload)
 
 
-@app.route('/api/make67/chat/since', methods=['GET'])
-def make67_chat_since():
-    """Return chat history in a fast, bounded way.
+def _chat_since(room: str):
+    """Shared chat/since handler. Returns chat history in a fast, bounded way.
 
     Behavior:
     - If last_id > 0: return up to 50 messages with id > last_id (ascending).
     - If last_id <= 0 or missing: return the latest 50 messages (ascending),
       not the entire history. This keeps initial page load snappy.
+    - With last_id > 0 and ?wait=<seconds>, long-poll: block until a newer message
+      exists in the room or the wait (capped by M67_CHAT_LONGPOLL_MAX_SEC) elapses.
+      The X-Chat-Wait response header echoes the wait that was applied, and
+      X-Chat-Longpoll-Max the cap, so clients only ask to wait when it is positive.
+    Served from the room's in-memory tail; only history older than the tail hits the DB.
     """
+    model, is_eligible = _CHAT_ROOMS[room]
     if not app.config.get('MAKE67_CHAT_ENABLED', True):
         return jsonify({'error': 'DISABLED'}), 503
-    if not _is_make67_chat_eligible():
+    if not is_eligible():
         return jsonify({'error': 'FORBIDDEN'}), 403
 
     try:
@@ -2909,50 +4716,183 @@ def make67_chat_since():
     except Exception:
         last_id = 0
 
+    try:
+        wait = min(max(float(request.args.get('wait') or 0), 0.0), _M67_CHAT_LONGPOLL_MAX_SEC)
+    except Exception:
+        wait = 0.0
+    if last_id <= 0:
+        wait = 0.0
+
+    try:
+        tail = _chat_tails[room]
+        if wait > 0:
+            tail.wait_for_newer(last_id, wait)
+        cached = tail.since(last_id, 50)
+    except Exception:
+        cached = None
+    if cached is not None:
+        resp = jsonify(cached)
+        resp.headers['X-Chat-Wait'] = str(wait)
+        resp.headers['X-Chat-Longpoll-Max'] = str(_M67_CHAT_LONGPOLL_MAX_SEC)
+        return resp
+
     if last_id > 0:
-        # Standard incremental fetch: get messages after the last seen id
+        # Deep history: get messages after the last seen id
         msgs = (
-            ChatMessage.query
-            .filter(ChatMessage.id > last_id)
-            .order_by(ChatMessage.id.asc())
+            model.query
+            .filter(model.id > last_id)
+            .order_by(model.id.asc())
             .limit(50)
             .all()
         )
     else:
         # Initial load: fetch only the latest N messages, not the whole history
-        latest = (
-            ChatMessage.query
-            .order_by(ChatMessage.id.desc())
-            .limit(50)
-            .all()
-        )
+        latest = model.query.order_by(model.id.desc()).limit(50).all()
         # Return ascending for a natural reading order
         msgs = list(reversed(latest))
-    return jsonify([
-        {
-            'id': m.id,
-            'user': m.username,
-            'text': m.text,
-            'created_at': (m.created_at.isoformat() + 'Z'),
-            'type': 'message',
-        }
-        for m in msgs
-    ])
+    resp = jsonify([_chat_payload(m) for m in msgs])
+    resp.headers['X-Chat-Wait'] = str(wait)
+    resp.headers['X-Chat-Longpoll-Max'] = str(_M67_CHAT_LONGPOLL_MAX_SEC)
+    return resp
+
+
+# Messages older than the horizon move from the hot chat tables into ChatArchiveBlock
+_M67_CHAT_RETENTION_DAYS = float(os.environ.get('M67_CHAT_RETENTION_DAYS', '30'))
+_M67_CHAT_ARCHIVE_BLOCK = int(os.environ.get('M67_CHAT_ARCHIVE_BLOCK', '500'))
+
+
+def _chat_archive_room(room: str, horizon_days: float, block_size: int) -> int:
+    """Move messages older than the horizon into compressed archive blocks.
+    Each block is written and its rows deleted in one transaction, oldest first.
+    Returns the number of messages archived.
+    """
+    model, _ = _CHAT_ROOMS[room]
+    cutoff = datetime.now(timezone.utc) - timedelta(days=horizon_days)
+    archived = 0
+    while True:
+        rows = (
+            model.query
+            .filter(model.created_at < cutoff)
+            .order_by(model.id.asc())
+            .limit(block_size)
+            .all()
+        )
+        if not rows:
+            return archived
+        items = [dict(_chat_payload(m), user_id=m.user_id) for m in rows]
+        db.session.add(ChatArchiveBlock(
+            room=room,
+            first_id=rows[0].id,
+            last_id=rows[-1].id,
+            first_at=rows[0].created_at,
+            last_at=rows[-1].created_at,
+            count=len(rows),
+            data=gzip.compress(_json_bytes(items)),
+        ))
+        model.query.filter(model.id.in_([m.id for m in rows])).delete(synchronize_session=False)
+        db.session.commit()
+        archived += len(rows)
+
+
+@app.cli.command('chat-archive')
+@click.option('--days', type=float, default=None, help='Retention horizon in days (default M67_CHAT_RETENTION_DAYS).')
+@click.option('--room', type=click.Choice(['make67', 'make6or7', 'all']), default='all')
+@click.option('--block-size', type=int, default=None, help='Messages per archive block (default M67_CHAT_ARCHIVE_BLOCK).')
+def chat_archive_command(days, room, block_size):
+    """Archive chat messages older than the retention horizon (run from cron)."""
+    days = _M67_CHAT_RETENTION_DAYS if days is None else days
+    block_size = block_size or _M67_CHAT_ARCHIVE_BLOCK
+    for r in (_CHAT_ROOMS if room == 'all' else [room]):
+        n = _chat_archive_room(r, days, block_size)
+        click.echo(f"{r}: archived {n} messages older than {days:g} days")
+
+
+def _chat_history(room: str):
+    """Page backwards through a room's full history: hot table first, then archive.
+    ?before_id=<id> (exclusive, default newest) and ?limit=<n> (max 200).
+    Returns messages ascending plus the before_id for the next page (None at the start).
+    """
+    model, is_eligible = _CHAT_ROOMS[room]
+    if not app.config.get('MAKE67_CHAT_ENABLED', True):
+        return jsonify({'error': 'DISABLED'}), 503
+    if not is_eligible():
+        return jsonify({'error': 'FORBIDDEN'}), 403
+    before_id = request.args.get('before_id', type=int) or 0
+    limit = min(max(request.args.get('limit', type=int) or 50, 1), 200)
+
+    q = model.query
+    if before_id > 0:
+        q = q.filter(model.id < before_id)
+    out = [_chat_payload(m) for m in q.order_by(model.id.desc()).limit(limit).all()]
+    if len(out) < limit:
+        # Continue into the archive, newest block first
+        cursor = out[-1]['id'] if out else before_id
+        bq = ChatArchiveBlock.query.filter(ChatArchiveBlock.room == room)
+        if cursor > 0:
+            bq = bq.filter(ChatArchiveBlock.first_id < cursor)
+        for block in bq.order_by(ChatArchiveBlock.last_id.desc()).limit(limit):
+            for item in reversed(json.loads(gzip.decompress(block.data))):
+                if cursor > 0 and item['id'] >= cursor:
+                    continue
+                item.pop('user_id', None)
+                out.append(item)
+                if len(out) >= limit:
+                    break
+            if len(out) >= limit:
+                break
+    out.reverse()
+    next_before = out[0]['id'] if len(out) >= limit else None
+    return jsonify({'messages': out, 'before_id': next_before})
+
+
+@app.route('/api/make67/chat/history', methods=['GET'])
+def make67_chat_history():
+    return _chat_history('make67')
+
+
+@app.route('/api/make67/chat/send', methods=['POST'])
+def make67_chat_send():
+    """Insert a chat message in the DB and return it.
+    Designed for short-polling frontend. Auth/eligibility required.
+    """
+    return _chat_send('make67')
+
+
+@app.route('/api/make67/chat/since', methods=['GET'])
+def make67_chat_since():
+    return _chat_since('make67')
 
 
 @app.route('/api/make67/chat/debug', methods=['GET'])
 def make67_chat_debug():
-    """Diagnostics for Make67 chat. Auth required. Helps detect multi-instance and SSE issues.
+    """Diagnostics for Make67 chat. Super users only: the slow-consumer list names other
+    users' live connections. Helps detect multi-instance and SSE issues.
     Returns current subscriber count, total messages broadcast in this process, feature flag state, and instance id.
     """
     if not getattr(current_user, 'is_authenticated', False):
         return jsonify({'ok': False, 'error': 'UNAUTHENTICATED'}), 401
+    if getattr(current_user, 'role', '') != 'super':
+        return jsonify({'ok': False, 'error': 'FORBIDDEN'}), 403
     with _m67_subscribers_lock:
         subs = len(_m67_subscribers)
+        subs_by_kind = {k: len(v) for k, v in _m67_subs_by_kind.items()}
+        sub_list = list(_m67_subscribers)
+    sub_stats = [dict(sub.q.stats(), kind=sub.kind, uid=sub.uid) for sub in sub_list]
+    slowest = sorted(sub_stats, key=lambda st: (st['lag_sec'], st['queued']), reverse=True)[:5]
     data = {
         'ok': True,
         'enabled': bool(app.config.get('MAKE67_CHAT_ENABLED', True)),
         'subscribers': subs,
+        'subscribers_by_kind': subs_by_kind,
+        'bus': _m67_bus.stats(),
+        'slow_consumer': {
+            'policy': _M67_SLOW_CONSUMER_POLICY,
+            'queue_max': _M67_SUB_QUEUE_MAX,
+            'dropped_frames': sum(st['dropped'] for st in sub_stats),
+            'disconnects': _m67_slow_disconnects,
+            'max_lag_sec': max((st['lag_sec'] for st in sub_stats), default=0.0),
+            'slowest': slowest,
+        },
         'message_count': _m67_message_count,
         'instance': INSTANCE_ID,
         'time': int(time.time()),
@@ -2960,84 +4900,47 @@ def make67_chat_debug():
     return jsonify(data)
 
 
+@app.route('/api/make67/cache/stats', methods=['GET'])
+def make67_cache_stats():
+    """Diagnostics for the shared cache backend: hit ratio overall and per namespace
+    (lb = leaderboards, stats = session stats, state = shared state snapshots), plus
+    the process-local state LRU (size, hit/miss/eviction counters). Super users only, like
+    chat/debug: it also exposes the rate-limit and cheat-detection thresholds.
+    """
+    if not getattr(current_user, 'is_authenticated', False):
+        return jsonify({'ok': False, 'error': 'UNAUTHENTICATED'}), 401
+    if getattr(current_user, 'role', '') != 'super':
+        return jsonify({'ok': False, 'error': 'FORBIDDEN'}), 403
+    return jsonify({
+        'ok': True,
+        'instance': INSTANCE_ID,
+        'cache': _cache_backend.stats(),
+        'state_cache': _m67_state_cache.stats(),
+        'chat_tails': {room: tail.stats() for room, tail in _chat_tails.items()},
+        'rate_limiter': _rate_limiter.stats(),
+        'cheat': _cheat_timelines.stats(),
+        'puzzles': _puzzle_stats_snapshot(),
+    })
+
+
 # --- Make 6 or 7 chat (short polling, isolated from Make67) ---
 @app.route('/api/make6or7/chat/send', methods=['POST'])
 def make6or7_chat_send():
     """Insert a chat message in the Make 6 or 7 chat DB and return it."""
-    # Reuse same feature flag, or default to enabled
-    if not app.config.get('MAKE67_CHAT_ENABLED', True):
-        return jsonify({'error': 'DISABLED'}), 503
-    if not _is_make6or7_chat_eligible():
-        return jsonify({'error': 'FORBIDDEN'}), 403
-
-    data = request.get_json(silent=True) or {}
-    text = (data.get('text') or '').strip()
-    if not text:
-        return jsonify({'error': 'EMPTY'}), 400
-    if len(text) > 300:
-        text = text[:300]
-
-    try:
-        username = _format_display_name(current_user) if getattr(current_user, 'is_authenticated', False) else 'Anonymous'
-        user_id = getattr(current_user, 'id', None) if getattr(current_user, 'is_authenticated', False) else None
-    except Exception:
-        username = 'Anonymous'
-        user_id = None
-
-    msg = ChatMessage6or7(user_id=user_id, username=username, text=text)
-    db.session.add(msg)
-    db.session.commit()
-
-    payload = {
-        'id': msg.id,
-        'user': msg.username,
-        'text': msg.text,
-        'created_at': (msg.created_at.isoformat() + 'Z'),
-        'type': 'message',
-    }
-    return jsonify(payload)
+    return _chat_send('make6or7')
 
 
 @app.route('/api/make6or7/chat/since', methods=['GET'])
 def make6or7_chat_since():
     """Return Make 6 or 7 chat history (bounded, ascending)."""
-    if not app.config.get('MAKE67_CHAT_ENABLED', True):
-        return jsonify({'error': 'DISABLED'}), 503
-    if not _is_make6or7_chat_eligible():
-        return jsonify({'error': 'FORBIDDEN'}), 403
+    return _chat_since('make6or7')
 
-    try:
-        last_id = request.args.get('last_id', type=int) or 0
-    except Exception:
-        last_id = 0
 
-    if last_id > 0:
-        msgs = (
-            ChatMessage6or7.query
-            .filter(ChatMessage6or7.id > last_id)
-            .order_by(ChatMessage6or7.id.asc())
-            .limit(50)
-            .all()
-        )
-    else:
-        latest = (
-            ChatMessage6or7.query
-            .order_by(ChatMessage6or7.id.desc())
-            .limit(50)
-            .all()
-        )
-        msgs = list(reversed(latest))
+@app.route('/api/make6or7/chat/history', methods=['GET'])
+def make6or7_chat_history():
+    return _chat_history('make6or7')
+
 
-    return jsonify([
-        {
-            'id': m.id,
-            'user': m.username,
-            'text': m.text,
-            'created_at': (m.created_at.isoformat() + 'Z'),
-            'type': 'message',
-        }
-        for m in msgs
-    ])
 def _format_display_name(user: 'User') -> str:
     """Return first name + last initial when possible; fall back to email username."""
     try:
@@ -3150,6 +5053,26 @@ def api_make6or7_solve():
     return _game_solve('make6or7')
 
 
+@app.route('/api/make67/puzzle', methods=['GET'])
+def api_make67_puzzle():
+    return _puzzle_new('make67')
+
+
+@app.route('/api/make6or7/puzzle', methods=['GET'])
+def api_make6or7_puzzle():
+    return _puzzle_new('make6or7')
+
+
+@app.route('/api/make67/puzzle/hint', methods=['POST'])
+def api_make67_puzzle_hint():
+    return _puzzle_hint('make67')
+
+
+@app.route('/api/make6or7/puzzle/hint', methods=['POST'])
+def api_make6or7_puzzle_hint():
+    return _puzzle_hint('make6or7')
+
+
 @app.route('/api/make67/leaderboard', methods=['GET'])
 def api_make67_leaderboard():
     return _game_leaderboard('make67')
@@ -3164,9 +5087,83 @@ def api_make6or7_leaderboard():
 # Tournament System
 # ────────────────────────────────────────────────────────────────
 
-def _tourney_record_solve(uid: str, game_type: str, credit: int):
+# Every participant plays the same hands in the same order, so solve counts are comparable.
+# The schedule is generated once per tournament from a seed derived from Tournament.id
+# (reproducible on any worker) and kept in flat arrays with one answer per hand: dealing a
+# player's next hand, checking a solve against it and serving its hint are index lookups.
+_TOURNEY_PUZZLES = int(os.environ.get('M67_TOURNEY_PUZZLES', '400'))
+
+
+class _TourneySchedule:
+    """Seeded, precomputed puzzle sequence for one tournament."""
+
+    def __init__(self, tid: str, game: str, length: int = _TOURNEY_PUZZLES, difficulty: Optional[str] = None):
+        self.game = game
+        self.difficulty = difficulty
+        seed = int.from_bytes(hashlib.sha256(f"tourney:{tid}".encode('utf-8')).digest()[:8], 'big')
+        rng = random.Random(seed)
+        bank = _puzzle_banks.get(game) if difficulty else None
+        table = _puzzle_tables.get(game)
+        self.cards = array('h')
+        self.targets = array('h')
+        self.answers: list[str] = []
+        for _ in range(max(1, length)):
+            item = bank.random_hand(difficulty, rng) if bank is not None else None
+            if item is None:
+                item = table.random_hand(rng) if table is not None else make67_puzzles.generate(game, rng)
+            cards, answer, target = item
+            self.cards.extend(cards)
+            self.targets.append(target)
+            self.answers.append(answer or make67_puzzles.solve(cards, game, targets=(target,)))
+
+    def __len__(self) -> int:
+        return len(self.targets)
+
+    def puzzle(self, index: int) -> tuple[list[int], int, str]:
+        """(cards, target, answer) at index; players past the end start over."""
+        i = index % len(self.targets)
+        return list(self.cards[4 * i:4 * i + 4]), self.targets[i], self.answers[i]
+
+    def matches(self, index: int, cards) -> bool:
+        i = index % len(self.targets)
+        return sorted(self.cards[4 * i:4 * i + 4]) == sorted(cards)
+
+
+def _tourney_next_puzzle(uid: str, game_type: str):
+    """(index, cards, target, difficulty) of a participant's next tournament hand, or
+    None when the player is not in a running tournament for this game.
+    """
+    _tourney_check_lifecycle()
+    with _tourney_lock:
+        t = _tourney_active
+        if t is None or t['status'] != 'active' or t['game_type'] != game_type or uid not in t['participants']:
+            return None
+        i = t['pos'].get(uid, 0)
+        sched = t['schedule']
+    cards, target, _answer = sched.puzzle(i)
+    return i, cards, target, sched.difficulty
+
+
+def _tourney_forfeit_puzzle(uid: str, game_type: str, cards) -> Optional[str]:
+    """A hint on the current tournament hand skips it without a solve; returns its answer."""
+    with _tourney_lock:
+        t = _tourney_active
+        if t is None or t['status'] != 'active' or t['game_type'] != game_type or uid not in t['participants']:
+            return None
+        i = t['pos'].get(uid, 0)
+        if not t['schedule'].matches(i, cards):
+            return None
+        t['pos'][uid] = i + 1
+        return t['schedule'].puzzle(i)[2]
+
+
+def _tourney_record_solve(uid: str, game_type: str, cards=None):
     """Record a solve against the active tournament (if any and matching game type).
-    Tournament solves always count as 1 per solve regardless of boost/mud (fairness)."""
+    Tournament solves always count as 1 per solve regardless of boost/mud/banana (fairness).
+    Only a verified solve (cards from its puzzle token) of the player's current scheduled
+    hand counts; tokenless solves count only when puzzle tokens are off altogether."""
+    if cards is None and _PUZZLE_TOKEN_MODE != 'off':
+        return
     broadcast_data = None
     with _tourney_lock:
         t = _tourney_active
@@ -3177,6 +5174,10 @@ def _tourney_record_solve(uid: str, game_type: str, credit: int):
         now = datetime.now(timezone.utc)
         if now > t['ends_at']:
             return
+        i = t['pos'].get(uid, 0)
+        if cards is not None and not t['schedule'].matches(i, cards):
+            return
+        t['pos'][uid] = i + 1
         # Always +1 per solve for fairness (ignore boost/mud credit amount)
         t['solves'][uid] = t['solves'].get(uid, 0) + 1
         t['flush_dirty'].add(uid)
@@ -3184,37 +5185,106 @@ def _tourney_record_solve(uid: str, game_type: str, credit: int):
         broadcast_data = {
             'type': 'tournament_solve',
             'tournament_id': t['id'],
+            'game_type': game_type,
             'user_id': uid,
             'solves': t['solves'][uid],
             'ts': int(time.time()),
         }
+        participants = tuple(t['participants'])
     if broadcast_data:
         try:
-            _m67_broadcast(broadcast_data)
+            _m67_broadcast(broadcast_data, to=participants)
         except Exception:
             pass
 
 
+# Solve counts reach the DB from a background flusher on a fixed cadence (and once more
+# at the end), as one executemany UPDATE keyed by participant primary key. The flush lock
+# keeps an older periodic snapshot from landing after the final counts. The UPDATE is a
+# Core statement: a participant row that is missing (its INSERT failed) matches nothing
+# instead of failing the whole batch, as the ORM's by-primary-key bulk UPDATE would.
+_TOURNEY_FLUSH_SEC = float(os.environ.get('M67_TOURNEY_FLUSH_SEC', '5'))
+_tourney_flush_lock = threading.Lock()
+_tourney_flusher_running = False
+
+
+def _tourney_write_solves(tid: str, counts: dict, pids: dict):
+    """Bulk-write {uid: solves} for one tournament (no commit). Rows without a cached id
+    (e.g. joined before a restart) are looked up in one query.
+    """
+    missing = [uid for uid in counts if uid not in pids]
+    if missing:
+        rows = (db.session.query(TournamentParticipant.user_id, TournamentParticipant.id)
+                .filter(TournamentParticipant.tournament_id == tid, TournamentParticipant.user_id.in_(missing))
+                .all())
+        pids = {**pids, **dict(rows)}
+    params = [{'pid': pids[uid], 'n': count} for uid, count in counts.items() if uid in pids]
+    if params:
+        table = TournamentParticipant.__table__
+        db.session.execute(
+            update(table).where(table.c.id == bindparam('pid')).values(solves=bindparam('n')),
+            params,
+        )
+
+
 def _tourney_flush_solves():
-    """Flush in-memory tournament solve counts to DB. Called periodically."""
+    """Flush in-memory tournament solve counts to DB. Called by the background flusher."""
+    with _tourney_flush_lock:
+        with _tourney_lock:
+            t = _tourney_active
+            if t is None or not t['flush_dirty']:
+                return
+            dirty = dict()
+            for uid in t['flush_dirty']:
+                dirty[uid] = t['solves'].get(uid, 0)
+            t['flush_dirty'].clear()
+            tid = t['id']
+            pids = dict(t['pids'])
+        # Outside lock: DB writes
+        try:
+            _tourney_write_solves(tid, dirty, pids)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            app.logger.warning("tournament flush failed tid=%s err=%s", tid, e)
+            with _tourney_lock:
+                if _tourney_active is t:
+                    t['flush_dirty'].update(dirty)
+
+
+def _tourney_flush_loop():
+    """Flush solves and run lifecycle transitions while a tournament is pending or active,
+    so ends happen on time even when nobody polls /api/tournament/state.
+    """
+    global _tourney_flusher_running
+    try:
+        while True:
+            time.sleep(_TOURNEY_FLUSH_SEC)
+            with app.app_context():
+                try:
+                    _tourney_check_lifecycle()
+                    _tourney_flush_solves()
+                except Exception as e:
+                    app.logger.warning("tournament flusher error: %s", e)
+            with _tourney_lock:
+                if _tourney_active is None or _tourney_active['status'] not in ('pending', 'active'):
+                    # Clear the flag under the same lock as the decision, so a tournament
+                    # created right now either sees this loop running or starts a new one
+                    _tourney_flusher_running = False
+                    return
+    except BaseException:
+        with _tourney_lock:
+            _tourney_flusher_running = False
+        raise
+
+
+def _tourney_ensure_flusher():
+    global _tourney_flusher_running
     with _tourney_lock:
-        t = _tourney_active
-        if t is None or not t['flush_dirty']:
+        if _tourney_flusher_running:
             return
-        dirty = dict()
-        for uid in t['flush_dirty']:
-            dirty[uid] = t['solves'].get(uid, 0)
-        t['flush_dirty'].clear()
-        tid = t['id']
-    # Outside lock: DB writes
-    try:
-        for uid, count in dirty.items():
-            p = TournamentParticipant.query.filter_by(tournament_id=tid, user_id=uid).first()
-            if p:
-                p.solves = count
-        db.session.commit()
-    except Exception:
-        db.session.rollback()
+        _tourney_flusher_running = True
+    threading.Thread(target=_tourney_flush_loop, name='tourney-flusher', daemon=True).start()
 
 
 def _tourney_check_lifecycle():
@@ -3273,6 +5343,8 @@ def _tourney_end_active_locked() -> dict | None:
     game_type = t['game_type']
     solves = dict(t['solves'])
     names = dict(t.get('names', {}))
+    pids = dict(t['pids'])
+    t['flush_dirty'].clear()     # the final write covers every participant
     participant_count = len(t['participants'])
 
     # Filter out 0-solve participants from winners
@@ -3280,7 +5352,7 @@ def _tourney_end_active_locked() -> dict | None:
     winners = ranked[:3]
 
     return {
-        'tid': tid, 'game_type': game_type, 'solves': solves,
+        'tid': tid, 'game_type': game_type, 'solves': solves, 'pids': pids,
         'names': names, 'winners': winners, 'participant_count': participant_count,
     }
 
@@ -3294,6 +5366,16 @@ def _tourney_finalize_end(data: dict):
     winners = data['winners']
     participant_count = data['participant_count']
 
+    # Flush all final solve counts in one bulk UPDATE, committed on its own so a
+    # failure here cannot cost the winners their trophies
+    with _tourney_flush_lock:
+        try:
+            _tourney_write_solves(tid, solves, data['pids'])
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            app.logger.warning("tournament final solve write failed tid=%s err=%s", tid, e)
+
     try:
         tour = db.session.get(Tournament, tid)
         if tour:
@@ -3301,12 +5383,6 @@ def _tourney_finalize_end(data: dict):
             if winners:
                 tour.champion_id = winners[0][0]
 
-        # Flush all final solve counts
-        for uid, count in solves.items():
-            p = TournamentParticipant.query.filter_by(tournament_id=tid, user_id=uid).first()
-            if p:
-                p.solves = count
-
         # Award trophies (top 3, only if they actually solved something)
         for place, (uid, solve_count) in enumerate(winners, 1):
             trophy = TournamentTrophy(
@@ -3319,6 +5395,9 @@ def _tourney_finalize_end(data: dict):
             db.session.add(trophy)
 
         db.session.commit()
+        # New trophies are part of the winners' state snapshots
+        for uid, _ in winners:
+            _m67_bump_state_version(uid)
     except Exception:
         db.session.rollback()
 
@@ -3388,6 +5467,13 @@ def api_tournament_create():
     except (ValueError, TypeError):
         countdown_sec = 30
 
+    # Optional difficulty bucket for the shared schedule (needs a puzzle bank for the game)
+    difficulty = (data.get('difficulty') or '').strip().lower() or None
+    if difficulty and difficulty not in {name for name, _lo, _hi in make67_puzzles.DIFFICULTY_BUCKETS}:
+        return jsonify({'ok': False, 'error': 'BAD_DIFFICULTY'}), 400
+    if difficulty and not (game_type in _puzzle_banks and _puzzle_banks[game_type].counts().get(difficulty)):
+        difficulty = None
+
     now = datetime.now(timezone.utc)
     starts_at = now + timedelta(seconds=countdown_sec)
     ends_at = starts_at + timedelta(seconds=duration_sec)
@@ -3403,6 +5489,7 @@ def api_tournament_create():
         )
         db.session.add(tour)
         db.session.commit()
+        schedule = _TourneySchedule(tour.id, game_type, difficulty=difficulty)
 
         with _tourney_lock:
             _tourney_active = {
@@ -3415,7 +5502,11 @@ def api_tournament_create():
                 'participants': set(),
                 'flush_dirty': set(),
                 'names': {},
+                'schedule': schedule,
+                'pos': {},
+                'pids': {},
             }
+        _tourney_ensure_flusher()
 
         # Broadcast invite to all players
         _m67_broadcast({
@@ -3437,6 +5528,8 @@ def api_tournament_create():
             'game_type': game_type,
             'duration_sec': duration_sec,
             'countdown_sec': countdown_sec,
+            'difficulty': difficulty,
+            'puzzle_count': len(schedule),
         })
     except Exception as e:
         db.session.rollback()
@@ -3475,11 +5568,14 @@ def api_tournament_join():
         t['participants'].add(uid)
         t['solves'][uid] = 0
         t['names'][uid] = _format_display_name(current_user)
+        pid = str(uuid.uuid4())
         tid = t['id']
+        active = t['status'] == 'active'
 
     # Write to DB outside lock
     try:
         p = TournamentParticipant(
+            id=pid,
             tournament_id=tid,
             user_id=uid,
             solves=0,
@@ -3488,8 +5584,13 @@ def api_tournament_join():
         db.session.commit()
     except Exception:
         db.session.rollback()
+    else:
+        # Cache the row id only once the row exists; the flusher writes by this id
+        with _tourney_lock:
+            if _tourney_active is t:
+                t['pids'][uid] = pid
 
-    return jsonify({'ok': True, 'joined': True})
+    return jsonify({'ok': True, 'joined': True, 'active': active})
 
 
 @app.route('/api/tournament/state', methods=['GET'])
@@ -3500,9 +5601,6 @@ def api_tournament_state():
 
     _tourney_check_lifecycle()
 
-    # Periodically flush solves
-    _tourney_flush_solves()
-
     with _tourney_lock:
         t = _tourney_active
         if t is None:
@@ -3532,6 +5630,9 @@ def api_tournament_state():
             'joined': uid in t['participants'],
             'can_join': can_join and uid not in t['participants'],
             'my_solves': t['solves'].get(uid, 0),
+            'puzzle_index': t['pos'].get(uid, 0),
+            'puzzle_count': len(t['schedule']),
+            'difficulty': t['schedule'].difficulty,
             'scoreboard': scoreboard[:20],
         }
 
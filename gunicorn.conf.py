@@ -0,0 +1,37 @@
+"""Gunicorn settings, picked up automatically when gunicorn starts from the repo root.
+
+M67_WORKER_PROFILE selects how workers serve requests:
+  sync   (default) - gunicorn's stock workers; every open SSE stream or long-poll
+                     pins a whole worker.
+  gevent           - cooperative greenlet workers. Blocking queue waits, sleeps and
+                     socket I/O yield, so one process holds thousands of idle SSE
+                     connections on /api/make67/chat/stream and /api/make67/events
+                     while sharing the same in-process broadcast bus.
+
+The sync profile sets nothing, so existing deployments behave exactly as before.
+Flags passed on the gunicorn command line still override anything set here.
+"""
+import os
+
+_profile = os.environ.get('M67_WORKER_PROFILE', 'sync').strip().lower()
+
+# bind ($PORT) and workers ($WEB_CONCURRENCY) keep gunicorn's own env-driven defaults
+
+if _profile == 'gevent':
+    worker_class = 'gevent'
+    # Concurrent greenlets (open connections) per worker
+    worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', '4000'))
+    # Idle SSE streams send a keep-alive every 25s; don't let the arbiter treat them as hung
+    timeout = int(os.environ.get('GUNICORN_TIMEOUT', '120'))
+    keepalive = 30
+
+
+def post_fork(server, worker):
+    """Make psycopg2 cooperative so a slow Postgres query doesn't block every greenlet."""
+    if _profile != 'gevent':
+        return
+    try:
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
+    except Exception as e:
+        server.log.warning("psycogreen unavailable; Postgres calls will block the gevent hub: %s", e)
@@ -0,0 +1,822 @@
+"""
+Puzzle maths shared by the server and the offline tools (stdlib only, no Flask).
+
+- GAMES: per-mode rules (targets, operators, card range) matching the frontends
+- generate(): builds a solvable 4-card hand backwards from a target, like the JS generators
+- check_expr(): verifies a submitted expression such as "((60 + 7) * (3 - 2))" exactly
+- Solver / solve() / all_solutions(): memoized exact search over canonical multisets
+- build_table() / PuzzleTable: precomputed, memory-mapped solvability table for a card range
+- solution_stats() / PuzzleBank: distinct-solution difficulty scores and bucketed hand banks
+
+Arithmetic is exact (fractions.Fraction), so 1/3*3 is 1 and there is no float tolerance.
+"""
+import ast
+import itertools
+import json
+import math
+import mmap
+import os
+import random
+import struct
+from array import array
+from dataclasses import dataclass
+from fractions import Fraction
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class GameSpec:
+    name: str
+    targets: tuple[int, ...]
+    ops: str
+    card_min: int
+    card_max: int
+
+
+GAMES: dict[str, GameSpec] = {
+    # make67.js: integer cards within +-500, four operators; 67 or -67 wins
+    'make67': GameSpec('make67', (67,), '+-*/', -500, 500),
+    # make6or7.js: integer cards 1..15, only + and -; |result| of 6 or 7 wins
+    'make6or7': GameSpec('make6or7', (6, 7), '+-', 1, 15),
+}
+
+MAX_EXPR_LEN = 96
+
+
+def _div(a, b):
+    """Exact a / b that stays a plain int when the division is exact (ints hash and
+    compare equal to the matching Fraction but are several times cheaper).
+    """
+    if type(a) is int and type(b) is int:
+        q, r = divmod(a, b)
+        return q if not r else Fraction(a, b)
+    q = Fraction(a) / b
+    return q.numerator if q.denominator == 1 else q
+
+
+def _apply(op: str, a, b):
+    """a op b over ints/Fractions; None for division by zero."""
+    if op == '+':
+        return a + b
+    if op == '-':
+        return a - b
+    if op == '*':
+        return a * b
+    if op == '/':
+        return _div(a, b) if b else None
+    return None
+
+
+def is_target(value: Fraction, spec: GameSpec) -> bool:
+    """Both frontends accept the target or its negation."""
+    return value.denominator == 1 and abs(value.numerator) in spec.targets
+
+
+def fmt_num(n) -> str:
+    n = Fraction(n)
+    s = str(n.numerator) if n.denominator == 1 else f"{n.numerator}/{n.denominator}"
+    return f"({s})" if n < 0 or n.denominator != 1 else s
+
+
+# ---------------------- Generation ----------------------
+
+def _split_make67(value: int, rng: random.Random):
+    """One backward split a op b = value with small integer leaves (mirrors make67.js)."""
+    for _ in range(200):
+        op = rng.choice('+-*/+-/')
+        if op == '+':
+            span = min(max(abs(value), 5), 60)
+            a = rng.randint(-span, span)
+            b = value - a
+            if abs(a) <= 200 and abs(b) <= 200:
+                return op, a, b
+        elif op == '-':
+            b = rng.randint(-60, 60)
+            a = value + b
+            if abs(a) <= 200 and abs(b) <= 200:
+                return op, a, b
+        elif op == '*':
+            av = abs(value)
+            factors = [f for f in range(1, min(50, av) + 1) if av % f == 0]
+            if factors:
+                f = rng.choice(factors)
+                sign = -1 if value < 0 else 1
+                a, b = (f * sign, av // f) if rng.random() < 0.5 else (av // f, f * sign)
+                if abs(a) <= 200 and abs(b) <= 200:
+                    return op, a, b
+        else:
+            b = rng.choice((-12, -6, -5, -4, -3, -2, -1, 1, 2, 3, 4, 5, 6, 8, 10, 12))
+            a = value * b
+            if abs(a) <= 400:
+                return op, a, b
+    return None
+
+
+def _split_make6or7(value: int, rng: random.Random):
+    """One backward split using only + and - with leaves in 1..15 (mirrors make6or7.js)."""
+    for _ in range(200):
+        if rng.random() < 0.5:
+            a = rng.randint(1, 15)
+            b = value - a
+        else:
+            b = rng.randint(1, 15)
+            a = value + b
+            if not 1 <= a <= 15:
+                continue
+            return '-', a, b
+        if 1 <= b <= 15:
+            return '+', a, b
+    return None
+
+
+_SPLITTERS = {'make67': _split_make67, 'make6or7': _split_make6or7}
+
+
+def _render(node) -> str:
+    if isinstance(node, int):
+        return fmt_num(node)
+    op, left, right = node
+    return f"({_render(left)} {op} {_render(right)})"
+
+
+def _leaves(node, out: list):
+    if isinstance(node, int):
+        out.append(node)
+    else:
+        _leaves(node[1], out)
+        _leaves(node[2], out)
+    return out
+
+
+def _replace(node, path: tuple, new):
+    if not path:
+        return new
+    op, left, right = node
+    if path[0] == 1:
+        return (op, _replace(left, path[1:], new), right)
+    return (op, left, _replace(right, path[1:], new))
+
+
+def generate(game: str, rng: Optional[random.Random] = None) -> tuple[list[int], str, int]:
+    """Return (cards, solution expression, target) for a random solvable hand."""
+    spec = GAMES[game]
+    rng = rng or random
+    split = _SPLITTERS[game]
+    for _ in range(200):
+        target = rng.choice(spec.targets)
+        # Tree of ints (leaves) and (op, left, right) nodes; expand a random leaf three times
+        root = target
+        for _k in range(3):
+            paths = []
+
+            def walk(node, path):
+                if isinstance(node, int):
+                    paths.append(path)
+                else:
+                    walk(node[1], path + (1,))
+                    walk(node[2], path + (2,))
+            walk(root, ())
+            path = rng.choice(paths)
+            node = root
+            for step in path:
+                node = node[step]
+            s = split(node, rng)
+            if s is None:
+                root = None
+                break
+            root = _replace(root, path, s)
+        if root is None:
+            continue
+        cards = _leaves(root, [])
+        if any(not spec.card_min <= c <= spec.card_max for c in cards) or len(set(cards)) < 2:
+            continue
+        return cards, _render(root), target
+    cards = [60, 4, 3, 1] if game == 'make67' else [3, 4, 2, 1]
+    return cards, solve(cards, game), spec.targets[0]
+
+
+# ---------------------- Verification ----------------------
+
+_AST_OPS = {ast.Add: '+', ast.Sub: '-', ast.Mult: '*', ast.Div: '/'}
+
+
+def check_expr(expr: str, cards: list[int], spec: GameSpec) -> Optional[str]:
+    """Verify that `expr` uses every card exactly once, only the allowed operators,
+    and evaluates to a target. Returns None when correct, else a short reason code.
+    """
+    if not isinstance(expr, str) or not expr or len(expr) > MAX_EXPR_LEN:
+        return 'BAD_EXPR'
+    try:
+        tree = ast.parse(expr, mode='eval').body
+    except (SyntaxError, ValueError):
+        return 'BAD_EXPR'
+    remaining = list(cards)
+
+    def ev(node) -> Fraction:
+        if isinstance(node, ast.BinOp):
+            op = _AST_OPS.get(type(node.op))
+            if op is None or op not in spec.ops:
+                raise ValueError('BAD_OP')
+            r = _apply(op, ev(node.left), ev(node.right))
+            if r is None:
+                raise ValueError('DIV_ZERO')
+            return r
+        # A card literal, possibly negative: 5, -5, (-5)
+        neg = isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub)
+        lit = node.operand if neg else node
+        if isinstance(lit, ast.Constant) and type(lit.value) is int:
+            v = -lit.value if neg else lit.value
+            try:
+                remaining.remove(v)
+            except ValueError:
+                raise ValueError('WRONG_CARDS') from None
+            return v
+        raise ValueError('BAD_EXPR')
+
+    try:
+        value = ev(tree)
+    except ValueError as e:
+        return str(e)
+    except RecursionError:
+        return 'BAD_EXPR'
+    if remaining:
+        return 'WRONG_CARDS'
+    return None if is_target(value, spec) else 'WRONG_ANSWER'
+
+
+# ---------------------- Search ----------------------
+
+_CODE_OPS = ('+', '-', '*', '/', 'r-', 'r/')     # r- / r/ swap operands, so every tree fits the two shapes
+
+
+def _inverse_candidates(t: Fraction, b: Fraction, ops: str):
+    """Values x with x op b == t (or b op x == t), as (x, code) pairs."""
+    if '+' in ops:
+        yield t - b, 0
+    if '-' in ops:
+        yield t + b, 1
+        yield b - t, 4
+    if '*' in ops and b:
+        yield _div(t, b), 2
+    if '/' in ops and b:
+        yield t * b, 3
+        if t:
+            yield _div(b, t), 5
+
+
+def _inverse_right(t, x, ops: str):
+    """Values b with x op b == t (or b op x == t), as (b, code) pairs; mirror of _inverse_candidates."""
+    if '+' in ops:
+        yield t - x, 0
+    if '-' in ops:
+        yield x - t, 1
+        yield t + x, 4
+    if '*' in ops and x:
+        yield _div(t, x), 2
+    if '/' in ops:
+        if t and x:
+            yield _div(x, t), 3
+        if x:
+            yield t * x, 5
+
+
+def _combine(code: int, x: Fraction, b: Fraction) -> Optional[Fraction]:
+    op = _CODE_OPS[code]
+    if op[0] == 'r':
+        return _apply(op[1], b, x)
+    return _apply(op, x, b)
+
+
+class Solver:
+    """Search engine over value multisets with exact rational arithmetic.
+
+    States are canonical (sorted) multisets, and the reachable values of every
+    sub-multiset are memoized with derivation counts, so a+b / b+a and permutations of
+    the same remaining cards are explored once and shared across hands. Trees are
+    counted modulo commutativity at each node (not associativity).
+    """
+
+    def __init__(self, ops: str = '+-*/', max_memo: int = 200_000):
+        self.ops = ops
+        self.max_memo = max_memo
+        self.codes = [i for i, o in enumerate(_CODE_OPS) if o[-1] in ops]
+        self._memo: dict[tuple, dict[Fraction, int]] = {}
+
+    def _codes_for(self, left: tuple, right: tuple, x: Fraction, b: Fraction):
+        """Operator codes that give distinct trees for (x from left, b from right). When both
+        sides are the same multiset every pair is also seen swapped, so reversed codes are
+        dropped and commutative ones kept for one order only.
+        """
+        if left != right:
+            return self.codes
+        return [c for c in self.codes if c < 4 and not (c in (0, 2) and x > b)]
+
+    def get(self, ms: tuple) -> dict[Fraction, int]:
+        """Reachable value -> number of derivation trees, for a sorted multiset."""
+        hit = self._memo.get(ms)
+        if hit is not None:
+            return hit
+        if len(self._memo) >= self.max_memo:
+            self._memo.clear()
+        if len(ms) == 1:
+            out = {ms[0]: 1}
+        else:
+            out: dict[Fraction, int] = {}
+            for left, right in _splits(ms):
+                rl, rr = self.get(left), self.get(right)
+                for x, nx in rl.items():
+                    for b, nb in rr.items():
+                        for code in self._codes_for(left, right, x, b):
+                            v = _combine(code, x, b)
+                            if v is not None:
+                                out[v] = out.get(v, 0) + nx * nb
+        self._memo[ms] = out
+        return out
+
+    def _matches(self, left: tuple, right: tuple, target):
+        """(x, b, code) with x reachable from left, b from right and x code b == target.
+        Walks the smaller reach set and looks up the other side, so a (3,1) split costs
+        a handful of dict lookups rather than a scan of the triple's values.
+        """
+        rl, rr = self.get(left), self.get(right)
+        if left == right or target == 0:
+            # Enumerate directly: on a mirror-image split so x op b and b op x appear once,
+            # and for 0, where 0 * x and 0 / x match any x and have no unique inverse
+            for x in rl:
+                for b in rr:
+                    for code in self._codes_for(left, right, x, b):
+                        if _combine(code, x, b) == target:
+                            yield x, b, code
+        elif len(rr) <= len(rl):
+            for b in rr:
+                for x, code in _inverse_candidates(target, b, self.ops):
+                    if x in rl:
+                        yield x, b, code
+        else:
+            for x in rl:
+                for b, code in _inverse_right(target, x, self.ops):
+                    if b in rr:
+                        yield x, b, code
+
+    def ways(self, ms: tuple, target) -> int:
+        """Solution trees for a hand reaching target, via inverse lookups (no full expansion)."""
+        total = 0
+        for left, right in _splits(ms):
+            rl, rr = self.get(left), self.get(right)
+            for x, b, _code in self._matches(left, right, target):
+                total += rl[x] * rr[b]
+        return total
+
+    def explain(self, ms: tuple, target):
+        """One derivation tree for target as nested (code, left, right) / int leaves, or None."""
+        if len(ms) == 1:
+            return ms[0] if ms[0] == target else None
+        for left, right in _splits(ms):
+            for x, b, code in self._matches(left, right, target):
+                return (code, self.explain(left, x), self.explain(right, b))
+        return None
+
+    def trees(self, ms: tuple, target):
+        """Yield every derivation tree of target from ms, in explain()'s format."""
+        if len(ms) == 1:
+            if ms[0] == target:
+                yield ms[0]
+            return
+        for left, right in _splits(ms):
+            for x, b, code in self._matches(left, right, target):
+                for tx in self.trees(left, x):
+                    for tb in self.trees(right, b):
+                        yield (code, tx, tb)
+
+    def expressions(self, ms: tuple, target):
+        """Yield every derivation of target from ms as an expression string."""
+        return map(render_tree, self.trees(ms, target))
+
+    def solve(self, cards, targets) -> Optional[str]:
+        """One expression reaching a target, preferring exact hits over negated ones."""
+        ms = _canonical(cards)
+        for goal in (list(targets), [-t for t in targets]):
+            for t in goal:
+                for expr in self.expressions(ms, t):
+                    return expr
+        return None
+
+    def all_solutions(self, cards, targets, limit: Optional[int] = None) -> list[str]:
+        """Every expression reaching a target or its negation (up to limit)."""
+        ms = _canonical(cards)
+        gen = itertools.chain.from_iterable(
+            self.expressions(ms, t) for t in itertools.chain(targets, (-t for t in targets)))
+        return list(itertools.islice(gen, limit))
+
+    def clear(self):
+        self._memo.clear()
+
+
+def render_tree(tree) -> str:
+    """Expression string for a (code, left, right) / leaf tree."""
+    if not isinstance(tree, tuple):
+        return fmt_num(tree)
+    code, x, b = tree
+    op = _CODE_OPS[code]
+    if op[0] == 'r':
+        return f"({render_tree(b)} {op[1]} {render_tree(x)})"
+    return f"({render_tree(x)} {op} {render_tree(b)})"
+
+
+def _canonical(cards) -> tuple:
+    """Sorted value tuple; integral values as int so the memo keys and arithmetic stay cheap."""
+    vals = []
+    for c in cards:
+        f = Fraction(c)
+        vals.append(f.numerator if f.denominator == 1 else f)
+    return tuple(sorted(vals))
+
+
+def _splits(ms: tuple):
+    """Unordered (left, right) splits of a sorted multiset into two non-empty sub-multisets."""
+    n = len(ms)
+    seen = set()
+    for mask in range(1, (1 << n) - 1):
+        left = tuple(ms[i] for i in range(n) if mask >> i & 1)
+        right = tuple(ms[i] for i in range(n) if not mask >> i & 1)
+        key = (left, right) if left <= right else (right, left)
+        if key not in seen:
+            seen.add(key)
+            yield key
+
+
+_solvers: dict[str, Solver] = {}
+
+
+def _solver(game: str) -> Solver:
+    solver = _solvers.get(game)
+    if solver is None:
+        solver = _solvers[game] = Solver(GAMES[game].ops)
+    return solver
+
+
+def solve(cards, game: str = 'make67', targets: Optional[tuple[int, ...]] = None) -> Optional[str]:
+    """One solution expression for a hand (exact target preferred), or None."""
+    return _solver(game).solve(cards, targets or GAMES[game].targets)
+
+
+def all_solutions(cards, game: str = 'make67', targets: Optional[tuple[int, ...]] = None,
+                  limit: Optional[int] = None) -> list[str]:
+    """All solution expressions for a hand, distinct up to commutativity."""
+    return _solver(game).all_solutions(cards, targets or GAMES[game].targets, limit)
+
+
+# ---------------------- Solvability table ----------------------
+# Every multiset of four card values in [card_min, card_max] gets one fixed-size row,
+# stored in colex rank order so a hand's row offset is computed directly (O(1)).
+# Rows hold, per target: flags, the number of solution trees (commutative duplicates
+# folded), a 0-100 difficulty score and one canonical solution packed into 16 bits.
+# Files are read through mmap, so workers share the OS page cache.
+
+TABLE_MAGIC = b'M67T'
+TABLE_VERSION = 1
+_HEADER = struct.Struct('<4sHH12sHhhB4h')       # magic, version, header size, game, ops mask, lo, hi, n_targets, targets
+_CARDS = struct.Struct('<4h')
+_TARGET_CELL = struct.Struct('<BBHH')           # flags, difficulty, ways, solution code
+FLAG_EXACT = 1      # target itself reachable
+FLAG_NEGATED = 2    # only (or also) -target reachable
+NO_SOLUTION = 0xFFFF
+
+# Solution code: bit 14 shape (0 = ((a o b) o c) o d, 1 = (a o b) o (c o d)),
+# bits 5-13 three 3-bit _CODE_OPS indexes (innermost first), bits 0-4 leaf permutation
+_PERMS = list(itertools.permutations(range(4)))
+
+
+def _ops_mask(ops: str) -> int:
+    return sum(1 << '+-*/'.index(o) for o in ops)
+
+
+def multiset_rank(cards, lo: int) -> int:
+    """Colex rank of a sorted 4-card multiset: combinations with repetition -> 0..C(n+3,4)-1."""
+    c = sorted(cards)
+    return sum(math.comb(c[i] - lo + i, i + 1) for i in range(4))
+
+
+def multiset_unrank(rank: int, lo: int) -> list[int]:
+    """Inverse of multiset_rank: the sorted 4-card hand at a colex rank."""
+    cards = [0] * 4
+    for i in range(4, 0, -1):
+        # Largest x with C(x, i) <= rank
+        x_lo, x_hi = i - 1, i - 1 + 1
+        while math.comb(x_hi, i) <= rank:
+            x_hi *= 2
+        while x_hi - x_lo > 1:
+            mid = (x_lo + x_hi) // 2
+            if math.comb(mid, i) <= rank:
+                x_lo = mid
+            else:
+                x_hi = mid
+        rank -= math.comb(x_lo, i)
+        cards[i - 1] = x_lo - (i - 1) + lo
+    return cards
+
+
+def _encode_tree(tree, cards: list[int]) -> int:
+    """Pack an explain() tree into a 16-bit solution code (see module notes)."""
+    code, left, right = tree
+    if isinstance(left, int) or isinstance(right, int):
+        # (3,1) split at the root: normalize to ((a o b) o c) o d
+        if isinstance(left, int) and not isinstance(right, int):
+            left, right, code = right, left, _swap(code)
+        c2, l2, r2 = left
+        if isinstance(l2, int) and not isinstance(r2, int):
+            l2, r2, c2 = r2, l2, _swap(c2)
+        c1, a, b = l2
+        leaves, ops, shape = [a, b, r2, right], (c1, c2, code), 0
+    else:
+        (c1, a, b), (c2, c, d) = left, right
+        leaves, ops, shape = [a, b, c, d], (c1, c2, code), 1
+    pool = sorted(cards)
+    idx = []
+    for v in leaves:
+        i = next(k for k in range(4) if pool[k] == v and k not in idx)
+        idx.append(i)
+    perm = _PERMS.index(tuple(idx))
+    return shape << 14 | ops[0] << 11 | ops[1] << 8 | ops[2] << 5 | perm
+
+
+def _swap(code: int) -> int:
+    return {1: 4, 4: 1, 3: 5, 5: 3}.get(code, code)
+
+
+def decode_solution(code: int, cards) -> Optional[str]:
+    """Render a 16-bit solution code for a hand as an expression check_expr accepts."""
+    if code == NO_SOLUTION:
+        return None
+    pool = sorted(cards)
+    a, b, c, d = (fmt_num(pool[i]) for i in _PERMS[code & 0x1F])
+    o1, o2, o3 = (code >> 11) & 7, (code >> 8) & 7, (code >> 5) & 7
+
+    def node(o, x, y):
+        op = _CODE_OPS[o]
+        return f"({y} {op[1]} {x})" if op[0] == 'r' else f"({x} {op} {y})"
+    if code >> 14 & 1:
+        return node(o3, node(o1, a, b), node(o2, c, d))
+    return node(o3, node(o2, node(o1, a, b), c), d)
+
+
+def difficulty_score(ways: int) -> int:
+    """0 (many routes) .. 100 (a single route); each doubling of routes lowers it by 12."""
+    if ways <= 0:
+        return 0
+    return max(0, min(100, round(100 - 12 * math.log2(ways))))
+
+
+def build_table(path: str, game: str, card_min: Optional[int] = None, card_max: Optional[int] = None,
+                progress=None, max_rows: int = 5_000_000) -> int:
+    """Enumerate every 4-card multiset in range and write the table. Returns the row count."""
+    spec = GAMES[game]
+    lo = spec.card_min if card_min is None else card_min
+    hi = spec.card_max if card_max is None else card_max
+    n = hi - lo + 1
+    rows = math.comb(n + 3, 4)
+    if n < 1 or rows > max_rows:
+        raise ValueError(f"card range {lo}..{hi} gives {rows} hands (limit {max_rows}); narrow it")
+    reach = Solver(spec.ops)
+    targets = spec.targets
+    header = _HEADER.pack(TABLE_MAGIC, TABLE_VERSION, _HEADER.size, game.encode('ascii'), _ops_mask(spec.ops),
+                          lo, hi, len(targets), *(list(targets) + [0] * (4 - len(targets))))
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(header)
+        done = 0
+        # combinations_with_replacement yields sorted tuples in colex-compatible order for rank()
+        hands = sorted(itertools.combinations_with_replacement(range(lo, hi + 1), 4),
+                       key=lambda h: multiset_rank(h, lo))
+        for hand in hands:
+            buf = [_CARDS.pack(*hand)]
+            for t in targets:
+                ways = reach.ways(hand, t)
+                neg = reach.ways(hand, -t)
+                flags = (FLAG_EXACT if ways else 0) | (FLAG_NEGATED if neg else 0)
+                goal = t if ways else -t
+                tree = reach.explain(hand, goal) if flags else None
+                code = _encode_tree(tree, list(hand)) if tree is not None and not isinstance(tree, int) else NO_SOLUTION
+                buf.append(_TARGET_CELL.pack(flags, difficulty_score(ways or neg), min(ways or neg, 0xFFFF), code))
+            f.write(b''.join(buf))
+            done += 1
+            if progress and done % 5000 == 0:
+                progress(done, rows)
+    os.replace(tmp, path)
+    return rows
+
+
+class PuzzleTable:
+    """Read-only, memory-mapped solvability table (see build_table)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._f = open(path, 'rb')
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, hsize, game, _mask, lo, hi, nt, *targets = _HEADER.unpack_from(self._mm, 0)
+        if magic != TABLE_MAGIC or version != TABLE_VERSION:
+            raise ValueError(f"{path}: not a puzzle table (v{TABLE_VERSION})")
+        self.game = game.rstrip(b'\0').decode('ascii')
+        self.lo, self.hi = lo, hi
+        self.targets = tuple(targets[:nt])
+        self._base = hsize
+        self._row = _CARDS.size + _TARGET_CELL.size * nt
+        self.rows = (len(self._mm) - hsize) // self._row
+        self._solvable: Optional[array] = None
+
+    def _offset(self, cards) -> Optional[int]:
+        if len(cards) != 4 or min(cards) < self.lo or max(cards) > self.hi:
+            return None
+        return self._base + multiset_rank(cards, self.lo) * self._row
+
+    def lookup(self, cards, target: Optional[int] = None) -> Optional[dict]:
+        """Row for a hand: flags, difficulty, ways and solution for one target (default first)."""
+        off = self._offset(cards)
+        if off is None:
+            return None
+        ti = self.targets.index(target) if target is not None else 0
+        flags, difficulty, ways, code = _TARGET_CELL.unpack_from(self._mm, off + _CARDS.size + ti * _TARGET_CELL.size)
+        return {'flags': flags, 'difficulty': difficulty, 'ways': ways,
+                'solution': decode_solution(code, cards) if flags else None}
+
+    def row_cards(self, row: int) -> list[int]:
+        return list(_CARDS.unpack_from(self._mm, self._base + row * self._row))
+
+    def random_hand(self, rng=None) -> tuple[list[int], str, int]:
+        """A uniformly random solvable hand as (cards in random order, solution, target)."""
+        rng = rng or random
+        if self._solvable is None:
+            ids = array('I')
+            for row in range(self.rows):
+                off = self._base + row * self._row + _CARDS.size
+                if any(self._mm[off + i * _TARGET_CELL.size] & FLAG_EXACT for i in range(len(self.targets))):
+                    ids.append(row)
+            self._solvable = ids
+        row = self._solvable[rng.randrange(len(self._solvable))]
+        cards = self.row_cards(row)
+        choices = [t for t in self.targets if self.lookup(cards, t)['flags'] & FLAG_EXACT]
+        target = rng.choice(choices)
+        solution = self.lookup(cards, target)['solution']
+        rng.shuffle(cards)
+        return cards, solution, target
+
+    def close(self):
+        self._mm.close()
+        self._f.close()
+
+
+# ---------------------- Difficulty ----------------------
+# How hard a hand feels depends on how many genuinely different solutions it has, not
+# on how many trees reach the target: (a + b) + c and c + (b + a) are the same idea.
+# canonical_form() flattens sums into signed terms and products into factors with
+# +-1 exponents; a term worth 0 in a sum, or a factor worth 1 in a product, loses its
+# sign, so x * (3 - 2) and x / (3 - 2) match. min_steps is the fewest operations that
+# change a value (x * 1, x / 1, x + 0, x - 0 and 0 * x are free), and fraction_only
+# marks hands where every solution passes through a non-integer.
+
+DIFFICULTY_BUCKETS = (('easy', 0, 70), ('medium', 70, 90), ('hard', 90, 101))
+
+
+def _trivial(op: str, x, b) -> bool:
+    if op == '+':
+        return x == 0 or b == 0
+    if op == '-':
+        return b == 0
+    if op == '*':
+        return x in (0, 1) or b in (0, 1)
+    return b == 1 or x == 0
+
+
+def _flatten(form, sign: int, kind: str) -> list:
+    if form[0] == kind:
+        return [(s * sign, f) for s, f in form[1]]
+    return [(sign, form)]
+
+
+def _form_value(form):
+    kind, body = form
+    if kind == 'n':
+        return body
+    if kind == '+':
+        return sum(s * _form_value(f) for s, f in body)
+    v = 1
+    for s, f in body:
+        v = v * _form_value(f) if s > 0 else _div(v, _form_value(f))
+    return v
+
+
+def _analyse(tree):
+    """(value, canonical form, non-trivial steps, uses a fraction) for a derivation tree."""
+    if not isinstance(tree, tuple):
+        return tree, ('n', tree), 0, False
+    code, tx, tb = tree
+    x, fx, sx, qx = _analyse(tx)
+    b, fb, sb, qb = _analyse(tb)
+    v = _combine(code, x, b)
+    op = _CODE_OPS[code]
+    if op[0] == 'r':
+        op, x, fx, b, fb = op[1], b, fb, x, fx
+    kind, identity = ('+', 0) if op in '+-' else ('*', 1)
+    terms = _flatten(fx, 1, kind) + _flatten(fb, -1 if op in '-/' else 1, kind)
+    terms = sorted((1 if _form_value(f) == identity else s, f) for s, f in terms)
+    steps = sx + sb + (0 if _trivial(op, x, b) else 1)
+    fraction = qx or qb or Fraction(v).denominator != 1
+    return v, (kind, tuple(terms)), steps, fraction
+
+
+def canonical_form(tree):
+    """Hashable form of a derivation tree, equal for trees that differ only by
+    associativity, commutativity or the operator applied to a 0 / 1 operand.
+    """
+    return _analyse(tree)[1]
+
+
+def difficulty_rating(distinct: int, min_steps: int, fraction_only: bool) -> int:
+    """0-100: fewer distinct solutions, more real steps and forced fractions are harder."""
+    if distinct <= 0:
+        return 0
+    score = 0.6 * difficulty_score(distinct) + 15 * (min_steps - 1) + (15 if fraction_only else 0)
+    return max(0, min(100, round(score)))
+
+
+def bucket_for(rating: int) -> str:
+    for name, lo, hi in DIFFICULTY_BUCKETS:
+        if lo <= rating < hi:
+            return name
+    return DIFFICULTY_BUCKETS[-1][0]
+
+
+def solution_stats(cards, target: int, game: str = 'make67', limit: int = 20_000) -> Optional[dict]:
+    """Exhaustive difficulty stats for one hand and target (or -target when only that is
+    reachable), or None when unsolvable. At most `limit` trees are examined; `capped`
+    says the counts are lower bounds.
+    """
+    solver = _solver(game)
+    ms = _canonical(cards)
+    goal = target if solver.ways(ms, target) else -target
+    forms = set()
+    trees = 0
+    min_steps = 4
+    fraction_only = True
+    for tree in itertools.islice(solver.trees(ms, goal), limit):
+        _v, form, steps, fraction = _analyse(tree)
+        trees += 1
+        forms.add(form)
+        min_steps = min(min_steps, steps)
+        fraction_only = fraction_only and fraction
+    if not trees:
+        return None
+    rating = difficulty_rating(len(forms), min_steps, fraction_only)
+    return {'target': target, 'negated': goal != target, 'trees': trees, 'distinct': len(forms),
+            'min_steps': min_steps, 'fraction_only': fraction_only, 'capped': trees >= limit,
+            'difficulty': rating, 'bucket': bucket_for(rating)}
+
+
+def distinct_solutions(cards, target: int, game: str = 'make67', limit: int = 20_000) -> list[str]:
+    """One expression per canonical form reaching target (or -target when only that is reachable)."""
+    solver = _solver(game)
+    ms = _canonical(cards)
+    goal = target if solver.ways(ms, target) else -target
+    seen = {}
+    for tree in itertools.islice(solver.trees(ms, goal), limit):
+        seen.setdefault(canonical_form(tree), tree)
+    return [render_tree(t) for t in seen.values()]
+
+
+class PuzzleBank:
+    """Hands grouped by difficulty bucket, loaded from the NDJSON written by
+    tools/make67_difficulty.py ({"cards", "target", "difficulty", "bucket", ...} per line).
+    Cards and targets are kept in flat arrays, so a few million hands stay compact.
+    """
+
+    def __init__(self, path: str, game: Optional[str] = None):
+        self.path = path
+        self._cards: dict[str, array] = {name: array('h') for name, _lo, _hi in DIFFICULTY_BUCKETS}
+        self._targets: dict[str, array] = {name: array('h') for name, _lo, _hi in DIFFICULTY_BUCKETS}
+        spec = GAMES[game] if game else None
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                row = json.loads(line)
+                bucket = row.get('bucket') or bucket_for(int(row['difficulty']))
+                if bucket not in self._cards or len(row['cards']) != 4:
+                    raise ValueError(f"{path}: bad row {line.strip()[:80]}")
+                if spec and abs(int(row['target'])) not in spec.targets:
+                    raise ValueError(f"{path}: target {row['target']} is not a {game} target")
+                self._cards[bucket].extend(int(c) for c in row['cards'])
+                self._targets[bucket].append(int(row['target']))
+
+    def counts(self) -> dict[str, int]:
+        return {name: len(t) for name, t in self._targets.items()}
+
+    def random_hand(self, bucket: str, rng=None) -> Optional[tuple[list[int], None, int]]:
+        """(cards in random order, None, target) from a bucket, or None if it is empty."""
+        targets = self._targets.get(bucket)
+        if not targets:
+            return None
+        rng = rng or random
+        i = rng.randrange(len(targets))
+        cards = list(self._cards[bucket][4 * i:4 * i + 4])
+        rng.shuffle(cards)
+        return cards, None, targets[i]
@@ -0,0 +1,33 @@
+"""add make67_state_version (shared per-user state version for cache coherence)
+
+Revision ID: d5e6f7a8b9c0
+Revises: c3d4e5f6a7b8
+Create Date: 2026-10-19 10:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'd5e6f7a8b9c0'
+down_revision = 'c3d4e5f6a7b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    cols = {c['name'] for c in insp.get_columns('users')}
+    if 'make67_state_version' not in cols:
+        with op.batch_alter_table('users') as batch:
+            batch.add_column(sa.Column(
+                'make67_state_version',
+                sa.Integer(),
+                nullable=False,
+                server_default='0',
+            ))
+
+
+def downgrade():
+    with op.batch_alter_table('users') as batch:
+        batch.drop_column('make67_state_version')
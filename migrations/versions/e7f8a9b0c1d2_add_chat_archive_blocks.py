@@ -0,0 +1,67 @@
+"""add chat_archive_blocks table (idempotent)
+
+Revision ID: e7f8a9b0c1d2
+Revises: d5e6f7a8b9c0
+Create Date: 2026-10-19 12:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'e7f8a9b0c1d2'
+down_revision = 'd5e6f7a8b9c0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create the compressed chat archive table and its paging index if missing."""
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    try:
+        tables = set(inspector.get_table_names())
+    except Exception:
+        tables = set()
+
+    if 'chat_archive_blocks' not in tables:
+        op.create_table(
+            'chat_archive_blocks',
+            sa.Column('id', sa.Integer(), primary_key=True, nullable=False),
+            sa.Column('room', sa.String(length=16), nullable=False),
+            sa.Column('first_id', sa.Integer(), nullable=False),
+            sa.Column('last_id', sa.Integer(), nullable=False),
+            sa.Column('first_at', sa.DateTime(timezone=True), nullable=False),
+            sa.Column('last_at', sa.DateTime(timezone=True), nullable=False),
+            sa.Column('count', sa.Integer(), nullable=False),
+            sa.Column('data', sa.LargeBinary(), nullable=False),
+            sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        )
+
+    try:
+        existing_indexes = {ix['name'] for ix in (inspector.get_indexes('chat_archive_blocks') or [])}
+    except Exception:
+        existing_indexes = set()
+    if 'ix_chat_archive_blocks_room_last_id' not in existing_indexes:
+        op.create_index(
+            'ix_chat_archive_blocks_room_last_id',
+            'chat_archive_blocks',
+            ['room', 'last_id'],
+            unique=False,
+        )
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    try:
+        tables = set(inspector.get_table_names())
+    except Exception:
+        tables = set()
+    if 'chat_archive_blocks' in tables:
+        try:
+            existing_indexes = {ix['name'] for ix in (inspector.get_indexes('chat_archive_blocks') or [])}
+        except Exception:
+            existing_indexes = set()
+        if 'ix_chat_archive_blocks_room_last_id' in existing_indexes:
+            op.drop_index('ix_chat_archive_blocks_room_last_id', table_name='chat_archive_blocks')
+        op.drop_table('chat_archive_blocks')
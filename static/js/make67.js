@@ -227,6 +227,12 @@
 
   let baseCards = [];
   let curCards = [];
+  // Expression built so far for each card, sent with the solve for server verification
+  let curExprs = [];
+  let puzzleToken = null;
+  // Token mode reported with each dealt hand; until the server answers, assume tokens are required
+  let puzzleTokenMode = 'required';
+  let puzzleRequest = 0;
   let removed = new Set();
   let selectedIndex = null;
   let selectedOp = null;
@@ -1147,6 +1153,8 @@
   let eventsLastSeq = 0;
   let eventsPollTimer = 0;
   let eventsPollDelay = 10000; // base delay ms
+  const EVENTS_LONGPOLL_SEC = 25;
+  let eventsLongpollMax = 0;   // learned from the server; 0 = short-poll only
 
   function ensureFx(){
     if (FX || !window.PIXI) return;
@@ -1582,17 +1590,24 @@
       return;
     }
     // Back off when tab is hidden
-    const delay = document.hidden ? Math.max(15000, eventsPollDelay) : eventsPollDelay;
+    const hidden = document.hidden;
+    let delay = hidden ? Math.max(15000, eventsPollDelay) : eventsPollDelay;
+    // Visible tabs long-poll when the server allows it: it holds the request open until an event arrives
+    const wait = (hidden || !(eventsLongpollMax > 0)) ? '' : `&wait=${Math.min(EVENTS_LONGPOLL_SEC, eventsLongpollMax)}`;
     try {
-      const res = await fetch(`/api/make67/events/poll?since=${encodeURIComponent(String(eventsLastSeq||0))}`);
+      const res = await fetch(`/api/make67/events/poll?since=${encodeURIComponent(String(eventsLastSeq||0))}${wait}`);
       const data = await res.json().catch(()=>({ok:false}));
       if (data && data.ok){
+        // The server reports whether it allows long-polls (off under sync workers)
+        eventsLongpollMax = Number(data.longpoll_max) || 0;
         const evs = Array.isArray(data.events) ? data.events : [];
         for (const e of evs){ handleIncomingEvent(e); }
         const ls = Number(data.last_seq || eventsLastSeq || 0);
-        if (!Number.isNaN(ls)) eventsLastSeq = Math.max(eventsLastSeq||0, ls);
+        if (!Number.isNaN(ls)) eventsLastSeq = data.reset ? Number(data.last_seq || 0) : Math.max(eventsLastSeq||0, ls);
         // reset delay on success
         eventsPollDelay = 10000 + Math.floor(Math.random()*3000);
+        // Server honoured the wait, so re-poll right away; otherwise keep the short-poll cadence
+        if (!hidden && Number(data.wait) > 0) delay = 250 + Math.floor(Math.random()*500);
       } else {
         // mild backoff on error
         eventsPollDelay = Math.min(60000, (eventsPollDelay||10000) * 1.5);
@@ -1682,6 +1697,8 @@
   // Track request ordering to drop out-of-order responses
   let stateReqSeq = 0;
   let stateReqApplied = 0;
+  // Last state snapshot applied from /state; sent back as ?since_version= so the server can reply 304 or a delta
+  let stateSnapshot = null;
   
   function fmtTime(sec){
     sec = Math.max(0, Math.floor(Number(sec)||0));
@@ -1741,11 +1758,18 @@
     if (Date.now() < stateBlockUntil) return;
     const reqId = ++stateReqSeq;
     try {
-      const r = await fetch('/api/make67/state');
+      const since = stateSnapshot ? ('?since_version=' + encodeURIComponent(stateSnapshot.state_version)) : '';
+      const r = await fetch('/api/make67/state' + since);
+      if (r.status === 304) return;
       const d = await r.json().catch(()=>({ok:false}));
       if (!d.ok) return;
       if (d.mr_a_rain) { try { showMrARain(d.mr_a_rain); } catch(_){} }
-      const st = d.state || {};
+      let st = d.state || {};
+      if (d.delta) {
+        // Delta against a snapshot we no longer hold: drop it and fetch a full state next time
+        if (!stateSnapshot || Number(d.delta.base_version) !== Number(stateSnapshot.state_version)) { stateSnapshot = null; return; }
+        st = applyStateDelta(stateSnapshot, d.delta);
+      }
       const sv = Number(st.state_version || 0);
       // Drop out-of-order responses
       if (reqId < stateReqApplied) return;
@@ -1753,6 +1777,7 @@
       if (sv && lastStateVersion && sv < lastStateVersion) return;
       stateReqApplied = reqId;
       if (sv) lastStateVersion = Math.max(lastStateVersion, sv);
+      stateSnapshot = st;
       // NOTE: allTime is NOT set here — loadState uses cached data that can
       // race with authoritative sources (notifySolve, loadLeaderboard, buy/use).
       // allTime is only updated from direct action responses and leaderboard.
@@ -1765,6 +1790,24 @@
     } catch(_){ }
   }
 
+  // Rebuild a full state from the last snapshot plus a server delta. Effects not in
+  // the delta keep their client-side countdowns.
+  function applyStateDelta(base, delta){
+    const st = Object.assign({}, base, { state_version: delta.state_version });
+    if ('currency' in delta) st.currency = delta.currency;
+    let inv = Array.isArray(base.inventory) ? base.inventory.slice() : [];
+    if (Array.isArray(delta.inventory_remove) || Array.isArray(delta.inventory_add)) {
+      const drop = new Set(delta.inventory_remove || []);
+      (delta.inventory_add || []).forEach(it => drop.add(it.id));
+      inv = inv.filter(it => !drop.has(it.id)).concat(delta.inventory_add || []);
+    }
+    st.inventory = inv;
+    st.effects_until = Object.assign({}, base.effects_until, delta.effects_until || {});
+    st.effects = Object.assign({}, effects, delta.effects || {});
+    if (Array.isArray(delta.trophies)) st.trophies = delta.trophies;
+    return st;
+  }
+
   // --- Tiny tooltip helper ---
   let tipEl = null; let tipTimer = null;
   function ensureTip(){
@@ -2214,21 +2257,61 @@
     playSolveSound();
   }
 
+  function cardExpr(v){ return v < 0 ? `(${v})` : String(v); }
+
   function resetToBase(){
     curCards = baseCards.slice();
+    curExprs = baseCards.map(cardExpr);
     removed = new Set();
     cardsEl.forEach((el,i)=>{
       setCard(i, curCards[i]);
       setRemoved(i, false);
     });
     clearSelections();
-    hintEl.textContent = currentHint ? `Hint available` : '';
+    hintEl.textContent = (currentHint || puzzleToken) ? `Hint available` : '';
+  }
+
+  // Fetch a dealt hand, retrying briefly on rate limits, server errors and network
+  // failures. Returns null when the server cannot deal one right now.
+  async function fetchPuzzle(){
+    for (let attempt = 0; attempt < 3; attempt++){
+      let delay = 1000 * (attempt + 1);
+      try {
+        const res = await fetch('/api/make67/puzzle', { cache: 'no-store' });
+        const data = await res.json().catch(()=>null);
+        if (data && data.ok && Array.isArray(data.cards)){
+          if (data.token_mode) puzzleTokenMode = data.token_mode;
+          return data;
+        }
+        if (res.status !== 429 && res.status < 500) return null;
+        if (data && data.retry_after) delay = Math.max(delay, data.retry_after * 1000);
+      } catch (_) { /* retry below */ }
+      await new Promise(r=>setTimeout(r, Math.min(delay, 10000)));
+    }
+    return null;
   }
 
-  function newPuzzle(){
-    const puzzle = generatePuzzle();
-    baseCards = puzzle.cards.slice();
-    currentHint = puzzle.expr;
+  async function newPuzzle(){
+    // Server-dealt hand with a signed token. A locally generated hand could never be
+    // credited while tokens are required, so in that mode keep retrying instead.
+    const req = ++puzzleRequest;
+    let puzzle = await fetchPuzzle();
+    while (!puzzle && puzzleTokenMode === 'required' && req === puzzleRequest){
+      hintEl.textContent = 'Reconnecting to the server...';
+      await new Promise(r=>setTimeout(r, 5000));
+      puzzle = await fetchPuzzle();
+    }
+    if (req !== puzzleRequest) return;  // a newer deal superseded this one
+    if (puzzle){
+      baseCards = puzzle.cards.slice();
+      puzzleToken = puzzle.token;
+      currentHint = '';
+    } else {
+      const local = generatePuzzle();
+      baseCards = local.cards.slice();
+      puzzleToken = null;
+      currentHint = local.expr;
+    }
     hintUsed = false;
     resetToBase();
   }
@@ -2236,10 +2319,12 @@
   async function notifySolve(){
     try {
       if (!isAuthed) return;
+      const aliveIdx = curCards.findIndex((_, i) => !removed.has(i));
+      const solvedExpr = aliveIdx >= 0 ? curExprs[aliveIdx] : '';
       const res = await fetch('/api/make67/solve', {
         method:'POST',
         headers:{'Content-Type':'application/json'},
-        body: JSON.stringify({ hint_used: !!hintUsed })
+        body: JSON.stringify({ hint_used: !!hintUsed, token: puzzleToken, expr: solvedExpr })
       });
       const data = await res.json().catch(()=>({ok:false}));
       if (data && data.ok && typeof data.all_time_total === 'number'){
@@ -2306,6 +2391,7 @@
       return;
     }
     animateMerge(i, j, ()=>{
+      curExprs[j] = `(${curExprs[i]} ${op} ${curExprs[j]})`;
       setCard(j, r);
       setRemoved(i, true);
       removed.add(i);
@@ -2375,7 +2461,20 @@
 
   // Reveal hint on long-press/tap on note area, and via explicit Hint button
   let hintTimer = null;
-  function showHint(){
+  async function showHint(){
+    if (!currentHint && puzzleToken){
+      // The server marks this hand as hinted, so solving it afterwards earns no credit
+      hintUsed = true;
+      try {
+        const res = await fetch('/api/make67/puzzle/hint', {
+          method:'POST',
+          headers:{'Content-Type':'application/json'},
+          body: JSON.stringify({ token: puzzleToken })
+        });
+        const data = await res.json().catch(()=>null);
+        if (data && data.ok && data.hint) currentHint = data.hint;
+      } catch (_) { /* ignore */ }
+    }
     if (currentHint){
       hintUsed = true;
       hintEl.textContent = `One way: ${currentHint} = 67`;
@@ -2699,6 +2798,8 @@
     tourneyDismissed = false;
     tourneyShowBanner('🏆 Tournament is LIVE!', false);
     tourneyStartPolling();
+    // Joined players switch to the shared tournament schedule
+    if(tourneyState && tourneyState.joined) newPuzzle();
   }
   function tourneyHandleEnd(msg){
     tourneyHideBanner();
@@ -2734,6 +2835,7 @@
           tourneyJoinBtn.style.display = 'none';
           showToast('🏆 Joined the tournament!');
           tourneyPoll();
+          if(d.active) newPuzzle();
         } else if(d.error === 'TOO_LATE'){
           showToast('⏰ Too late to join! Catch the next one.');
         } else if(d.error === 'CHEATER_BLOCKED'){
@@ -3074,14 +3176,25 @@
   const minPollDelay = 2000;
   const maxPollDelay = 30000;
 
+  // Seconds the server may hold a chat poll open waiting for a new message
+  const CHAT_LONGPOLL_SEC = 25;
+  // Cap reported by the server (X-Chat-Longpoll-Max); 0 means short-poll only
+  let chatLongpollMax = 0;
+
   async function pollLoop(){
     while (polling){
+      let longPolled = false;
       try {
-        const res = await fetch(`/api/make67/chat/since?last_id=${lastId}`);
+        const wait = (lastId > 0 && chatLongpollMax > 0) ? `&wait=${Math.min(CHAT_LONGPOLL_SEC, chatLongpollMax)}` : '';
+        const res = await fetch(`/api/make67/chat/since?last_id=${lastId}${wait}`);
         if (res.ok){
+          longPolled = Number(res.headers.get('X-Chat-Wait') || 0) > 0;
+          chatLongpollMax = Number(res.headers.get('X-Chat-Longpoll-Max') || 0);
           const items = await res.json();
           if (Array.isArray(items)){
             for (const m of items){
+              // Skip messages already shown (e.g. our own, appended optimistically)
+              if (typeof m.id === 'number' && m.id <= lastId) continue;
               appendMessage(m);
               if (typeof m.id === 'number' && m.id > lastId) lastId = m.id;
             }
@@ -3098,8 +3211,8 @@
         // Backoff on network/fetch errors
         pollDelay = Math.min(maxPollDelay, pollDelay * 1.5);
       }
-      // Use longer delay when tab is hidden
-      const effectiveDelay = document.hidden ? Math.max(10000, pollDelay) : pollDelay;
+      // Use longer delay when tab is hidden; after a held long-poll re-poll right away
+      const effectiveDelay = document.hidden ? Math.max(10000, pollDelay) : (longPolled ? 100 : pollDelay);
       await new Promise(r=>setTimeout(r, effectiveDelay));
     }
   }
@@ -187,6 +187,12 @@
 
   let baseCards = [];
   let curCards = [];
+  // Expression built so far for each card, sent with the solve for server verification
+  let curExprs = [];
+  let puzzleToken = null;
+  // Token mode reported with each dealt hand; until the server answers, assume tokens are required
+  let puzzleTokenMode = 'required';
+  let puzzleRequest = 0;
   let removed = new Set();
   let selectedIndex = null;
   let selectedOp = null;
@@ -203,6 +209,8 @@
   let stateBlockUntil = 0;
   let stateReqSeq = 0;
   let stateReqApplied = 0;
+  // Last state snapshot applied from /state; sent back as ?since_version= so the server can reply 304 or a delta
+  let stateSnapshot = null;
 
   function clamp01(x){ return Math.max(0, Math.min(1, x)); }
   let currentEmp = 0;
@@ -388,8 +396,11 @@
     el.dataset.value = String(value);
   }
 
+  function cardExpr(v){ return v < 0 ? `(${v})` : String(v); }
+
   function resetToBase(){
     curCards = baseCards.slice();
+    curExprs = baseCards.map(cardExpr);
     removed = new Set();
     selectedIndex = null;
     selectedOp = null;
@@ -403,10 +414,48 @@
     hintUsed = false;
   }
 
-  function newPuzzle(){
-    const p = generatePuzzle();
+  // Fetch a dealt hand, retrying briefly on rate limits, server errors and network
+  // failures. Returns null when the server cannot deal one right now.
+  async function fetchPuzzle(){
+    for (let attempt = 0; attempt < 3; attempt++){
+      let delay = 1000 * (attempt + 1);
+      try {
+        const res = await fetch('/api/make6or7/puzzle', { cache: 'no-store' });
+        const data = await res.json().catch(()=>null);
+        if (data && data.ok && Array.isArray(data.cards)){
+          if (data.token_mode) puzzleTokenMode = data.token_mode;
+          return data;
+        }
+        if (res.status !== 429 && res.status < 500) return null;
+        if (data && data.retry_after) delay = Math.max(delay, data.retry_after * 1000);
+      } catch (_) { /* retry below */ }
+      await new Promise(r=>setTimeout(r, Math.min(delay, 10000)));
+    }
+    return null;
+  }
+
+  async function newPuzzle(){
+    // Server-dealt hand with a signed token. A locally generated hand could never be
+    // credited while tokens are required, so in that mode keep retrying instead.
+    const req = ++puzzleRequest;
+    let p = await fetchPuzzle();
+    while (!p && puzzleTokenMode === 'required' && req === puzzleRequest){
+      hintEl.textContent = 'Reconnecting to the server...';
+      await new Promise(r=>setTimeout(r, 5000));
+      p = await fetchPuzzle();
+    }
+    if (req !== puzzleRequest) return;  // a newer deal superseded this one
+    if (p){
+      TARGET = p.target;
+      puzzleToken = p.token;
+      p.expr = '';
+    } else {
+      p = generatePuzzle();
+      puzzleToken = null;
+    }
     baseCards = p.cards;
     curCards = baseCards.slice();
+    curExprs = baseCards.map(cardExpr);
     removed = new Set();
     selectedIndex = null;
     selectedOp = null;
@@ -560,6 +609,7 @@
     }
     animateMerge(i, j, ()=>{
       curCards[j] = v;
+      curExprs[j] = `(${curExprs[i]} ${op} ${curExprs[j]})`;
       setCard(j, v);
       setRemoved(i, true);
       removed.add(i);
@@ -1043,17 +1093,25 @@
     if (Date.now() < stateBlockUntil) return;
     const reqId = ++stateReqSeq;
     try {
-      const r = await fetch('/api/make6or7/state');
+      const since = stateSnapshot ? ('?since_version=' + encodeURIComponent(stateSnapshot.state_version)) : '';
+      const r = await fetch('/api/make6or7/state' + since);
+      if (r.status === 304) return;
       const d = await r.json().catch(()=>({ok:false}));
       if (!d.ok) return;
       if (d.mr_a_rain) { try { showMrARain(d.mr_a_rain); } catch(_){} }
-      const st = d.state || {};
+      let st = d.state || {};
+      if (d.delta) {
+        // Delta against a snapshot we no longer hold: drop it and fetch a full state next time
+        if (!stateSnapshot || Number(d.delta.base_version) !== Number(stateSnapshot.state_version)) { stateSnapshot = null; return; }
+        st = applyStateDelta(stateSnapshot, d.delta);
+      }
       const sv = Number(st.state_version || 0);
       // Drop out-of-order responses
       if (reqId < stateReqApplied) return;
       if (sv && lastStateVersion && sv < lastStateVersion) return;
       stateReqApplied = reqId;
       if (sv) lastStateVersion = Math.max(lastStateVersion, sv);
+      stateSnapshot = st;
       // NOTE: allTime is NOT set here — loadState uses cached data that can
       // race with authoritative sources (notifySolve, loadLeaderboard, buy/use).
       // allTime is only updated from direct action responses and leaderboard.
@@ -1066,6 +1124,24 @@
     } catch(_){ }
   }
 
+  // Rebuild a full state from the last snapshot plus a server delta. Effects not in
+  // the delta keep their client-side countdowns.
+  function applyStateDelta(base, delta){
+    const st = Object.assign({}, base, { state_version: delta.state_version });
+    if ('currency' in delta) st.currency = delta.currency;
+    let inv = Array.isArray(base.inventory) ? base.inventory.slice() : [];
+    if (Array.isArray(delta.inventory_remove) || Array.isArray(delta.inventory_add)) {
+      const drop = new Set(delta.inventory_remove || []);
+      (delta.inventory_add || []).forEach(it => drop.add(it.id));
+      inv = inv.filter(it => !drop.has(it.id)).concat(delta.inventory_add || []);
+    }
+    st.inventory = inv;
+    st.effects_until = Object.assign({}, base.effects_until, delta.effects_until || {});
+    st.effects = Object.assign({}, effects, delta.effects || {});
+    if (Array.isArray(delta.trophies)) st.trophies = delta.trophies;
+    return st;
+  }
+
   async function buyItem(key){
     if (inventory.length >= 4){
       updateShopCapacityUI();
@@ -1745,8 +1821,11 @@
 
   async function submitSolve(){
     try{
+      const aliveIdx = [0,1,2,3].find(ix=>!removed.has(ix));
+      const expr = aliveIdx != null ? curExprs[aliveIdx] : '';
       const res = await fetch('/api/make6or7/solve', {
-        method: 'POST', headers: {'Content-Type':'application/json'}, body: JSON.stringify({hint_used: !!hintUsed})
+        method: 'POST', headers: {'Content-Type':'application/json'},
+        body: JSON.stringify({hint_used: !!hintUsed, token: puzzleToken, expr})
       });
       if (res.ok){
         const data = await res.json();
@@ -1826,7 +1905,18 @@
     }
   });
 
-  function showHint(){
+  async function showHint(){
+    if (!currentHint && puzzleToken){
+      // The server marks this hand as hinted, so solving it afterwards earns no credit
+      hintUsed = true;
+      try{
+        const res = await fetch('/api/make6or7/puzzle/hint', {
+          method: 'POST', headers: {'Content-Type':'application/json'}, body: JSON.stringify({token: puzzleToken})
+        });
+        const data = await res.json().catch(()=>null);
+        if (data && data.ok && data.hint) currentHint = data.hint;
+      } catch(_){ }
+    }
     if (currentHint){
       hintUsed = true;
       hintEl.textContent = `One way: ${currentHint} = ${TARGET}`;
@@ -2107,6 +2197,8 @@
     tourneyDismissed = false;
     tourneyShowBanner('\uD83C\uDFC6 Tournament is LIVE!', false);
     tourneyStartPolling();
+    // Joined players switch to the shared tournament schedule
+    if(tourneyState && tourneyState.joined) newPuzzle();
   }
   function tourneyHandleEnd(msg){
     tourneyHideBanner();
@@ -2135,6 +2227,7 @@
           tourneyJoinBtn.style.display = 'none';
           showToast('🏆 Joined the tournament!');
           tourneyPoll();
+          if(d.active) newPuzzle();
         } else if(d.error === 'TOO_LATE'){
           showToast('⏰ Too late to join! Catch the next one.');
         } else if(d.error === 'CHEATER_BLOCKED'){
@@ -2406,6 +2499,8 @@
   // --- Events polling (for real-time effects from other players) ---
   let eventsPollTimer = 0;
   let eventsPollDelay = 10000;
+  const EVENTS_LONGPOLL_SEC = 25;
+  let eventsLongpollMax = 0;   // learned from the server; 0 = short-poll only
   let eventsLastSeq = 0;
 
   function handleIncomingEvent(msg){
@@ -2454,16 +2549,23 @@
 
   async function eventsPollLoop(){
     if (!isAuthed){ clearTimeout(eventsPollTimer); eventsPollTimer = 0; return; }
-    const delay = document.hidden ? Math.max(15000, eventsPollDelay) : eventsPollDelay;
+    const hidden = document.hidden;
+    let delay = hidden ? Math.max(15000, eventsPollDelay) : eventsPollDelay;
+    // Visible tabs long-poll when the server allows it: it holds the request open until an event arrives
+    const wait = (hidden || !(eventsLongpollMax > 0)) ? '' : `&wait=${Math.min(EVENTS_LONGPOLL_SEC, eventsLongpollMax)}`;
     try {
-      const res = await fetch(`/api/make67/events/poll?since=${encodeURIComponent(String(eventsLastSeq||0))}`);
+      const res = await fetch(`/api/make67/events/poll?since=${encodeURIComponent(String(eventsLastSeq||0))}${wait}`);
       const data = await res.json().catch(()=>({ok:false}));
       if (data && data.ok){
+        // The server reports whether it allows long-polls (off under sync workers)
+        eventsLongpollMax = Number(data.longpoll_max) || 0;
         const evs = Array.isArray(data.events) ? data.events : [];
         for (const e of evs) handleIncomingEvent(e);
         const ls = Number(data.last_seq || eventsLastSeq || 0);
-        if (!Number.isNaN(ls)) eventsLastSeq = Math.max(eventsLastSeq||0, ls);
+        if (!Number.isNaN(ls)) eventsLastSeq = data.reset ? Number(data.last_seq || 0) : Math.max(eventsLastSeq||0, ls);
         eventsPollDelay = 10000 + Math.floor(Math.random()*3000);
+        // Server honoured the wait, so re-poll right away; otherwise keep the short-poll cadence
+        if (!hidden && Number(data.wait) > 0) delay = 250 + Math.floor(Math.random()*500);
       } else {
         eventsPollDelay = Math.min(60000, (eventsPollDelay||10000) * 1.5);
       }
@@ -2518,15 +2620,28 @@
   let chatDelay = 2000;
   const CHAT_DELAY_MIN = 2000;
   const CHAT_DELAY_MAX = 30000;
+  const CHAT_LONGPOLL_SEC = 25;
+  // Cap reported by the server (X-Chat-Longpoll-Max); 0 means short-poll only
+  let chatLongpollMax = 0;
+  // Ids of our own messages, appended on send; the poll skips them instead of showing twice
+  const sentIds = new Set();
   async function pollLoop(){
     while (polling){
+      let longPolled = false;
       try {
-        const res = await fetch(`/api/make6or7/chat/since?last_id=${lastId}`);
+        const wait = (lastId > 0 && chatLongpollMax > 0) ? `&wait=${Math.min(CHAT_LONGPOLL_SEC, chatLongpollMax)}` : '';
+        const res = await fetch(`/api/make6or7/chat/since?last_id=${lastId}${wait}`);
         if (res.ok){
           chatDelay = CHAT_DELAY_MIN; // reset on success
+          longPolled = Number(res.headers.get('X-Chat-Wait') || 0) > 0;
+          chatLongpollMax = Number(res.headers.get('X-Chat-Longpoll-Max') || 0);
           const items = await res.json();
           if (Array.isArray(items)){
             for (const m of items){
+              if (typeof m.id === 'number' && (m.id <= lastId || sentIds.has(m.id))){
+                if (m.id > lastId) lastId = m.id;
+                continue; // already shown
+              }
               appendMessage(m);
               if (typeof m.id === 'number' && m.id > lastId) lastId = m.id;
             }
@@ -2537,8 +2652,8 @@
       } catch (_){
         chatDelay = Math.min(chatDelay * 1.5, CHAT_DELAY_MAX);
       }
-      // Longer interval when tab hidden
-      const delay = document.hidden ? Math.max(chatDelay, 10000) : chatDelay;
+      // Longer interval when tab hidden; re-poll right away after a held long-poll
+      const delay = document.hidden ? Math.max(chatDelay, 10000) : (longPolled ? 100 : chatDelay);
       await new Promise(r=>setTimeout(r, delay));
     }
   }
@@ -2563,7 +2678,10 @@
       const res = await fetch('/api/make6or7/chat/send', {method:'POST', headers:{'Content-Type':'application/json'}, body: JSON.stringify({text})});
       if (res.ok){
         const m = await res.json();
-        if (m) appendMessage(m);
+        if (m){
+          appendMessage(m);
+          if (typeof m.id === 'number') sentIds.add(m.id);
+        }
       }
     } catch(_){ }
   });
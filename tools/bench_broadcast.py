@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Broadcast fan-out benchmark
+
+Measures the cost of one _m67_broadcast() call as the number of SSE subscribers grows,
+and compares it with the old approach where every subscriber's generator ran json.dumps
+on the same message.
+
+The app is imported against a throwaway SQLite database so no real data is touched.
+Run from the repo root (app dependencies must be installed):
+
+  python tools/bench_broadcast.py
+  python tools/bench_broadcast.py --subs 10,100,1000,5000 --rounds 200
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from queue import Empty
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _load_app():
+    db_path = os.path.join(tempfile.mkdtemp(prefix='m67_bench_'), 'bench.db')
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    os.environ.setdefault('M67_CACHE_BACKEND', 'local')
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    import app as mm  # noqa: E402  (import after env is configured)
+    return mm
+
+
+def _sample_msg() -> dict:
+    return {
+        'type': 'message',
+        't': int(time.time() * 1000),
+        'user': 'Benchmark B.',
+        'text': 'sixty-seven ' * 8,
+    }
+
+
+def _drain(q):
+    """Pop everything queued, as a stream generator would."""
+    items = []
+    while True:
+        try:
+            items.append(q.get(0))
+        except Empty:
+            return items
+
+
+def bench(mm, n_subs: int, rounds: int) -> tuple[float, float]:
+    """Return (serialize-once us/broadcast, per-subscriber-dumps us/broadcast)."""
+    subs = [mm._Subscriber('chat', f'bench-{i}') for i in range(n_subs)]
+    for sub in subs:
+        sub.q.maxsize = rounds + 1  # never drop during the run
+        mm._m67_subscribe(sub)
+    msg = _sample_msg()
+    try:
+        t0 = time.perf_counter()
+        for _ in range(rounds):
+            mm._m67_broadcast(msg)
+        # Drain as a generator would: bytes are yielded as-is
+        for sub in subs:
+            _drain(sub.q)
+        once = (time.perf_counter() - t0) / rounds
+
+        # Previous behaviour: enqueue the dict, every generator serializes it
+        t0 = time.perf_counter()
+        for _ in range(rounds):
+            for sub in subs:
+                sub.q.put_nowait(msg)
+        for sub in subs:
+            for m in _drain(sub.q):
+                f"data: {json.dumps(m, ensure_ascii=False)}\n\n".encode('utf-8')
+        per_sub = (time.perf_counter() - t0) / rounds
+    finally:
+        with mm._m67_subscribers_lock:
+            for sub in subs:
+                mm._m67_unsubscribe_locked(sub)
+    return once * 1e6, per_sub * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark broadcast cost vs subscriber count.')
+    parser.add_argument('--subs', default='1,10,100,500,1000,5000', help='Comma-separated subscriber counts')
+    parser.add_argument('--rounds', type=int, default=100, help='Broadcasts per subscriber count')
+    args = parser.parse_args()
+
+    mm = _load_app()
+    counts = [int(x) for x in args.subs.split(',') if x.strip()]
+    print(f"{'subscribers':>12} {'serialize-once us':>18} {'per-sub dumps us':>17} {'speedup':>8}")
+    for n in counts:
+        once, per_sub = bench(mm, n, args.rounds)
+        print(f"{n:>12} {once:>18.1f} {per_sub:>17.1f} {per_sub / once if once else 0:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
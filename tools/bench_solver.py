@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Solver benchmark
+
+Compares the float DFS in tools/make67_solver.py (try_solve) with the memoized exact
+solver in make67_puzzles (Solver.solve) on two hand sets:
+  dealt   - hands from the server generator (always solvable, wide card range)
+  classic - random hands of small cards (mostly unsolvable, the DFS worst case)
+
+It also counts disagreements, e.g. float tolerance accepting a near miss.
+
+  python tools/bench_solver.py
+  python tools/bench_solver.py --hands 500 --game make6or7 --seed 7
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+TOOLS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(TOOLS))
+sys.path.insert(0, TOOLS)
+import make67_puzzles  # noqa: E402
+from make67_solver import try_solve  # noqa: E402
+
+
+def _hand_sets(game: str, n: int, rng: random.Random) -> dict[str, list[list[int]]]:
+    spec = make67_puzzles.GAMES[game]
+    hi = min(spec.card_max, 13)
+    return {
+        'dealt': [make67_puzzles.generate(game, rng)[0] for _ in range(n)],
+        'classic': [[rng.randint(max(spec.card_min, 1), hi) for _ in range(4)] for _ in range(n)],
+    }
+
+
+def _time(fn, hands) -> tuple[float, list]:
+    t0 = time.perf_counter()
+    out = [fn(h) for h in hands]
+    return (time.perf_counter() - t0) / len(hands) * 1e6, out
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the memoized exact solver against the float DFS.')
+    parser.add_argument('--game', choices=sorted(make67_puzzles.GAMES), default='make67')
+    parser.add_argument('--hands', type=int, default=300, help='Hands per set')
+    parser.add_argument('--seed', type=int, default=67)
+    args = parser.parse_args()
+
+    spec = make67_puzzles.GAMES[args.game]
+    targets = [float(t) for t in spec.targets]
+    ops = list(spec.ops)
+    rng = random.Random(args.seed)
+    print(f"{'set':>8} {'dfs us/hand':>12} {'memo cold us':>13} {'memo warm us':>13} {'speedup':>8} {'disagree':>9}")
+    for name, hands in _hand_sets(args.game, args.hands, rng).items():
+        dfs_us, dfs_out = _time(lambda h: try_solve(h, targets=targets, allowed_ops=ops), hands)
+        solver = make67_puzzles.Solver(spec.ops)
+        cold_us, memo_out = _time(lambda h: solver.solve(h, spec.targets), hands)
+        warm_us, _ = _time(lambda h: solver.solve(h, spec.targets), hands)
+        disagree = sum((a is None) != (b is None) for a, b in zip(dfs_out, memo_out))
+        print(f"{name:>8} {dfs_us:>12.1f} {cold_us:>13.1f} {warm_us:>13.1f} {dfs_us / cold_us:>7.1f}x {disagree:>9}")
+
+
+if __name__ == '__main__':
+    main()
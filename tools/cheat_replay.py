@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Cheater-rule replay
+
+Replays logged solve timelines through the server's cheater-detection rules
+(_cheat_evaluate in app.py) so thresholds can be tuned offline before they are
+deployed. Enable the log on the server with M67_SOLVE_LOG=/path/solves.ndjson;
+a CSV with uid,ts columns works too.
+
+Each --burst / --variance value is one candidate setting, written like the
+M67_CHEAT_BURST / M67_CHEAT_VARIANCE env vars. Every combination is replayed and
+reported side by side. Run from the repo root (app dependencies must be installed):
+
+  python tools/cheat_replay.py solves.ndjson
+  python tools/cheat_replay.py solves.ndjson --burst 15,60,flag --burst 12,60,flag \\
+      --variance 12,0.1,20,log --variance 8,0.15,20,log --show-users 5
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import tempfile
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _load_app():
+    db_path = os.path.join(tempfile.mkdtemp(prefix='m67_replay_'), 'replay.db')
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    os.environ.setdefault('M67_CACHE_BACKEND', 'local')
+    os.environ.pop('M67_SOLVE_LOG', None)
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    import app as mm  # noqa: E402  (import after env is configured)
+    return mm
+
+
+def load_timelines(path: str, game: str | None = None) -> dict[str, list[float]]:
+    """Read NDJSON or CSV solve records into uid -> sorted solve times."""
+    timelines: dict[str, list[float]] = defaultdict(list)
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.endswith('.csv'):
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        for row in rows:
+            if game and row.get('game', game) != game:
+                continue
+            timelines[str(row['uid'])].append(float(row['ts']))
+    for times in timelines.values():
+        times.sort()
+    return timelines
+
+
+def replay(mm, timelines: dict[str, list[float]], rules: dict[str, dict]) -> dict[str, set]:
+    """Feed each timeline through a fixed-size ring, as the server does. Returns rule -> uids hit."""
+    size = mm._cheat_timeline_len(rules)
+    hit_users: dict[str, set] = defaultdict(set)
+    for uid, times in timelines.items():
+        for i in range(len(times)):
+            window = times[max(0, i + 1 - size):i + 1]
+            for rule, _action, _detail in mm._cheat_evaluate(window, rules):
+                hit_users[rule].add(uid)
+    return hit_users
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay solve timelines against cheater-detection thresholds.')
+    parser.add_argument('log', help='NDJSON solve log (M67_SOLVE_LOG) or CSV with uid,ts columns')
+    parser.add_argument('--burst', action='append', help='max,window,action (repeatable)')
+    parser.add_argument('--variance', action='append', help='samples,max_cv,max_mean_sec,action (repeatable)')
+    parser.add_argument('--game', help='Only replay solves for this game (make67 / make6or7)')
+    parser.add_argument('--show-users', type=int, default=0, help='List up to N user ids hit per rule')
+    args = parser.parse_args()
+
+    mm = _load_app()
+    timelines = load_timelines(args.log, args.game)
+    solves = sum(len(t) for t in timelines.values())
+    print(f"{len(timelines)} users, {solves} solves")
+
+    bursts = [mm._parse_cheat_rule('burst', b) for b in args.burst] if args.burst else [mm._CHEAT_RULES['burst']]
+    variances = [mm._parse_cheat_rule('variance', v) for v in args.variance] if args.variance else [mm._CHEAT_RULES['variance']]
+    print(f"{'burst':>18} {'variance':>24} {'burst users':>12} {'variance users':>15} {'flagged':>8}")
+    for burst, var in itertools.product(bursts, variances):
+        rules = {'burst': burst, 'variance': var}
+        hit_users = replay(mm, timelines, rules)
+        flagged = set().union(*(hit_users[r] for r, rule in rules.items() if rule['action'] == 'flag'))
+        b_label = f"{burst['max']}/{burst['window']:g}s {burst['action']}"
+        v_label = f"{var['samples']} cv<={var['max_cv']:g} {var['max_mean_sec']:g}s {var['action']}"
+        print(f"{b_label:>18} {v_label:>24} {len(hit_users['burst']):>12} {len(hit_users['variance']):>15} {len(flagged):>8}")
+        if args.show_users:
+            for rule, uids in sorted(hit_users.items()):
+                if uids:
+                    print(f"    {rule}: {', '.join(sorted(uids)[:args.show_users])}")
+
+
+if __name__ == '__main__':
+    main()
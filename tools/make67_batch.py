@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Headless batch solver for building and auditing puzzle banks.
+
+Solves every 4-card hand in a card range (or the hands listed in a file) against a set
+of targets, spreading chunks of hands over a ProcessPoolExecutor. Each worker keeps
+its own make67_puzzles.Solver, so memoized sub-results are reused across its chunks.
+Results stream to CSV or NDJSON (picked from --out's extension) as chunks complete.
+Row order is completion order, not rank order.
+
+Checkpoints: after each chunk is written, the finished chunk ids and the output's byte
+length are saved to <out>.ckpt. --resume truncates the output back to that length and
+skips finished chunks, so an interrupted run continues without duplicate rows. Without
+a checkpoint, --resume starts from scratch like a fresh run (the output is truncated).
+
+  python tools/make67_batch.py --game make6or7 --out make6or7.ndjson
+  python tools/make67_batch.py --game make67 --min 1 --max 25 --targets 67 --solvable-only --out bank.csv
+  python tools/make67_batch.py --game make67 --min 1 --max 40 --targets 1-100 --workers 8 --out all.ndjson --resume
+  python tools/make67_batch.py --game make67 --hands-file pool.ndjson --out audit.csv   # audit an existing bank
+"""
+import argparse
+import csv
+import io
+import json
+import math
+import os
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import make67_puzzles  # noqa: E402
+
+FIELDS = ['cards', 'target', 'solvable', 'negated_only', 'ways', 'difficulty', 'solution']
+
+_worker_solver = None
+
+
+def _parse_targets(spec: str) -> list[int]:
+    """'67', '6,7' or '1-100' (ranges and lists may be mixed; '-12--3' for negatives)."""
+    out = []
+    for part in spec.split(','):
+        part = part.strip()
+        m = re.fullmatch(r'(-?\d+)-(-?\d+)', part)
+        if m:
+            out.extend(range(int(m.group(1)), int(m.group(2)) + 1))
+        elif part:
+            out.append(int(part))
+    return out
+
+
+def _read_hands(path: str) -> list[list[int]]:
+    """Hands from NDJSON ({"cards": [...]}) or CSV (a 'cards' column, values space-separated).
+    Raises ValueError naming the line of any hand that is not exactly 4 cards.
+    """
+    hands = []
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.endswith('.csv'):
+            rows = ((n, row['cards'].split()) for n, row in enumerate(csv.DictReader(f), start=2))
+        else:
+            rows = ((n, json.loads(line)['cards']) for n, line in enumerate(f, start=1) if line.strip())
+        for n, cards in rows:
+            if len(cards) != 4:
+                raise ValueError(f"{path}:{n}: expected 4 cards, got {len(cards)}")
+            hands.append([int(v) for v in cards])
+    return hands
+
+
+def _solve_chunk(game: str, targets: list[int], hands, solvable_only: bool):
+    """Worker: solve one chunk. `hands` is a (lo, start, stop) rank range or a list of hands."""
+    global _worker_solver
+    if _worker_solver is None:
+        _worker_solver = make67_puzzles.Solver(make67_puzzles.GAMES[game].ops)
+    solver = _worker_solver
+    if isinstance(hands, tuple):
+        lo, start, stop = hands
+        hands = (make67_puzzles.multiset_unrank(r, lo) for r in range(start, stop))
+    rows = []
+    n = 0
+    for hand in hands:
+        n += 1
+        ms = tuple(sorted(hand))
+        for t in targets:
+            ways = solver.ways(ms, t)
+            neg = solver.ways(ms, -t) if not ways else 0
+            if solvable_only and not ways:
+                continue
+            rows.append({
+                'cards': hand,
+                'target': t,
+                'solvable': bool(ways or neg),
+                'negated_only': bool(neg and not ways),
+                'ways': ways or neg,
+                'difficulty': make67_puzzles.difficulty_score(ways or neg) if (ways or neg) else None,
+                'solution': solver.solve(ms, (t,)) if (ways or neg) else None,
+            })
+    return n, rows
+
+
+def _format_rows(rows: list[dict], fmt: str) -> str:
+    buf = io.StringIO()
+    if fmt == 'csv':
+        w = csv.writer(buf, lineterminator='\n')
+        for r in rows:
+            w.writerow([' '.join(map(str, r['cards'])), r['target'], int(r['solvable']), int(r['negated_only']),
+                        r['ways'], '' if r['difficulty'] is None else r['difficulty'], r['solution'] or ''])
+    else:
+        for r in rows:
+            buf.write(json.dumps(r, separators=(',', ':')) + '\n')
+    return buf.getvalue()
+
+
+def _save_checkpoint(path: str, state: dict):
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Solve hand/target ranges in parallel and stream the results.')
+    parser.add_argument('--game', choices=sorted(make67_puzzles.GAMES), default='make67', help='Operator set and default targets')
+    parser.add_argument('--min', type=int, default=1, help='Lowest card value (default 1)')
+    parser.add_argument('--max', type=int, help='Highest card value (default: 13, or 15 for make6or7)')
+    parser.add_argument('--start', type=int, default=0, help='First hand rank to solve')
+    parser.add_argument('--stop', type=int, help='Stop before this hand rank (default: all hands in range)')
+    parser.add_argument('--hands-file', help='Solve the hands listed in this NDJSON/CSV file instead of a range')
+    parser.add_argument('--targets', help="Targets, e.g. '67', '6,7' or '1-100' (default: the game's targets)")
+    parser.add_argument('--solvable-only', action='store_true', help='Only write hands that reach the exact target')
+    parser.add_argument('--out', required=True, help='Output file (.csv or .ndjson)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+    parser.add_argument('--chunk', type=int, default=500, help='Hands per task')
+    parser.add_argument('--resume', action='store_true', help='Continue from <out>.ckpt')
+    args = parser.parse_args()
+
+    spec = make67_puzzles.GAMES[args.game]
+    targets = _parse_targets(args.targets) if args.targets else list(spec.targets)
+    fmt = 'csv' if args.out.endswith('.csv') else 'ndjson'
+
+    if args.hands_file:
+        try:
+            listed = _read_hands(args.hands_file)
+        except ValueError as e:
+            sys.exit(f"error: {e}")
+        total = len(listed)
+        chunks = [listed[i:i + args.chunk] for i in range(0, total, args.chunk)]
+        source = {'hands_file': os.path.abspath(args.hands_file), 'hands': total}
+    else:
+        hi = args.max if args.max is not None else (15 if args.game == 'make6or7' else 13)
+        count = math.comb(hi - args.min + 4, 4)
+        stop = min(args.stop if args.stop is not None else count, count)
+        total = max(0, stop - args.start)
+        chunks = [(args.min, a, min(a + args.chunk, stop)) for a in range(args.start, stop, args.chunk)]
+        source = {'min': args.min, 'max': hi, 'start': args.start, 'stop': stop}
+    run_key = {'game': args.game, 'targets': targets, 'chunk': args.chunk, 'solvable_only': args.solvable_only,
+               'format': fmt, **source}
+
+    ckpt_path = args.out + '.ckpt'
+    done: set[int] = set()
+    if args.resume and os.path.exists(ckpt_path):
+        with open(ckpt_path, encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get('run') != run_key:
+            sys.exit(f"error: {ckpt_path} was written for different arguments: {state.get('run')}")
+        done = set(state['done'])
+        if not os.path.exists(args.out) or os.path.getsize(args.out) < state['offset']:
+            sys.exit(f"error: {args.out} is shorter than its checkpoint; start again without --resume")
+        with open(args.out, 'r+b') as f:
+            f.truncate(state['offset'])
+        print(f"resuming: {len(done)}/{len(chunks)} chunks already written", file=sys.stderr)
+    else:
+        if args.resume:
+            print(f"no checkpoint at {ckpt_path}; starting from scratch", file=sys.stderr)
+        if os.path.exists(args.out):
+            open(args.out, 'w').close()
+
+    pending = [i for i in range(len(chunks)) if i not in done]
+    out = open(args.out, 'a', newline='', encoding='utf-8')
+    if fmt == 'csv' and out.tell() == 0:
+        out.write(','.join(FIELDS) + '\n')
+        out.flush()
+
+    t0 = last_report = time.perf_counter()
+    solved_hands = rows_written = 0
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            in_flight = {}
+            queue = iter(pending)
+            while True:
+                # Bounded submission keeps memory flat on multi-million-hand runs
+                while len(in_flight) < args.workers * 2:
+                    i = next(queue, None)
+                    if i is None:
+                        break
+                    in_flight[pool.submit(_solve_chunk, args.game, targets, chunks[i], args.solvable_only)] = i
+                if not in_flight:
+                    break
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    i = in_flight.pop(fut)
+                    n, rows = fut.result()
+                    out.write(_format_rows(rows, fmt))
+                    out.flush()
+                    done.add(i)
+                    _save_checkpoint(ckpt_path, {'run': run_key, 'done': sorted(done), 'offset': out.tell()})
+                    solved_hands += n
+                    rows_written += len(rows)
+                now = time.perf_counter()
+                if now - last_report >= 2.0:
+                    last_report = now
+                    rate = solved_hands / (now - t0)
+                    print(f"  {len(done)}/{len(chunks)} chunks, {rate:.0f} hands/s, "
+                          f"{rate * len(targets):.0f} puzzles/s", file=sys.stderr)
+    finally:
+        out.close()
+
+    elapsed = time.perf_counter() - t0
+    rate = solved_hands / elapsed if elapsed else 0.0
+    print(f"solved {solved_hands} hands x {len(targets)} targets in {elapsed:.1f}s "
+          f"({rate:.0f} hands/s, {rate * len(targets):.0f} puzzles/s); {rows_written} rows -> {args.out}")
+
+
+if __name__ == '__main__':
+    main()
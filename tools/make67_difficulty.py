@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Difficulty precompute for puzzle banks.
+
+Scores every 4-card hand in a card range and writes the solvable (hand, target) pairs
+as NDJSON with a 0-100 difficulty and an easy/medium/hard bucket. Point the server at
+the file (M67_PUZZLE_BANK_MAKE67 / M67_PUZZLE_BANK_MAKE6OR7) to deal by difficulty.
+
+The fast pass is vectorized with numpy (pip install numpy; the server does not need it):
+a chunk of hands is an (N, 4) array and every evaluation order is one array expression,
+so all hands in the chunk are scored at once. Trees are grouped up front into canonical
+templates (make67_puzzles.canonical_form over stand-in values, per pattern of repeated
+cards), so a hand's distinct count is the number of templates that hit the target, as
+in make67_puzzles.solution_stats. Floats are compared within 1e-6. The only mismatch
+with the exact count is a subterm that happens to equal 0 or 1 for a particular hand
+(x * (3 - 2) vs x / (3 - 2)), which the fast pass counts twice.
+
+--exact rescores each solvable pair with make67_puzzles.solution_stats on a process
+pool, for exact counts at a fraction of the speed.
+
+  python tools/make67_difficulty.py --game make67 --min 1 --max 13 --out make67_bank.ndjson
+  python tools/make67_difficulty.py --game make67 --min 1 --max 60 --out big.ndjson      # ~600k hands
+  python tools/make67_difficulty.py --game make6or7 --exact --out make6or7_bank.ndjson
+"""
+import argparse
+import functools
+import itertools
+import json
+import math
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import make67_puzzles  # noqa: E402
+
+TOL = 1e-6
+
+
+def _node(np, op: str, x, b):
+    """Vectorized x op b plus a mask of trivial steps (see make67_puzzles._trivial)."""
+    if op == '+':
+        return x + b, (x == 0) | (b == 0)
+    if op == '-':
+        return x - b, b == 0
+    if op == '*':
+        return x * b, (x == 0) | (x == 1) | (b == 0) | (b == 1)
+    return x / b, (b == 1) | (x == 0)
+
+
+# Distinct, well-spread stand-ins for the four positions when computing templates
+_LABELS = (1009, 2003, 3001, 4001)
+
+
+def _position_trees(ops: str):
+    """Every derivation tree over positions 0-3 (commutative mirrors once), in
+    make67_puzzles.Solver.explain()'s (code, left, right) format.
+    """
+    codes = [i for i, o in enumerate(make67_puzzles._CODE_OPS) if o[-1] in ops]
+    pairs: dict[frozenset, list] = {}
+    for i, j in itertools.permutations(range(4), 2):
+        for c in codes:
+            op = make67_puzzles._CODE_OPS[c]
+            if op[0] == 'r' or (op in '+*' and i > j):
+                continue
+            pairs.setdefault(frozenset((i, j)), []).append((c, i, j))
+    for key, nodes in pairs.items():
+        rest = sorted(set(range(4)) - key)
+        for k, l in (rest, rest[::-1]):
+            for ab in nodes:
+                for c2 in codes:
+                    for c3 in codes:
+                        yield (c3, (c2, ab, k), l)
+    for key in (frozenset((0, 1)), frozenset((0, 2)), frozenset((0, 3))):
+        for ab in pairs[key]:
+            for cd in pairs[frozenset(range(4)) - key]:
+                for c in codes:
+                    yield (c, ab, cd)
+
+
+def _relabel(tree, labels):
+    if isinstance(tree, int):
+        return labels[tree]
+    code, x, b = tree
+    return (code, _relabel(x, labels), _relabel(b, labels))
+
+
+@functools.lru_cache(maxsize=None)
+def _templates(ops: str, pattern: tuple) -> list[list]:
+    """Position trees grouped by canonical form, for hands whose sorted cards repeat as in
+    `pattern` (pattern[i]: card i equals card i + 1). Stand-in values make the forms
+    structural; equal cards share a stand-in so that their swaps fold together.
+    """
+    labels = [_LABELS[0]]
+    for same, label in zip(pattern, _LABELS[1:]):
+        labels.append(labels[-1] if same else label)
+    groups: dict = {}
+    for tree in _position_trees(ops):
+        try:
+            form = make67_puzzles.canonical_form(_relabel(tree, labels))
+        except (TypeError, ZeroDivisionError):
+            continue        # divides by a difference of equal cards
+        groups.setdefault(form, []).append(tree)
+    return list(groups.values())
+
+
+def _apply(np, code: int, a, b):
+    """Apply a _CODE_OPS code to (value, steps, frac) triples of arrays."""
+    op = make67_puzzles._CODE_OPS[code]
+    (x, sx, fx), (y, sy, fy) = (b, a) if op[0] == 'r' else (a, b)
+    v, trivial = _node(np, op[-1], x, y)
+    frac = fx | fy | (np.abs(v - np.rint(v)) > TOL)
+    return v, sx + sy + ~trivial, frac
+
+
+def score_hands(np, hands, ops: str, goals: list[int]) -> dict:
+    """Score an (N, 4) array of sorted hands that share one repeat pattern.
+
+    Returns goal -> (distinct, min_steps, fraction_only) arrays. A canonical form counts
+    once if any of its trees hits the goal; it needs a fraction only if all of them do.
+    """
+    values = hands.astype(np.float64)
+    n = len(values)
+    pattern = tuple(bool(values[0, i] == values[0, i + 1]) for i in range(3))
+    zero = np.zeros(n, dtype=np.int8)
+    no = np.zeros(n, dtype=bool)
+    leaves = [(values[:, i], zero, no) for i in range(4)]
+    pair_cache = {}
+
+    def ev(node):
+        if isinstance(node, int):
+            return leaves[node]
+        if isinstance(node[1], int) and isinstance(node[2], int):
+            hit = pair_cache.get(node)
+            if hit is None:
+                hit = pair_cache[node] = _apply(np, node[0], leaves[node[1]], leaves[node[2]])
+            return hit
+        return _apply(np, node[0], ev(node[1]), ev(node[2]))
+
+    out = {g: (np.zeros(n, dtype=np.int32), np.full(n, 4, dtype=np.int8), np.ones(n, dtype=bool)) for g in goals}
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        for trees in _templates(ops, pattern):
+            evaluated = [ev(t) for t in trees]
+            for g in goals:
+                any_hit = np.zeros(n, dtype=bool)
+                steps = np.full(n, 4, dtype=np.int8)
+                frac = np.ones(n, dtype=bool)
+                for v, s, f in evaluated:
+                    hit = np.abs(v - g) < TOL
+                    if hit.any():
+                        any_hit |= hit
+                        np.minimum(steps, np.where(hit, s, 4).astype(np.int8), out=steps)
+                        frac &= ~hit | f
+                if any_hit.any():
+                    distinct, min_steps, frac_only = out[g]
+                    distinct += any_hit
+                    np.minimum(min_steps, steps, out=min_steps)
+                    frac_only &= ~any_hit | frac
+    return out
+
+
+def _iter_hands(np, lo: int, hi: int, chunk: int):
+    """Yield (N, 4) int arrays of sorted hands, in lexicographic order."""
+    gen = itertools.combinations_with_replacement(range(lo, hi + 1), 4)
+    while True:
+        block = np.fromiter(itertools.islice(gen, chunk), dtype=np.dtype((np.int32, 4)))
+        if not len(block):
+            return
+        yield block
+
+
+def _exact(args):
+    cards, target, game = args
+    return make67_puzzles.solution_stats(cards, target, game)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Score every hand in a card range by difficulty.')
+    parser.add_argument('--game', choices=sorted(make67_puzzles.GAMES), default='make67')
+    parser.add_argument('--min', type=int, default=1, help='Lowest card value (default 1)')
+    parser.add_argument('--max', type=int, help='Highest card value (default: 13, or 15 for make6or7)')
+    parser.add_argument('--targets', help="Comma-separated targets (default: the game's targets)")
+    parser.add_argument('--chunk', type=int, default=50_000, help='Hands per vectorized chunk')
+    parser.add_argument('--exact', action='store_true', help='Rescore solvable hands with canonical distinct counts')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2, help='Processes for --exact')
+    parser.add_argument('--out', required=True, help='Output NDJSON file')
+    args = parser.parse_args()
+
+    try:
+        import numpy
+    except ImportError:
+        sys.exit('numpy is required for the vectorized pass: pip install numpy')
+    np = numpy
+
+    spec = make67_puzzles.GAMES[args.game]
+    targets = [int(t) for t in args.targets.split(',')] if args.targets else list(spec.targets)
+    hi = args.max if args.max is not None else (15 if args.game == 'make6or7' else 13)
+    total = math.comb(hi - args.min + 4, 4)
+    print(f"{args.game}: {total} hands in {args.min}..{hi}, targets {targets}", file=sys.stderr)
+
+    t0 = time.perf_counter()
+    rows = []
+    done = 0
+    goals = [g for t in targets for g in (t, -t)]
+    for hands in _iter_hands(np, args.min, hi, args.chunk):
+        repeats = hands[:, 1:] == hands[:, :-1]
+        for pattern in np.unique(repeats, axis=0):
+            group = hands[(repeats == pattern).all(axis=1)]
+            scored = score_hands(np, group, spec.ops, goals)
+            for t in targets:
+                pos, neg = scored[t][0], scored[-t][0]
+                for i in np.nonzero((pos > 0) | (neg > 0))[0]:
+                    g = t if pos[i] else -t
+                    distinct, steps, frac = (int(a[i]) for a in scored[g])
+                    rating = make67_puzzles.difficulty_rating(distinct, steps, bool(frac))
+                    rows.append({'cards': group[i].tolist(), 'target': t, 'negated': g != t, 'distinct': distinct,
+                                 'min_steps': steps, 'fraction_only': bool(frac), 'difficulty': rating,
+                                 'bucket': make67_puzzles.bucket_for(rating)})
+        done += len(hands)
+        rate = done / (time.perf_counter() - t0)
+        print(f"  {done}/{total} hands ({rate:.0f}/s), {len(rows)} solvable pairs", file=sys.stderr)
+    fast_elapsed = time.perf_counter() - t0
+
+    if args.exact and rows:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            jobs = ((r['cards'], r['target'], args.game) for r in rows)
+            for row, stats in zip(rows, pool.map(_exact, jobs, chunksize=200)):
+                if stats is None:
+                    # Reached only within float tolerance; not an exact solution
+                    row['bucket'] = None
+                    continue
+                row.update({k: stats[k] for k in ('negated', 'distinct', 'trees', 'min_steps', 'fraction_only',
+                                                  'capped', 'difficulty', 'bucket')})
+        rows = [r for r in rows if r['bucket']]
+
+    tmp = args.out + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        for r in rows:
+            f.write(json.dumps(r, separators=(',', ':')) + '\n')
+    os.replace(tmp, args.out)
+    elapsed = time.perf_counter() - t0
+    buckets = Counter(r['bucket'] for r in rows)
+    print(f"scored {total} hands in {elapsed:.1f}s (vectorized pass {fast_elapsed:.1f}s, "
+          f"{total / fast_elapsed:.0f} hands/s); {len(rows)} solvable pairs -> {args.out}")
+    print('  ' + ', '.join(f"{name}: {buckets.get(name, 0)}" for name, _lo, _hi in make67_puzzles.DIFFICULTY_BUCKETS))
+
+
+if __name__ == '__main__':
+    main()
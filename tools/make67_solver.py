@@ -18,6 +18,10 @@ Usage examples:
   # Solve 25 puzzles on deployed site, headless Chrome
   python tools/make67_solver.py --url https://<YOUR_DOMAIN>/make67 --count 25 --headless
 
+  # Offline: difficulty stats for one hand (distinct solutions, fewest real steps), no browser needed
+  python tools/make67_solver.py --score "2 3 8 9"
+  python tools/make67_solver.py --score "60 7 3 2" --list
+
 Authentication:
 - The page shows a Google "Sign in" button if you are not logged in. This script will detect that and
   wait for you to complete login manually. Once logged in, the script will continue automatically.
@@ -37,14 +41,21 @@ from dataclasses import dataclass
 from typing import List, Optional, Tuple
 from urllib.parse import urlparse
 
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options as ChromeOptions
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, StaleElementReferenceException, WebDriverException
-from webdriver_manager.chrome import ChromeDriverManager
+try:
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options as ChromeOptions
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import TimeoutException, StaleElementReferenceException, WebDriverException
+    from webdriver_manager.chrome import ChromeDriverManager
+except ImportError:
+    # Browser automation is optional: try_solve() and the offline tools only need the stdlib
+    webdriver = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import make67_puzzles  # noqa: E402
 
 TOL = 1e-6
 
@@ -134,6 +145,15 @@ def try_solve(nums: List[float], targets: List[float] = [67.0], allowed_ops: Lis
     return dfs(nums)
 
 
+def score_hand(nums: List[int], game: str = 'make67', targets: Optional[List[int]] = None) -> dict:
+    """Exhaustive difficulty stats per target: distinct solutions (one per canonical form,
+    so regrouped or reordered versions of the same idea count once), the fewest steps that
+    change a value, and whether every solution needs a fraction. None for unsolvable targets.
+    """
+    targets = targets or list(make67_puzzles.GAMES[game].targets)
+    return {t: make67_puzzles.solution_stats(nums, t, game) for t in targets}
+
+
 # ---------------- Selenium helpers ------------------
 
 class Make67Bot:
@@ -534,10 +554,32 @@ def main():
     parser.add_argument('--max-action-delay', type=float, default=0.35, help='Maximum delay (seconds) between UI actions when safe-mode is on')
     parser.add_argument('--min-puzzle-seconds', type=float, default=4.2, help='Minimum total seconds a puzzle should take before the final merge (safe-mode)')
     parser.add_argument('--max-puzzle-seconds', type=float, default=6.0, help='Maximum total seconds a puzzle should take before the final merge (safe-mode)')
+    # Offline difficulty scoring
+    parser.add_argument('--score', metavar='CARDS', help='Print difficulty stats for a hand, e.g. "2 3 8 9", and exit')
+    parser.add_argument('--game', choices=sorted(make67_puzzles.GAMES), default='make67', help='Rules for --score (default: make67)')
+    parser.add_argument('--list', action='store_true', help='With --score, also print one expression per distinct solution')
     parser.set_defaults(evasion=True)
     parser.set_defaults(safe_mode=True)
     args = parser.parse_args()
 
+    if args.score:
+        cards = [int(v) for v in args.score.replace(',', ' ').split()]
+        if len(cards) != 4:
+            sys.exit('--score takes four card values')
+        for target, stats in score_hand(cards, args.game).items():
+            if stats is None:
+                print(f'target {target}: no solution')
+                continue
+            print(f"target {target}: {stats['distinct']} distinct / {stats['trees']} trees, "
+                  f"min steps {stats['min_steps']}, fraction only {stats['fraction_only']}, "
+                  f"difficulty {stats['difficulty']} ({stats['bucket']})" + (' [capped]' if stats['capped'] else ''))
+            if args.list:
+                for expr in make67_puzzles.distinct_solutions(cards, target, args.game):
+                    print(f'  {expr}')
+        return
+
+    if webdriver is None:
+        sys.exit('selenium and webdriver-manager are required: pip install --upgrade selenium webdriver-manager')
     bot = Make67Bot(
         args.url,
         headless=args.headless,
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Build or query a precomputed solvability table (make67_puzzles.build_table).
+
+Every multiset of four card values in the chosen range gets one fixed-size row with
+solvability per target, a canonical solution and a difficulty score. The server can
+deal from it (M67_PUZZLE_TABLE_MAKE67 / M67_PUZZLE_TABLE_MAKE6OR7) instead of
+generating hands on the fly.
+
+  python tools/make67_table.py build --game make6or7 --out make6or7.m67t
+  python tools/make67_table.py build --game make67 --min 1 --max 25 --out make67.m67t
+  python tools/make67_table.py lookup make67.m67t 2 3 8 9
+  python tools/make67_table.py stats make67.m67t
+"""
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import make67_puzzles  # noqa: E402
+
+
+def cmd_build(args):
+    t0 = time.perf_counter()
+
+    def progress(done, total):
+        print(f"  {done}/{total} hands ({done / (time.perf_counter() - t0):.0f}/s)", file=sys.stderr)
+    try:
+        rows = make67_puzzles.build_table(args.out, args.game, args.min, args.max, progress=progress)
+    except ValueError as e:
+        sys.exit(f"error: {e}")
+    elapsed = time.perf_counter() - t0
+    print(f"wrote {rows} hands to {args.out} ({os.path.getsize(args.out)} bytes) in {elapsed:.1f}s")
+
+
+def cmd_lookup(args):
+    table = make67_puzzles.PuzzleTable(args.table)
+    for target in table.targets:
+        row = table.lookup(args.cards, target)
+        if row is None:
+            print(f"cards outside table range {table.lo}..{table.hi}")
+            return
+        print(f"target {target}: {row}")
+
+
+def cmd_stats(args):
+    table = make67_puzzles.PuzzleTable(args.table)
+    print(f"game={table.game} range={table.lo}..{table.hi} targets={table.targets} hands={table.rows}")
+    for target in table.targets:
+        solvable = 0
+        buckets = Counter()
+        for row in range(table.rows):
+            info = table.lookup(table.row_cards(row), target)
+            if info['flags'] & make67_puzzles.FLAG_EXACT:
+                solvable += 1
+                buckets[min(info['difficulty'], 99) // 20 * 20] += 1
+        print(f"target {target}: {solvable} solvable ({solvable / table.rows:.1%})")
+        for lo in sorted(buckets):
+            print(f"  difficulty {lo:>3}-{lo + 19:<3} {buckets[lo]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Precomputed 4-card solvability tables.')
+    sub = parser.add_subparsers(dest='cmd', required=True)
+    b = sub.add_parser('build', help='Enumerate a card range and write a table')
+    b.add_argument('--game', choices=sorted(make67_puzzles.GAMES), default='make6or7')
+    b.add_argument('--min', type=int, help='Lowest card value (default: game minimum)')
+    b.add_argument('--max', type=int, help='Highest card value (default: game maximum)')
+    b.add_argument('--out', required=True, help='Output file')
+    b.set_defaults(func=cmd_build)
+    q = sub.add_parser('lookup', help='Show the row for one hand')
+    q.add_argument('table')
+    q.add_argument('cards', type=int, nargs=4)
+    q.set_defaults(func=cmd_lookup)
+    s = sub.add_parser('stats', help='Solvable share and difficulty histogram')
+    s.add_argument('table')
+    s.set_defaults(func=cmd_stats)
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()